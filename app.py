@@ -2,12 +2,18 @@ import os
 import re
 import asyncio
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from dateutil import parser as date_parser
 import pandas as pd
 from flask import Flask, render_template, request, jsonify
 from flask_socketio import SocketIO, emit
 from playwright.async_api import async_playwright
+from tweet_db import TweetDatabase
+from tweet_exporters import export_tweets, parse_formats, run_in_background
+from tweet_archive import TweetArchive, archive_enabled
+from tweet_catalog import get_catalog
+from tweet_record import Tweet, match_keywords
+from tweet_trends import TrendDetector
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'twitter_scraper_secret_key'
@@ -22,124 +28,90 @@ def emit_progress(message, data=None):
     })
     print(message)  # Also print to console
 
-def save_tweets_to_files(username, tweets, keywords=None, start_date=None):
-    # Create 'tweets' directory if it doesn't exist
-    os.makedirs('tweets', exist_ok=True)
+def save_tweets_to_files(username, tweets, keywords=None, start_date=None, formats=None):
+    """
+    Export scraped tweets in the selected formats (see tweet_exporters.EXPORTERS).
     
+    Returns once the primary store is on disk; the remaining formats (e.g. the
+    slow Excel export) and the database, trend and archive updates finish on
+    the export pool.
+    """
     # Create filename with timestamp, keywords, and date
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     keyword_suffix = f"_keywords_{'-'.join(keywords)}" if keywords else ""
     date_suffix = f"_from_{start_date.strftime('%Y%m%d')}" if start_date else ""
-    txt_filename = f'tweets/{username}{keyword_suffix}{date_suffix}_{timestamp}.txt'
-    excel_filename = f'tweets/{username}{keyword_suffix}{date_suffix}_{timestamp}.xlsx'
+    base_path = f'tweets/{username}{keyword_suffix}{date_suffix}_{timestamp}'
     
     emit_progress("💾 Saving tweets to files...")
     
-    # Save as text file
-    with open(txt_filename, 'w', encoding='utf-8') as f:
-        f.write(f"Tweets from @{username}\n")
-        if keywords:
-            f.write(f"Filtered by keywords: {', '.join(keywords)}\n")
-        if start_date:
-            f.write(f"From date: {start_date.strftime('%Y-%m-%d')}\n")
-        f.write(f"Scraped at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Total tweets found: {len(tweets)}\n")
-        f.write("=" * 80 + "\n\n")
-        
-        for i, tweet in enumerate(tweets, 1):
-            f.write(f"Tweet #{i}:\n")
-            f.write(f"Date: {tweet.get('date', 'N/A')}\n")
-            f.write(f"Text: {tweet.get('text', 'N/A')}\n")
-            f.write(f"Likes: {tweet.get('likes', '0')}\n")
-            f.write(f"Retweets: {tweet.get('retweets', '0')}\n")
-            f.write(f"URL: {tweet.get('url', 'N/A')}\n")
-            if keywords:
-                matched_keywords = [kw for kw in keywords if kw.lower() in tweet.get('text', '').lower()]
-                f.write(f"Matched Keywords: {', '.join(matched_keywords)}\n")
-            f.write("-" * 80 + "\n\n")
+    # Bind the current progress callback so background exports report to the right client
+    progress = emit_progress
+    catalog = get_catalog()
+    timestamps = [tweet.timestamp for tweet in tweets if tweet.timestamp is not None]
+    min_date = datetime.fromtimestamp(min(timestamps), tz=timezone.utc).strftime('%Y-%m-%d') if timestamps else None
+    max_date = datetime.fromtimestamp(max(timestamps), tz=timezone.utc).strftime('%Y-%m-%d') if timestamps else None
+    
+    def on_export_done(fmt, path, error):
+        if error:
+            progress(f"⚠️ Error creating {fmt} export: {error}")
+            return
+        progress(f"✅ Saved {fmt} export: {path}")
+        try:
+            catalog.register(path, username, fmt, rows=len(tweets), keywords=keywords, start_date=start_date,
+                             min_date=min_date, max_date=max_date)
+        except Exception as e:
+            progress(f"⚠️ Error updating tweet catalog: {e}")
+    
+    result = export_tweets(username, tweets, keywords, start_date, base_path=base_path,
+                           formats=formats, on_done=on_export_done)
+    run_in_background(ingest_scraped_table, username, result.table, progress)
     
-    # Save as Excel file
+    if result.pending:
+        emit_progress(f"⏳ Writing {', '.join(result.pending)} exports in the background...")
+    return result
+
+def ingest_scraped_table(username, table, progress=emit_progress):
+    """Database, trend and archive updates for a saved scrape (runs on the export pool)"""
+    # Merge into the tweet database (upsert by tweet id, so re-scrapes don't duplicate)
     try:
-        emit_progress("📊 Creating Excel file...")
-        
-        # Prepare data for DataFrame
-        excel_data = []
-        for i, tweet in enumerate(tweets, 1):
-            matched_keywords = []
-            if keywords:
-                matched_keywords = [kw for kw in keywords if kw.lower() in tweet.get('text', '').lower()]
-            
-            excel_data.append({
-                'Tweet #': i,
-                'Username': f"@{username}",
-                'Date': tweet.get('date', 'N/A'),
-                'Tweet Text': tweet.get('text', 'N/A'),
-                'Likes': tweet.get('likes', '0'),
-                'Retweets': tweet.get('retweets', '0'),
-                'Tweet URL': tweet.get('url', 'N/A'),
-                'Matched Keywords': ', '.join(matched_keywords) if matched_keywords else 'N/A',
-                'Filter Keywords': ', '.join(keywords) if keywords else 'None',
-                'Start Date Filter': start_date.strftime('%Y-%m-%d') if start_date else 'None',
-                'Scraped At': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-        
-        # Create DataFrame and save to Excel
-        df = pd.DataFrame(excel_data)
-        
-        # Create Excel writer with formatting
-        with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-            sheet_name = f'{username}_tweets'
-            if keywords or start_date:
-                sheet_name = f'{username}_filtered'
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets[sheet_name]
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                
-                # Set column width (with some padding)
-                adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Make headers bold
-            from openpyxl.styles import Font
-            for cell in worksheet[1]:
-                cell.font = Font(bold=True)
-        
-        emit_progress("✅ Files saved successfully!")
-        return txt_filename, excel_filename
-        
+        upserted = TweetDatabase().upsert_frame(table)
+        progress(f"🗄️ Tweet database updated: {upserted} tweets upserted")
     except Exception as e:
-        emit_progress(f"⚠️ Error creating Excel file: {e}")
-        return txt_filename, None
+        progress(f"⚠️ Error updating tweet database: {e}")
+    
+    # Fold only the new tweets into the account's trending-topic counters
+    try:
+        added = TrendDetector().update(username, table)
+        progress(f"📈 Trend counters updated with {added} new tweets")
+    except Exception as e:
+        progress(f"⚠️ Error updating trend counters: {e}")
+    
+    # Archival mode: append a compressed per-account segment (compacted per policy)
+    if archive_enabled():
+        try:
+            segment = TweetArchive().append(username, table)
+            if segment:
+                progress(f"🗜️ Archived {segment['count']} tweets ({segment['bytes']} bytes compressed)")
+        except Exception as e:
+            progress(f"⚠️ Error archiving tweets: {e}")
+
+def describe_export(result):
+    """Human-readable summary of where a scrape was saved"""
+    pending = [result.paths[fmt] for fmt in result.pending]
+    if pending:
+        return f"Saved to {result.primary_path} (also writing {', '.join(pending)})"
+    return f"Saved to {result.primary_path}"
 
 def filter_tweets_by_keywords(tweets, keywords):
     """Filter tweets that contain any of the specified keywords (case-insensitive)"""
     if not keywords:
         return tweets
     
-    filtered_tweets = []
-    keywords_lower = [kw.lower().strip() for kw in keywords]
-    
-    emit_progress(f"🔍 Filtering {len(tweets)} tweets for keywords: {', '.join(keywords_lower)}")
+    emit_progress(f"🔍 Filtering {len(tweets)} tweets for keywords: {', '.join(kw.lower().strip() for kw in keywords)}")
     
-    for tweet in tweets:
-        tweet_text = tweet.get('text', '').lower()
-        matches = [kw for kw in keywords_lower if kw in tweet_text]
-        if matches:
-            filtered_tweets.append(tweet)
+    # Matches are recorded on each tweet once and reused by the exporters
+    match_keywords(tweets, keywords)
+    filtered_tweets = [tweet for tweet in tweets if tweet.matched_keywords]
     
     emit_progress(f"🎯 Keyword filtering result: {len(filtered_tweets)} tweets matched")
     return filtered_tweets
@@ -149,29 +121,12 @@ def filter_tweets_by_date(tweets, start_date):
     if not start_date:
         return tweets
     
-    filtered_tweets = []
     emit_progress(f"📅 Filtering {len(tweets)} tweets from date: {start_date.strftime('%Y-%m-%d')}")
     
-    for tweet in tweets:
-        tweet_date_str = tweet.get('date', '')
-        if tweet_date_str and tweet_date_str != 'N/A':
-            try:
-                # Parse the tweet date (ISO format from Twitter)
-                tweet_date = date_parser.parse(tweet_date_str)
-                # Make start_date timezone-aware if tweet_date is timezone-aware
-                if tweet_date.tzinfo and not start_date.tzinfo:
-                    start_date = start_date.replace(tzinfo=timezone.utc)
-                elif not tweet_date.tzinfo and start_date.tzinfo:
-                    tweet_date = tweet_date.replace(tzinfo=timezone.utc)
-                
-                if tweet_date.date() >= start_date.date():
-                    filtered_tweets.append(tweet)
-            except Exception as e:
-                # If we can't parse the date, include the tweet to be safe
-                filtered_tweets.append(tweet)
-        else:
-            # If no date available, include the tweet
-            filtered_tweets.append(tweet)
+    # Compare parsed timestamps against UTC midnight of the start date;
+    # tweets without a (parseable) date are included to be safe
+    cutoff = datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc).timestamp()
+    filtered_tweets = [tweet for tweet in tweets if tweet.timestamp is None or tweet.timestamp >= cutoff]
     
     emit_progress(f"📅 Date filtering result: {len(filtered_tweets)} tweets matched")
     return filtered_tweets
@@ -414,14 +369,8 @@ async def scrape_twitter_with_playwright(username, keywords=None, start_date=Non
                             retweet_element = await tweet_element.query_selector('[data-testid="retweet"] span')
                             retweets = await retweet_element.inner_text() if retweet_element else "0"
                             
-                            tweet_data = {
-                                'text': tweet_text,
-                                'date': tweet_date,
-                                'url': tweet_url,
-                                'likes': likes,
-                                'retweets': retweets,
-                                'session': session_count
-                            }
+                            tweet_data = Tweet.from_scraped(username, tweet_text, tweet_date, tweet_url,
+                                                            likes, retweets, session_count)
                             
                             session_tweets.append(tweet_data)
                             
@@ -587,8 +536,10 @@ async def simulate_human_browsing(playwright_instance, session_count):
         except:
             pass
 
-async def scrape_twitter(username, keywords=None, start_date=None):
+async def scrape_twitter(username, keywords=None, start_date=None, formats=None):
     try:
+        # Reject unknown export formats before spending minutes scraping
+        formats = parse_formats(formats)
         emit_progress(f"🚀 Starting multi-session scrape for @{username}")
         if keywords:
             emit_progress(f"🔍 Keywords: {keywords}")
@@ -623,8 +574,9 @@ async def scrape_twitter(username, keywords=None, start_date=None):
         
         emit_progress(f"🎯 Final result: {len(tweets)} tweets after filtering (started with {original_count})")
         
-        # Save tweets to both text and Excel files
-        txt_file, excel_file = save_tweets_to_files(username, tweets, keywords, start_date)
+        # Save tweets off the event loop; only the primary store is awaited
+        loop = asyncio.get_running_loop()
+        export_result = await loop.run_in_executor(None, save_tweets_to_files, username, tweets, keywords, start_date, formats)
         
         # Build success message
         message_parts = []
@@ -635,10 +587,7 @@ async def scrape_twitter(username, keywords=None, start_date=None):
         
         filter_info = f" {' and '.join(message_parts)}" if message_parts else ""
         
-        if excel_file:
-            return True, f"Successfully scraped {len(tweets)} tweets from @{username}{filter_info}. Saved to {txt_file} and {excel_file}"
-        else:
-            return True, f"Successfully scraped {len(tweets)} tweets from @{username}{filter_info}. Saved to {txt_file} (Excel export failed)"
+        return True, f"Successfully scraped {len(tweets)} tweets from @{username}{filter_info}. {describe_export(export_result)}"
     except Exception as e:
         emit_progress(f"❌ Error: {str(e)}")
         return False, f"Error scraping Twitter: {str(e)}"
@@ -670,6 +619,12 @@ async def scrape():
         except ValueError:
             return jsonify({'success': False, 'message': 'Invalid date format. Please use YYYY-MM-DD'})
     
+    # Process export formats (e.g. "txt,csv" or ["jsonl", "xlsx"])
+    try:
+        formats = parse_formats(data.get('formats'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    
     try:
         emit_progress(f"🚀 Starting scrape for @{username}")
         if keywords:
@@ -691,8 +646,9 @@ async def scrape():
             else:
                 return jsonify({'status': 'error', 'message': "No tweets were found. The profile might be private or doesn't exist."})
         
-        # Save tweets to both text and Excel files
-        txt_file, excel_file = save_tweets_to_files(username, tweets, keywords, start_date)
+        # Save tweets off the event loop; only the primary store is awaited
+        loop = asyncio.get_running_loop()
+        export_result = await loop.run_in_executor(None, save_tweets_to_files, username, tweets, keywords, start_date, formats)
         
         # Build success message
         message_parts = []
@@ -703,15 +659,12 @@ async def scrape():
         
         filter_info = f" {' and '.join(message_parts)}" if message_parts else ""
         
-        if excel_file:
-            return jsonify({'status': 'success', 'message': f"Successfully scraped {len(tweets)} tweets from @{username}{filter_info}. Saved to {txt_file} and {excel_file}"})
-        else:
-            return jsonify({'status': 'success', 'message': f"Successfully scraped {len(tweets)} tweets from @{username}{filter_info}. Saved to {txt_file} (Excel export failed)"})
+        return jsonify({'status': 'success', 'message': f"Successfully scraped {len(tweets)} tweets from @{username}{filter_info}. {describe_export(export_result)}", 'files': export_result.paths})
     except Exception as e:
         emit_progress(f"❌ Error during scraping: {e}")
         return jsonify({'status': 'error', 'message': str(e)})
 
-def scrape_twitter_profile(username, keywords, start_date, progress_callback=None):
+def scrape_twitter_profile(username, keywords, start_date, progress_callback=None, formats=None):
     """
     Export function for unified app to use Twitter scraping functionality
     """
@@ -731,6 +684,10 @@ def scrape_twitter_profile(username, keywords, start_date, progress_callback=Non
                 start_date_obj = datetime.strptime(start_date, '%Y-%m-%d')
             except:
                 pass
+        try:
+            formats = parse_formats(formats)
+        except ValueError as e:
+            return {'success': False, 'message': str(e), 'tweet_count': 0}
         
         # Run the scraping
         loop = asyncio.new_event_loop()
@@ -742,14 +699,16 @@ def scrape_twitter_profile(username, keywords, start_date, progress_callback=Non
             return {'success': False, 'message': 'No tweets found', 'tweet_count': 0}
         
         # Save tweets
-        txt_file, excel_file = save_tweets_to_files(username, tweets, keywords_list, start_date_obj)
+        export_result = save_tweets_to_files(username, tweets, keywords_list, start_date_obj, formats)
         
         return {
             'success': True, 
             'message': f'Successfully scraped {len(tweets)} tweets',
             'tweet_count': len(tweets),
-            'txt_file': txt_file,
-            'excel_file': excel_file
+            'txt_file': export_result.paths.get('txt'),
+            'excel_file': export_result.paths.get('xlsx'),
+            'store_file': export_result.primary_path,
+            'files': export_result.paths
         }
         
     except Exception as e:
@@ -15,11 +15,30 @@ Based on PRD requirements for 20 blogs/week targeting AI engineers and executive
 import pandas as pd
 import re
 import json
-from collections import Counter, defaultdict
 from datetime import datetime
 import openai
 import os
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator
+from tweet_readers import iter_tweets
+from tweet_record import Tweet
+from tweet_matching import ThemeClassifier
+from tweet_phrases import mine_phrases, mine_phrases_by_theme
+from llm_cache import get_completion_cache
+
+# Gauntlet AI blog themes: keyword groups that must all match (each group: any keyword)
+GAUNTLET_THEMES = {
+    'Training Program': [['gauntlet'], ['training', 'bootcamp', 'program']],
+    'Legacy Code & Enterprise': ['legacy', 'enterprise', 'fortran', 'cobol', 'assembly'],
+    'AI-First Development': ['ai-first', 'ai engineer'],
+    'Career & Salary': ['job', 'career', '$'],
+    'AI Tools & Agents': ['agent', 'claude', 'gpt']
+}
+GENERAL_THEME = 'General AI Development'
+
+
+def _title_case(phrase: str) -> str:
+    """Capitalize the first letter of each word, keeping the rest as mined ('claude code' -> 'Claude Code')"""
+    return ' '.join(word[:1].upper() + word[1:] for word in phrase.split())
 
 class GauntletBlogGenerator:
     def __init__(self, openai_api_key: Optional[str] = None):
@@ -35,6 +54,7 @@ class GauntletBlogGenerator:
             'legacy code', 'enterprise', 'fortran', 'cobol', 'assembly',
             'ai agents', 'claude', 'gpt', 'llm', 'machine learning'
         ]
+        self.theme_classifier = ThemeClassifier(GAUNTLET_THEMES, gate=self.gauntlet_keywords, fallback=GENERAL_THEME)
         
         # SEO/GEO optimization prompts
         self.seo_prompt = """
@@ -55,35 +75,14 @@ class GauntletBlogGenerator:
         - Optimizes for LLM training data inclusion
         """
 
-    def load_tweet_data(self, file_path: str) -> List[Dict]:
-        """Load and parse tweet data from text file."""
-        tweets = []
-        current_tweet = {}
-        
+    def iter_tweet_data(self, file_path: str) -> Iterator[Tweet]:
+        """Stream parsed tweet records from a .txt or .jsonl export, one at a time."""
+        return iter_tweets(file_path)
+
+    def load_tweet_data(self, file_path: str) -> List[Tweet]:
+        """Load and parse tweet data from a .txt or .jsonl export."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Split by tweet separators
-            tweet_blocks = content.split('Tweet #')[1:]  # Skip header
-            
-            for block in tweet_blocks:
-                lines = block.strip().split('\n')
-                tweet = {}
-                
-                for line in lines:
-                    if line.startswith('Date:'):
-                        tweet['date'] = line.replace('Date:', '').strip()
-                    elif line.startswith('Text:'):
-                        tweet['text'] = line.replace('Text:', '').strip()
-                    elif line.startswith('Likes:'):
-                        tweet['likes'] = line.replace('Likes:', '').strip()
-                    elif line.startswith('URL:'):
-                        tweet['url'] = line.replace('URL:', '').strip()
-                
-                if tweet.get('text'):
-                    tweets.append(tweet)
-            
+            tweets = [tweet for tweet in self.iter_tweet_data(file_path) if tweet.text]
             print(f"✅ Loaded {len(tweets)} tweets from {file_path}")
             return tweets
             
@@ -91,28 +90,15 @@ class GauntletBlogGenerator:
             print(f"❌ Error loading tweets: {e}")
             return []
 
-    def extract_gauntlet_themes(self, tweets: List[Dict]) -> Dict[str, List[Dict]]:
+    def extract_gauntlet_themes(self, tweets: List[Tweet]) -> Dict[str, List[Tweet]]:
         """Extract Gauntlet AI-related themes and topics from tweets."""
-        themes = defaultdict(list)
-        
-        for tweet in tweets:
-            text = tweet.get('text', '').lower()
-            
-            # Check for Gauntlet AI mentions
-            if any(keyword in text for keyword in self.gauntlet_keywords):
-                # Categorize by theme
-                if 'gauntlet' in text and ('training' in text or 'bootcamp' in text or 'program' in text):
-                    themes['Training Program'].append(tweet)
-                elif 'legacy' in text or 'enterprise' in text or any(lang in text for lang in ['fortran', 'cobol', 'assembly']):
-                    themes['Legacy Code & Enterprise'].append(tweet)
-                elif 'ai-first' in text or 'ai engineer' in text:
-                    themes['AI-First Development'].append(tweet)
-                elif 'job' in text or 'career' in text or '$' in text:
-                    themes['Career & Salary'].append(tweet)
-                elif 'agent' in text or 'claude' in text or 'gpt' in text:
-                    themes['AI Tools & Agents'].append(tweet)
-                else:
-                    themes['General AI Development'].append(tweet)
+        # One matching pass -> tweets x themes membership (multi-label, order-independent)
+        matrix = self.theme_classifier.classify([tweet.text for tweet in tweets])
+        themes = {}
+        for theme in matrix.themes:
+            rows = matrix.rows(theme)
+            if len(rows):
+                themes[theme] = [tweets[i] for i in rows]
         
         # Sort themes by tweet count
         sorted_themes = dict(sorted(themes.items(), key=lambda x: len(x[1]), reverse=True))
@@ -123,7 +109,7 @@ class GauntletBlogGenerator:
         
         return sorted_themes
 
-    def generate_blog_topics(self, themes: Dict[str, List[Dict]], target_count: int = 20) -> List[Dict]:
+    def generate_blog_topics(self, themes: Dict[str, List[Tweet]], target_count: int = 20) -> List[Dict]:
         """Generate blog topics from extracted themes."""
         blog_topics = []
         
@@ -169,20 +155,24 @@ class GauntletBlogGenerator:
         # Add priority topics
         blog_topics.extend(priority_topics)
         
+        # Extract common phrases for every theme at once (themes are mined in parallel)
+        phrases_by_theme = mine_phrases_by_theme(
+            {theme: [tweet.text for tweet in tweet_list] for theme, tweet_list in themes.items()}
+        )
+        
         # Generate additional topics from tweet themes
         for theme, tweet_list in themes.items():
             if len(blog_topics) >= target_count:
                 break
                 
-            # Extract common questions/topics from tweets
-            common_phrases = self._extract_common_phrases(tweet_list)
+            common_phrases = phrases_by_theme.get(theme, [])
             
             for phrase in common_phrases[:3]:  # Top 3 per theme
                 if len(blog_topics) >= target_count:
                     break
                     
                 topic = {
-                    'title': f'Understanding {phrase} in AI Development',
+                    'title': f'Understanding {_title_case(phrase)} in AI Development',
                     'theme': theme,
                     'keywords': [phrase.lower(), 'ai development'],
                     'target_audience': 'AI Engineers',
@@ -194,15 +184,9 @@ class GauntletBlogGenerator:
         print(f"📝 Generated {len(blog_topics)} blog topics")
         return blog_topics[:target_count]
 
-    def _extract_common_phrases(self, tweets: List[Dict]) -> List[str]:
-        """Extract common phrases from tweet text."""
-        all_text = ' '.join([tweet.get('text', '') for tweet in tweets])
-        
-        # Simple phrase extraction (can be enhanced with NLP)
-        phrases = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', all_text)
-        phrase_counts = Counter(phrases)
-        
-        return [phrase for phrase, count in phrase_counts.most_common(10) if count > 1]
+    def _extract_common_phrases(self, tweets: List[Tweet]) -> List[str]:
+        """Extract common phrases from tweet text (streaming n-gram miner, see tweet_phrases)."""
+        return mine_phrases(tweet.text for tweet in tweets)
 
     def generate_blog_post(self, topic: Dict, knowledge_base: str = "") -> Dict:
         """Generate a complete blog post for the given topic."""
@@ -238,13 +222,9 @@ class GauntletBlogGenerator:
         
         try:
             if self.openai_api_key:
-                response = openai.ChatCompletion.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=800,
-                    temperature=0.7
-                )
-                content = response.choices[0].message.content
+                request = {'model': "gpt-4", 'messages': [{"role": "user", "content": prompt}],
+                           'max_tokens': 800, 'temperature': 0.7}
+                content = get_completion_cache().complete(lambda: openai.ChatCompletion.create(**request), **request)
             else:
                 # Mock content for testing
                 content = self._generate_mock_blog_post(topic)
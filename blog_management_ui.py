@@ -14,9 +14,18 @@ Web interface for managing the automated blog generation system:
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
 from flask_socketio import SocketIO, emit
 import os
+import re
 import json
+import threading
+import time
+import uuid
 from datetime import datetime
-from gauntlet_blog_system import GauntletBlogSystem
+from typing import Dict
+from gauntlet_blog_system import GauntletBlogSystem, DEFAULT_TWEET_USERNAME
+from tweet_db import TweetQuery
+from tweet_catalog import get_catalog
+from tweet_store import tweet_table_cache
+from llm_cache import get_completion_cache
 import pandas as pd
 
 # Skip dotenv loading due to UTF-16 encoding issues - we'll handle .env manually
@@ -28,25 +37,71 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 # Global blog system instance
 blog_system = None
 
+# Streamed tokens are forwarded at most this often per blog
+STREAM_EMIT_SECONDS = float(os.getenv('BLOG_STREAM_EMIT_SECONDS', '0.25'))
+# Blog runs currently streaming, by generation id (one per run: the same topic may
+# be generating twice, e.g. from the pipeline and the generate button), with the
+# open stream so a cancel can close it instead of waiting for the next chunk
+active_generations: Dict[str, Dict] = {}
+active_generations_lock = threading.Lock()
+
+# Sections of the TITLE / META_DESCRIPTION / CONTENT reply format; a section matches once it has closed
+BLOG_SECTION_PATTERNS = {
+    'title': re.compile(r'TITLE:\s*(.+?)(?:\n\n|\nMETA_DESCRIPTION)', re.IGNORECASE | re.DOTALL),
+    'meta_description': re.compile(r'META_DESCRIPTION:\s*(.+?)(?:\n\n|\nCONTENT)', re.IGNORECASE | re.DOTALL),
+}
+BLOG_CONTENT_PATTERN = re.compile(r'CONTENT:\s*(.+)', re.IGNORECASE | re.DOTALL)
+
+
+class BlogSectionParser:
+    """Incremental parse of a streamed blog reply: sections are reported as soon as they close"""
+
+    def __init__(self):
+        self.text = ''
+        self.sections: Dict[str, str] = {}
+
+    def feed(self, delta: str) -> Dict[str, str]:
+        """Append a chunk; returns the sections that closed with it"""
+        self.text += delta
+        closed = {}
+        for name, pattern in BLOG_SECTION_PATTERNS.items():
+            if name not in self.sections:
+                match = pattern.search(self.text)
+                if match:
+                    closed[name] = self.sections[name] = match.group(1).strip()
+        return closed
+
+    def finish(self) -> Dict[str, str]:
+        """CONTENT runs to the end of the reply"""
+        match = BLOG_CONTENT_PATTERN.search(self.text)
+        if match:
+            self.sections['content'] = match.group(1).strip()
+        return self.sections
+
+
+class BlogStreamCancelled(Exception):
+    pass
+
+
 def generate_blog_with_updates(topic):
     """Generate blog with real-time WebSocket updates - saves as text files"""
+    generation_id = uuid.uuid4().hex
+    
+    def emit_update(message, **fields):
+        # Blogs generate concurrently: updates carry the run (and topic) they belong to
+        socketio.emit('blog_generation_update', {'message': message, 'topic_id': topic.topic_id,
+                                                 'generation_id': generation_id, **fields})
+    
     try:
-        socketio.emit('blog_generation_update', {
-            'message': f'🤖 Initializing OpenAI GPT-4...'
-        })
+        emit_update(f'🤖 Initializing OpenAI GPT-4...')
         
         if not blog_system.openai_api_key:
-            socketio.emit('blog_generation_update', {
-                'message': f'⚠️ No OpenAI API key - using template generation'
-            })
+            emit_update(f'⚠️ No OpenAI API key - using template generation')
             return blog_system._generate_blog_template(topic)
         
-        socketio.emit('blog_generation_update', {
-            'message': f'📝 Preparing prompt for GPT-4...'
-        })
+        emit_update(f'📝 Preparing prompt for GPT-4...')
         
         # Generate the blog post with custom logging
-        import re
         from openai import OpenAI
         from datetime import datetime
         
@@ -78,40 +133,73 @@ def generate_blog_with_updates(topic):
         Now write the blog post:
         """
         
-        socketio.emit('blog_generation_update', {
-            'message': f'🚀 Sending request to GPT-4... (this may take 30-90 seconds)'
-        })
+        emit_update(f'🚀 Streaming response from GPT-4...')
+        
+        # Tokens are forwarded in throttled batches; sections are announced as they close
+        parser = BlogSectionParser()
+        pending = []
+        last_emit = 0.0
+        
+        def flush():
+            nonlocal last_emit
+            if pending:
+                emit_update(f'✍️ {len(parser.text)} characters received', delta=''.join(pending))
+                pending.clear()
+            last_emit = time.monotonic()
+        
+        def on_delta(delta):
+            if generation['cancelled']:
+                raise BlogStreamCancelled(f'Generation of {topic.topic_id} cancelled')
+            pending.append(delta)
+            for name, value in parser.feed(delta).items():
+                flush()
+                emit_update(f'✅ {name.replace("_", " ").title()}: {value[:80]}', section=name, value=value)
+            if time.monotonic() - last_emit >= STREAM_EMIT_SECONDS:
+                flush()
         
         client = OpenAI(api_key=blog_system.openai_api_key)
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-            max_tokens=2500
-        )
-        
-        socketio.emit('blog_generation_update', {
-            'message': f'✅ GPT-4 response received ({len(response.choices[0].message.content)} characters)'
-        })
-        
-        # Parse the text response (no JSON parsing!)
-        raw_content = response.choices[0].message.content
-        socketio.emit('blog_generation_update', {
-            'message': f'📝 Extracting title, meta description, and content...'
-        })
-        
-        # Extract title, meta description, and content using regex
-        title_match = re.search(r'TITLE:\s*(.+?)(?:\n\n|\nMETA_DESCRIPTION)', raw_content, re.IGNORECASE | re.DOTALL)
-        meta_match = re.search(r'META_DESCRIPTION:\s*(.+?)(?:\n\n|\nCONTENT)', raw_content, re.IGNORECASE | re.DOTALL)
-        content_match = re.search(r'CONTENT:\s*(.+)', raw_content, re.IGNORECASE | re.DOTALL)
-        
-        title = title_match.group(1).strip() if title_match else f"AI Strategy: {topic.canonical_question}"
-        meta_description = meta_match.group(1).strip() if meta_match else f"Expert insights on {topic.canonical_question} for AI engineers and decision makers."
-        content = content_match.group(1).strip() if content_match else raw_content
-        
-        socketio.emit('blog_generation_update', {
-            'message': f'✅ Blog parsed successfully: "{title[:50]}..."'
-        })
+        generation = {'topic_id': topic.topic_id, 'cancelled': False, 'stream': None}
+        
+        def on_stream(stream):
+            with active_generations_lock:
+                generation['stream'] = stream
+                cancelled = generation['cancelled']
+            if cancelled:
+                # Cancelled while the request was still being sent
+                raise BlogStreamCancelled(f'Generation of {topic.topic_id} cancelled')
+        
+        with active_generations_lock:
+            active_generations[generation_id] = generation
+        try:
+            # Parse the text response (no JSON parsing!)
+            raw_content = blog_system.chat_stream(
+                client,
+                on_delta,
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.4,
+                max_tokens=2500,
+                on_stream=on_stream
+            )
+        except Exception as e:
+            # A stream closed by the cancel handler fails with whatever the transport raises
+            if generation['cancelled'] and not isinstance(e, BlogStreamCancelled):
+                raise BlogStreamCancelled(f'Generation of {topic.topic_id} cancelled') from e
+            raise
+        finally:
+            with active_generations_lock:
+                active_generations.pop(generation_id, None)
+            flush()
+            emit_update('', stream_done=True)
+        
+        emit_update(f'✅ GPT-4 response received ({len(raw_content)} characters)')
+        
+        sections = parser.finish()
+        title = sections.get('title') or f"AI Strategy: {topic.canonical_question}"
+        meta_description = sections.get('meta_description') or f"Expert insights on {topic.canonical_question} for AI engineers and decision makers."
+        content = sections.get('content') or raw_content
+        
+        emit_update(f'✅ Blog parsed successfully: "{title[:50]}..."')
         
         # Save as text file immediately (PRD requirement: local storage first)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -144,13 +232,9 @@ Status: Ready for HubSpot publishing
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(blog_content)
         
-        socketio.emit('blog_generation_update', {
-            'message': f'💾 Blog saved as text file: {filename}'
-        })
+        emit_update(f'💾 Blog saved as text file: {filename}')
         
-        socketio.emit('blog_generation_update', {
-            'message': f'📊 Word count: ~{len(content.split())} words'
-        })
+        emit_update(f'📊 Word count: ~{len(content.split())} words')
         
         # Create blog post object for consistency with existing code
         from gauntlet_blog_system import BlogPost
@@ -167,11 +251,11 @@ Status: Ready for HubSpot publishing
         
     except Exception as e:
         socketio.emit('blog_generation_error', {
-            'message': f'Blog generation failed: {str(e)}'
-        })
-        socketio.emit('blog_generation_update', {
-            'message': f'🔧 Falling back to template generation...'
+            'message': f'Blog generation failed: {str(e)}',
+            'topic_id': topic.topic_id,
+            'generation_id': generation_id
         })
+        emit_update(f'🔧 Falling back to template generation...')
         return blog_system._generate_blog_template(topic)
 
 # Try to initialize with environment variables
@@ -257,17 +341,27 @@ def analyze_themes():
     if not blog_system:
         return jsonify({'error': 'Please configure API keys first'}), 400
     
+    data = request.get_json(silent=True) or {}
+    
+    # Malformed query fields (dates, limit) are the client's error
     try:
-        # Find latest tweet file
-        tweet_files = [f for f in os.listdir('tweets') if f.endswith('.xlsx')]
-        if not tweet_files:
-            return jsonify({'error': 'No tweet files found'}), 400
-        
-        latest_tweet_file = "tweets/Austen_20250728_162654.xlsx"
+        tweet_query = TweetQuery.from_dict(data['query']) if data.get('query') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if tweet_query:
+            # Slice of the tweet database (accounts, keywords, date range)
+            tweet_source = tweet_query
+        else:
+            # Largest tweet file for the account, from the tweet catalog
+            tweet_source = get_catalog().best_for_analysis(data.get('username', DEFAULT_TWEET_USERNAME))
+            if not tweet_source:
+                return jsonify({'error': 'No tweet files found'}), 400
         
         # Analyze themes
         socketio.emit('analysis_update', {'message': '🔍 Analyzing Austin\'s tweets for Gauntlet AI themes...'})
-        blog_topics = blog_system.analyze_tweets_for_themes(latest_tweet_file)
+        blog_topics = blog_system.analyze_tweets_for_themes(tweet_source)
         
         # Generate CSV
         csv_path = blog_system.generate_topic_csv(blog_topics)
@@ -298,6 +392,48 @@ def analyze_themes():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/search-tweets', methods=['POST'])
+def search_tweets():
+    """Interactive keyword slice of an account's tweet file (inverted index, no text scan)"""
+    data = request.get_json(silent=True) or {}
+    keywords = data.get('keywords') or []
+    if isinstance(keywords, str):
+        keywords = [kw.strip() for kw in keywords.split(',') if kw.strip()]
+    mode = data.get('mode', 'any')
+    try:
+        limit = int(data.get('limit', 20))
+    except (TypeError, ValueError):
+        return jsonify({'error': f"Invalid 'limit' {data.get('limit')!r}: expected a positive integer"}), 400
+
+    tweet_file = get_catalog().best_for_analysis(data.get('username', DEFAULT_TWEET_USERNAME))
+    if not tweet_file:
+        return jsonify({'error': 'No tweet files found'}), 400
+
+    try:
+        from tweet_index import keyword_index_for
+        from tweet_store import load_tweet_table, ANALYSIS_COLUMNS
+        index = keyword_index_for(tweet_file)
+        start = datetime.now()
+        rows = index.query(keywords, mode=mode)
+        elapsed_ms = (datetime.now() - start).total_seconds() * 1000
+
+        tweets = load_tweet_table(tweet_file, columns=ANALYSIS_COLUMNS).iloc[rows[:limit]]
+        return jsonify({
+            'success': True,
+            'tweet_file': tweet_file,
+            'total_tweets': index.n_rows,
+            'matches': len(rows),
+            'query_ms': round(elapsed_ms, 2),
+            'tweets': [
+                {'text': tweet.text, 'url': tweet.url, 'likes': int(tweet.likes), 'date': str(tweet.timestamp)}
+                for tweet in tweets.itertuples()
+            ]
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/generate-blog', methods=['POST'])
 def generate_blog():
     """Generate a single blog post"""
@@ -424,13 +560,24 @@ def run_complete_pipeline():
     data = request.json
     num_blogs = data.get('num_blogs', 5)
     
+    try:
+        tweet_query = TweetQuery.from_dict(data['query']) if data.get('query') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         socketio.emit('pipeline_start', {
             'message': '🚀 Starting complete Gauntlet AI blog generation pipeline...'
         })
         
-        # Find latest tweet file
-        latest_tweet_file = "tweets/Austen_20250728_162654.xlsx"
+        if tweet_query:
+            # Slice of the tweet database (accounts, keywords, date range)
+            tweet_source = tweet_query
+        else:
+            # Largest tweet file for the account, from the tweet catalog
+            tweet_source = get_catalog().best_for_analysis(data.get('username', DEFAULT_TWEET_USERNAME))
+            if not tweet_source:
+                return jsonify({'error': 'No tweet files found'}), 400
         
         # Run pipeline with real-time updates
         socketio.emit('blog_generation_update', {
@@ -438,7 +585,7 @@ def run_complete_pipeline():
         })
         
         # Phase 1: Theme & Question Mining
-        blog_topics = blog_system.analyze_tweets_for_themes(latest_tweet_file)
+        blog_topics = blog_system.analyze_tweets_for_themes(tweet_source)
         csv_path = blog_system.generate_topic_csv(blog_topics)
         
         socketio.emit('blog_generation_update', {
@@ -450,26 +597,36 @@ def run_complete_pipeline():
             'message': f'✍️ PHASE 2: Generating {num_blogs} blog posts...'
         })
         
-        generated_blogs = []
-        for i, topic in enumerate(blog_topics[:num_blogs]):
+        topics = blog_topics[:num_blogs]
+        for i, topic in enumerate(topics):
             socketio.emit('blog_generation_update', {
-                'message': f'📝 Generating blog {i+1}/{num_blogs}: {topic.canonical_question}'
+                'message': f'📝 Queued blog {i+1}/{len(topics)}: {topic.canonical_question}',
+                'topic_id': topic.topic_id
             })
-            
-            blog_post = generate_blog_with_updates(topic)
-            if blog_post:
-                generated_blogs.append(blog_post)
-                blog_system._save_blog_locally(blog_post)
-        
-        # Phase 3: Publishing (if configured)
-        socketio.emit('blog_generation_update', {
-            'message': f'🚀 PHASE 3: Publishing {len(generated_blogs)} blogs...'
-        })
         
+        # Posts generate concurrently; each is saved and published as soon as it completes
         published_count = 0
-        for blog_post in generated_blogs:
-            if blog_system.publish_to_hubspot(blog_post):
-                published_count += 1
+        completed = 0
+        
+        def on_complete(i, topic, blog_post):
+            nonlocal published_count, completed
+            completed += 1
+            if not blog_post:
+                return
+            blog_system._save_blog_locally(blog_post)
+            published = blog_system.publish_to_hubspot(blog_post)
+            published_count += int(published)
+            socketio.emit('blog_completed', {
+                'message': f'✅ Blog {completed}/{len(topics)} ready: {blog_post.title}',
+                'topic_id': topic.topic_id,
+                'title': blog_post.title,
+                'published': published,
+                'completed': completed,
+                'total': len(topics)
+            })
+        
+        generated_blogs = blog_system.generate_blog_posts(topics, generate=generate_blog_with_updates,
+                                                          on_complete=on_complete)
         
         # Generate robots.txt
         blog_system.generate_robots_txt()
@@ -505,14 +662,33 @@ def run_complete_pipeline():
         socketio.emit('pipeline_error', {'error': str(e)})
         return jsonify({'error': str(e)}), 500
 
+@socketio.on('cancel_blog_generation')
+def cancel_blog_generation(data):
+    """Stop a streaming blog (e.g. stalled or off-track); it falls back to the template"""
+    generation_id = (data or {}).get('generation_id')
+    with active_generations_lock:
+        generation = active_generations.get(generation_id)
+        if not generation:
+            return
+        generation['cancelled'] = True
+        stream = generation['stream']
+    if stream is not None:
+        # Unblocks a stalled read now; the generating thread sees the error and falls back
+        try:
+            stream.close()
+        except Exception as e:
+            print(f"⚠️ Closing blog stream failed: {e}")
+    socketio.emit('blog_generation_update', {'message': f'🛑 Cancelling {generation["topic_id"]}...',
+                                             'topic_id': generation['topic_id'], 'generation_id': generation_id})
+
 @app.route('/api/status')
 def get_status():
     """Get system status"""
     global blog_system
     
-    # Check tweet files
-    tweet_files = [f for f in os.listdir('tweets') if f.endswith('.xlsx')]
-    latest_file = "tweets/Austen_20250728_162654.xlsx" if tweet_files else None
+    # Check tweet files (catalog lookups, no directory scan)
+    catalog = get_catalog()
+    latest_file = catalog.best_for_analysis(DEFAULT_TWEET_USERNAME)
     
     # Check generated files
     blog_files = [f for f in os.listdir('.') if f.startswith('blog_') and f.endswith('.html')]
@@ -523,11 +699,13 @@ def get_status():
         'api_keys_configured': blog_system is not None,
         'openai_configured': bool(os.getenv('OPENAI_API_KEY')),
         'hubspot_configured': bool(os.getenv('HUBSPOT_API_KEY')),
-        'tweet_files_count': len(tweet_files),
+        'tweet_files_count': catalog.scrape_count(),
         'latest_tweet_file': latest_file,
         'generated_blogs': len(blog_files),
         'topics_csv_exists': csv_exists,
-        'robots_txt_exists': robots_exists
+        'robots_txt_exists': robots_exists,
+        'tweet_table_cache': tweet_table_cache.info(),
+        'llm_cache': get_completion_cache().info()
     })
 
 @app.route('/api/list-blogs')
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+File Locks
+==========
+
+Exclusive advisory lock on a lock file, shared by threads of this process
+and by other processes (scraper app, dashboard, maintenance CLIs) touching
+the same on-disk state: flock on POSIX, msvcrt.locking on Windows.
+
+Hold it around a read-modify-write of a sidecar file, and write the file
+atomically (tmp file + os.replace) so readers that don't lock never see a
+partial write.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on `path` (created if missing); not reentrant"""
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Threads queue on an in-process lock first, so only one per process waits on the OS lock
+    with _thread_lock(path):
+        with open(path, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                        time.sleep(0.1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -11,18 +11,39 @@ Complete implementation of PRD requirements:
 Target: 20 blogs/week for AI engineers and executives
 """
 
+import numpy as np
 import pandas as pd
 import json
 import re
 import os
+import random
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional, Union
 import openai
 import requests
 from dataclasses import dataclass
 import csv
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tweet_store import load_tweet_table, parse_counts, ANALYSIS_COLUMNS
+from tweet_db import TweetDatabase, TweetQuery, DEFAULT_DB_PATH
+from llm_cache import get_completion_cache
+from tweet_catalog import get_catalog
+from tweet_matching import KeywordMatcher, ThemeClassifier
+from tweet_sampling import TweetSample, estimate_tokens, sample_tweets
+
+# Account whose tweets drive the blog pipeline by default
+DEFAULT_TWEET_USERNAME = 'Austen'
+
+# Common AI/automation themes for rule-based extraction (theme -> keywords, any match)
+RULE_BASED_THEMES = {
+    "AI Workflow Automation": ["workflow", "automation", "process", "efficiency"],
+    "Business Productivity": ["productivity", "business", "growth", "scale"],
+    "AI Integration": ["integration", "api", "connect", "sync"],
+    "Tech Stack Optimization": ["tech stack", "tools", "software", "platform"],
+    "Startup Automation": ["startup", "founder", "entrepreneur", "scale"]
+}
 
 @dataclass
 class BlogTopic:
@@ -42,11 +63,70 @@ class BlogPost:
     schema_markup: str
     hubspot_properties: Dict
 
+# OpenAI errors worth retrying: rate limits, timeouts, dropped connections, 5xx
+_RETRYABLE_LLM_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                         openai.InternalServerError)
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait (retry-after-ms / Retry-After headers), if any"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def _parse_json_array(content: str) -> List[Dict]:
+    """Parse the JSON array in an LLM reply (tolerates ```json fences and surrounding prose)"""
+    start, end = content.find('['), content.rfind(']')
+    if start == -1 or end < start:
+        raise ValueError("No JSON array in LLM response")
+    return json.loads(content[start:end + 1])
+
+def _coerce_volume(value) -> int:
+    """LLM-reported volume as an int in 1..10 (1 for null, 'high' and other junk)"""
+    try:
+        return min(10, max(1, int(float(value))))
+    except (TypeError, ValueError, OverflowError):
+        return 1
+
+def _parse_json_object(content: str) -> Dict:
+    """Parse the JSON object in an LLM reply (control characters stripped)"""
+    match = re.search(r'\{.*\}', re.sub(r'[\x00-\x1f\x7f-\x9f]', '', content), re.DOTALL)
+    if not match:
+        raise ValueError("No JSON found in response")
+    return json.loads(match.group(0))
+
 class GauntletBlogSystem:
-    def __init__(self, openai_api_key: Optional[str] = None, hubspot_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, hubspot_api_key: Optional[str] = None,
+                 tweet_db_path: str = DEFAULT_DB_PATH):
         """Initialize the complete blog generation system"""
         self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         self.hubspot_api_key = hubspot_api_key or os.getenv('HUBSPOT_API_KEY')
+        self.tweet_db_path = tweet_db_path
+        # 'cluster': local TF-IDF/k-means themes (LLM only labels clusters); 'llm': LLM reads the tweets
+        self.theme_engine = os.getenv('GAUNTLET_THEME_ENGINE', 'cluster')
+        # Map-reduce LLM theme extraction: per-call tweet token budget and parallel calls
+        self.llm_batch_tokens = int(os.getenv('GAUNTLET_LLM_BATCH_TOKENS', '4000'))
+        self.llm_concurrency = int(os.getenv('GAUNTLET_LLM_CONCURRENCY', '4'))
+        # Every selected tweet goes through the map-reduce unless sampling is opted into
+        # (GAUNTLET_LLM_SAMPLING=stratified|reservoir) or the run would exceed the token
+        # ceiling (GAUNTLET_LLM_TOKEN_BUDGET, 0 = no ceiling); samples are seeded
+        self.llm_sampling = os.getenv('GAUNTLET_LLM_SAMPLING', 'none')
+        self.llm_token_budget = int(os.getenv('GAUNTLET_LLM_TOKEN_BUDGET', '0'))
+        self.llm_sample_tokens = int(os.getenv('GAUNTLET_LLM_SAMPLE_TOKENS', '40000'))
+        self.last_theme_sample: Optional[TweetSample] = None
+        # Blog posts generated in parallel, and retries per OpenAI call on rate limits / transient errors
+        self.blog_concurrency = int(os.getenv('GAUNTLET_BLOG_CONCURRENCY', '4'))
+        self.llm_max_retries = max(0, int(os.getenv('GAUNTLET_LLM_MAX_RETRIES', '5')))
+        # A streamed completion silent for this long (no chunk) is abandoned
+        self.llm_stall_seconds = float(os.getenv('GAUNTLET_LLM_STALL_SECONDS', '20'))
+        # Cluster themes per account are kept in tweets/analysis/ and only new tweets are folded in
+        self.incremental_themes = os.getenv('GAUNTLET_INCREMENTAL', '1') != '0'
+        self.analysis_store = None
         
         if self.openai_api_key:
             openai.api_key = self.openai_api_key
@@ -59,6 +139,9 @@ class GauntletBlogSystem:
             'saas', 'startup', 'enterprise', 'integration', 'api',
             'no-code', 'low-code', 'digital transformation'
         ]
+        # Compiled once; caches per-tweet match bitsets across runs
+        self.keyword_matcher = KeywordMatcher(self.gauntlet_keywords)
+        self.theme_classifier = ThemeClassifier(RULE_BASED_THEMES)
         
         # Style guide for Gauntlet AI blogs
         self.style_guide = {
@@ -70,33 +153,47 @@ class GauntletBlogSystem:
             'audience': 'AI engineers, CTOs, technical decision makers, startup founders'
         }
 
-    def analyze_tweets_for_themes(self, tweet_file_path: str) -> List[BlogTopic]:
+    def analyze_tweets_for_themes(self, tweet_source: Union[str, TweetQuery]) -> List[BlogTopic]:
         """
         Phase 1: LLM clustering to surface recurrent questions and trending topics
         PRD Requirement: "LLM clustering (in-house) to surface: Recurrent questions (≥ 3 similar replies), Trending topics (last 30 days spike)"
+
+        tweet_source is either a tweet file path or a TweetQuery against the tweet database.
         """
         print("🔍 Phase 1: Analyzing Austin's tweets for Gauntlet AI themes...")
         
-        # Load tweet data
-        if tweet_file_path.endswith('.xlsx'):
-            df = pd.read_excel(tweet_file_path)
-        else:
-            df = pd.read_csv(tweet_file_path)
+        df = self.load_tweets(tweet_source)
         
         print(f"📊 Loaded {len(df)} tweets for analysis")
         
-        # Filter for Gauntlet AI related content
-        gauntlet_tweets = self._filter_gauntlet_tweets(df)
-        print(f"🎯 Found {len(gauntlet_tweets)} Gauntlet AI related tweets")
+        # Inverted keyword index of the tweet file (persisted next to its store)
+        index = self._keyword_index(tweet_source, df)
+        
+        # Persisted per-account state: only tweets unseen by earlier runs are processed
+        scope = self._analysis_scope(tweet_source)
+        themes = self._extract_themes_incremental(df, scope, index) if scope else []
+        if not themes:
+            # Filter for Gauntlet AI related content (row positions into df)
+            gauntlet_rows = self._filter_gauntlet_tweets(df, index=index)
+            print(f"🎯 Found {len(gauntlet_rows)} Gauntlet AI related tweets")
+            
+            # Extract themes: local clustering over every selected tweet, or the LLM directly
+            themes = self._extract_themes(df, gauntlet_rows)
+            
+            # Recurrent questions: near-duplicate groups (≥ 3 similar tweets) feed volume scores
+            self._score_recurrence(df, gauntlet_rows, themes)
         
-        # Extract themes using LLM clustering
-        themes = self._extract_themes_with_llm(gauntlet_tweets)
+        # Trending topics: last-30-day spikes raise theme priority (optional - themes stand without it)
+        try:
+            self._score_trends(df, themes, self._source_username(tweet_source))
+        except Exception as e:
+            print(f"⚠️ Trend scoring failed, keeping theme priorities as they are: {e}")
         
         # Convert to BlogTopic objects
         blog_topics = []
         for i, theme in enumerate(themes):
             topic = BlogTopic(
-                topic_id=f"gauntlet_topic_{i+1}",
+                topic_id=theme.get('topic_id') or f"gauntlet_topic_{i+1}",
                 canonical_question=theme['question'],
                 tweet_refs=theme['tweet_urls'],
                 volume_score=theme['volume'],
@@ -108,35 +205,289 @@ class GauntletBlogSystem:
         print(f"✅ Identified {len(blog_topics)} high-potential blog topics")
         return blog_topics
 
-    def _filter_gauntlet_tweets(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Filter tweets for Gauntlet AI related content"""
-        # Determine correct column names based on available columns
-        text_col = 'Tweet Text' if 'Tweet Text' in df.columns else 'text'
-        likes_col = 'Likes' if 'Likes' in df.columns else 'likes'
-        url_col = 'Tweet URL' if 'Tweet URL' in df.columns else 'url'
-        
-        # Create boolean mask for Gauntlet AI related content
-        mask = df[text_col].str.contains('|'.join(self.gauntlet_keywords), case=False, na=False)
+    def load_tweets(self, tweet_source: Union[str, TweetQuery]) -> pd.DataFrame:
+        """Load the analysis columns from a tweet database query or a tweet file"""
+        if isinstance(tweet_source, TweetQuery):
+            return TweetDatabase(self.tweet_db_path).query(tweet_source, columns=ANALYSIS_COLUMNS)
+        # Columnar store when available, xlsx only for legacy runs
+        return load_tweet_table(tweet_source, columns=ANALYSIS_COLUMNS)
+
+    def _keyword_index(self, tweet_source: Union[str, TweetQuery], df: pd.DataFrame):
+        """Keyword index aligned with df's rows (tweet files only; None if unavailable)"""
+        if isinstance(tweet_source, TweetQuery):
+            return None
+        try:
+            from tweet_index import keyword_index_for
+            index = keyword_index_for(tweet_source)
+        except Exception as e:
+            print(f"⚠️ Keyword index unavailable, scanning tweets instead: {e}")
+            return None
+        return index if index.n_rows == len(df) else None
+
+    def _filter_gauntlet_tweets(self, df: pd.DataFrame, rows: Optional[np.ndarray] = None,
+                                index=None) -> np.ndarray:
+        """Row positions of Gauntlet AI related tweets in df, or among `rows` (no copy of the table)"""
+        if index is not None:
+            # Postings merge over the file's inverted index
+            keyword_mask = index.mask(self.gauntlet_keywords)
+            mask = keyword_mask if rows is None else keyword_mask[rows]
+        else:
+            # Keyword matches come from the cached bitsets; only unseen tweets are scanned
+            mask = self.keyword_matcher.mask(self.keyword_matcher.match_bits(df, rows))
         
-        # Also include tweets with high engagement (likely important topics)
-        df['likes_num'] = pd.to_numeric(df[likes_col].astype(str).str.replace(',', '').str.replace('K', '000').str.replace('M', '000000'), errors='coerce').fillna(0)
-        high_engagement = df['likes_num'] > df['likes_num'].quantile(0.8)
+        # Also include tweets with high engagement (likely important topics), relative to the whole table.
+        # Likes are parsed to int64 at ingest; parse_counts only runs for untyped frames.
+        likes = parse_counts(df['likes'])
+        high_engagement = likes > np.quantile(likes, 0.8) if len(likes) else likes.astype(bool)
         
-        return df[mask | high_engagement]
+        if rows is None:
+            return np.flatnonzero(mask | high_engagement)
+        return rows[mask | high_engagement[rows]]
+
+    def _analysis_scope(self, tweet_source: Union[str, TweetQuery]) -> Optional[str]:
+        """
+        Name of the persisted analysis state for a source: its account(s), for
+        clustering runs over whole accounts. Ad-hoc slices (keyword or date
+        filtered queries and exports) and unknown files are analyzed from scratch.
+        """
+        if not self.incremental_themes or self.theme_engine != 'cluster' or os.getenv('TWEET_EMBEDDER'):
+            return None
+        if isinstance(tweet_source, TweetQuery):
+            if tweet_source.keywords or tweet_source.since or tweet_source.until or tweet_source.limit:
+                return None
+            return '+'.join(sorted(u.lstrip('@').lower() for u in tweet_source.usernames)) \
+                if tweet_source.usernames else 'all'
+        entry = get_catalog().entry(tweet_source)
+        if not entry or entry.get('keywords') or entry.get('start_date_filter'):
+            return None
+        return entry['username']
+
+    def _source_username(self, tweet_source: Union[str, TweetQuery]) -> Optional[str]:
+        """Account a tweet source belongs to (None if mixed or unknown)"""
+        if isinstance(tweet_source, TweetQuery):
+            return tweet_source.usernames[0] if tweet_source.usernames and len(tweet_source.usernames) == 1 else None
+        entry = get_catalog().entry(tweet_source)
+        return entry['username'] if entry else None
+
+    def _score_trends(self, tweets_df: pd.DataFrame, themes: List[Dict], username: Optional[str],
+                      min_score: float = 3.0):
+        """Mark themes whose keywords are spiking in the last 30 days as high priority"""
+        if not username:
+            return
+        from tweet_trends import TrendDetector
+        detector = TrendDetector()
+        # Only tweets the detector hasn't counted yet are folded in
+        detector.update(username, tweets_df)
+        spikes = detector.spikes(username, top_k=50)
+        if not spikes:
+            return
+        print(f"📈 Trending for @{username}: {', '.join(spike['term'] for spike in spikes[:5])}")
+        for theme in themes:
+            # A spiking term counts for a theme when all its words appear in one theme keyword
+            keyword_words = [set(keyword.lower().split()) for keyword in theme['keywords']]
+            scores = [spike['score'] for spike in spikes
+                      if any(set(spike['term'].split()) <= words for words in keyword_words)]
+            if scores:
+                theme['trend_score'] = max(scores)
+                if theme['trend_score'] >= min_score:
+                    theme['priority'] = 'high'
+
+    def _score_recurrence(self, tweets_df: pd.DataFrame, rows: np.ndarray, themes: List[Dict]):
+        """Raise each theme's volume to the size of its largest near-duplicate group (capped at 10)"""
+        from tweet_dedupe import near_duplicate_groups
+        groups = near_duplicate_groups(tweets_df['text'].to_numpy()[rows], min_size=3)
+        if not groups:
+            return
+        print(f"🔁 Found {len(groups)} groups of ≥ 3 similar tweets (largest: {len(groups[0])})")
+        group_size = np.zeros(len(tweets_df), dtype='int64')
+        for group in groups:
+            group_size[rows[group]] = len(group)
+        for theme in themes:
+            theme_rows = theme.get('rows')
+            if theme_rows is not None and len(theme_rows):
+                theme['recurrence'] = int(group_size[theme_rows].max())
+                theme['volume'] = min(10, max(theme['volume'], theme['recurrence']))
+
+    def _extract_themes(self, tweets_df: pd.DataFrame, rows: np.ndarray) -> List[Dict]:
+        """Theme extraction for the configured engine (see theme_engine)"""
+        if self.theme_engine == 'cluster':
+            clusters = self._cluster_tweets(tweets_df, rows)
+            if clusters:
+                return self._label_clusters(tweets_df, rows, clusters)
+        return self._extract_themes_with_llm(tweets_df, rows)
+
+    def _cluster_tweets(self, tweets_df: pd.DataFrame, rows: np.ndarray) -> List:
+        """Cluster every selected tweet locally (empty if scipy is unavailable)"""
+        try:
+            from tweet_clustering import cluster_texts
+        except ImportError as e:
+            print(f"⚠️ Local clustering unavailable ({e})")
+            return []
+        start = time.time()
+        texts = tweets_df['text'].to_numpy()[rows]
+        vectors = None
+        if os.getenv('TWEET_EMBEDDER'):
+            # Semantic clustering on stored embeddings; only unseen tweets get embedded
+            try:
+                from tweet_embeddings import EmbeddingStore
+                vectors = EmbeddingStore().vectors_for(tweets_df['id'].to_numpy()[rows], texts)
+            except Exception as e:  # unknown TWEET_EMBEDDER, missing package, embedding API errors
+                print(f"⚠️ Embeddings unavailable ({e}) - clustering on TF-IDF")
+        clusters = cluster_texts(texts, vectors=vectors)
+        print(f"🧮 Clustered {len(rows)} tweets into {len(clusters)} themes in {time.time() - start:.1f}s")
+        return clusters
+
+    def _label_clusters(self, tweets_df: pd.DataFrame, rows: np.ndarray, clusters: List) -> List[Dict]:
+        """Theme dicts for clusters; the LLM (if configured) only writes each cluster's question"""
+        texts = tweets_df['text'].to_numpy()
+        urls = tweets_df['url'].to_numpy()
+        largest = max(cluster.size for cluster in clusters)
+        total = sum(cluster.size for cluster in clusters)
+
+        themes = []
+        for cluster in clusters:
+            terms = [term for term in cluster.top_terms if ' ' not in term] or cluster.top_terms
+            themes.append({
+                "question": f"What Can AI Teams Learn About {' and '.join(t.title() for t in terms[:2])}?",
+                "keywords": cluster.top_terms[:5],
+                "priority": "high" if cluster.size >= 0.1 * total else "medium",
+                "volume": max(1, round(10 * cluster.size / largest)),
+                "tweet_urls": urls[rows[cluster.representative_rows]].tolist(),
+                "rows": rows[cluster.rows]
+            })
 
-    def _extract_themes_with_llm(self, tweets_df: pd.DataFrame) -> List[Dict]:
-        """Use LLM to cluster tweets into themes and extract questions"""
         if not self.openai_api_key:
-            print("⚠️ No OpenAI API key - using rule-based theme extraction")
-            return self._extract_themes_rule_based(tweets_df)
-        
-        # Determine correct column names
-        text_col = 'Tweet Text' if 'Tweet Text' in tweets_df.columns else 'text'
-        url_col = 'Tweet URL' if 'Tweet URL' in tweets_df.columns else 'url'
+            return themes
+
+        summaries = []
+        for cluster in clusters:
+            samples = [texts[row] for row in rows[cluster.representative_rows[:3]]]
+            summaries.append(self._cluster_summary(cluster.size, cluster.top_terms, samples))
+        for index, label in self._llm_cluster_labels(summaries).items():
+            theme = themes[index]
+            theme['question'] = label.get('question') or theme['question']
+            theme['keywords'] = label.get('keywords') or theme['keywords']
+            if label.get('priority') in ('high', 'medium', 'low'):
+                theme['priority'] = label['priority']
         
-        # Prepare tweet text for LLM analysis
-        tweet_texts = tweets_df[text_col].tolist()[:50]  # Limit for API costs
-        combined_text = "\n\n".join([f"Tweet {i+1}: {text}" for i, text in enumerate(tweet_texts)])
+        return themes
+
+    @staticmethod
+    def _cluster_summary(size: int, terms: List[str], samples: List[str]) -> str:
+        lines = "\n".join(f"- {text[:280]}" for text in samples)
+        return f"({size} tweets), top terms: {', '.join(terms)}\n{lines}"
+
+    def _llm_cluster_labels(self, summaries: List[str]) -> Dict[int, Dict]:
+        """LLM question/keywords/priority per cluster summary, keyed by summary index ({} on failure)"""
+        numbered = [f"Cluster {i} {summary}" for i, summary in enumerate(summaries, 1)]
+        prompt = f"""
+        These clusters were found in Austin's (Gauntlet AI founder) tweets. For each cluster, write a
+        canonical question (blog title format) that would make a great Gauntlet AI marketing blog,
+        3-5 keywords and a priority (high/medium/low) for Gauntlet AI marketing.
+
+        {chr(10).join(numbered)}
+
+        Return as JSON array with format:
+        [{{"cluster": 1, "question": "How to Automate Business Workflows with AI?", "keywords": ["ai automation", "workflow"], "priority": "high"}}]
+        """
+
+        labels = {}
+        try:
+            from openai import OpenAI
+            client = OpenAI(api_key=self.openai_api_key)
+            
+            parsed = self._chat(
+                client,
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=1500,
+                validate=_parse_json_array
+            )
+            for label in parsed:
+                index = int(label.get('cluster', 0)) - 1
+                if 0 <= index < len(summaries):
+                    labels[index] = label
+        except Exception as e:
+            print(f"⚠️ LLM cluster labeling failed, using term-based titles: {e}")
+        return labels
+
+    def _extract_themes_incremental(self, tweets_df: pd.DataFrame, scope: str, index=None) -> List[Dict]:
+        """
+        Themes from the persisted state for `scope`: only tweets not seen by an
+        earlier run are filtered, clustered and labeled; topic IDs stay stable.
+        """
+        try:
+            from tweet_analysis_state import AnalysisStateStore
+        except ImportError as e:
+            print(f"⚠️ Incremental analysis unavailable ({e})")
+            return []
+        store = self.analysis_store or AnalysisStateStore()
+        self.analysis_store = store
+        with store.locked(scope):
+            state = store.load(scope)
+            new_rows = state.unseen_rows(tweets_df['id'].to_numpy(dtype='int64'))
+            selected = np.isin(new_rows, self._filter_gauntlet_tweets(tweets_df, new_rows, index=index))
+            print(f"🆕 {len(new_rows)} tweets not analyzed before ({selected.sum()} Gauntlet AI related)")
+            if len(new_rows):
+                start = time.time()
+                state.fold(tweets_df['id'].to_numpy(dtype='int64')[new_rows], tweets_df['text'].to_numpy()[new_rows],
+                           tweets_df['url'].to_numpy()[new_rows], selected)
+                print(f"🧮 Updated {len(state.topics)} topics in {time.time() - start:.1f}s")
+
+            topics = state.active_topics()
+            unlabeled = [topic for topic in topics if topic.needs_label]
+            if self.openai_api_key and unlabeled:
+                summaries = [self._cluster_summary(topic.size, topic.top_terms,
+                                                   [rep['text'] for rep in topic.representatives[:3]])
+                             for topic in unlabeled]
+                for position, label in self._llm_cluster_labels(summaries).items():
+                    unlabeled[position].label = label
+                    unlabeled[position].label_terms = unlabeled[position].top_terms[:5]
+            if len(new_rows) or unlabeled:
+                store.save(scope, state)
+
+        if not topics:
+            return []
+        uids = state.uids_for(tweets_df['id'].to_numpy(dtype='int64'))
+        largest = topics[0].size
+        total = sum(topic.size for topic in topics)
+        themes = []
+        for topic in topics:
+            terms = [term for term in topic.top_terms if ' ' not in term] or topic.top_terms
+            label = topic.label or {}
+            priority = label.get('priority')
+            volume = max(1, round(10 * topic.size / largest))
+            themes.append({
+                "topic_id": topic.topic_id,
+                "question": label.get('question') or
+                            f"What Can AI Teams Learn About {' and '.join(t.title() for t in terms[:2])}?",
+                "keywords": label.get('keywords') or topic.phrases.top_phrases(5) or topic.top_terms[:5],
+                "priority": priority if priority in ('high', 'medium', 'low') else
+                            "high" if topic.size >= 0.1 * total else "medium",
+                "volume": min(10, max(volume, topic.recurrence)),
+                "recurrence": topic.recurrence,
+                "tweet_urls": [rep['url'] for rep in topic.representatives],
+                "rows": np.flatnonzero(uids == topic.uid)
+            })
+        return themes
+
+    def _theme_batches(self, texts: np.ndarray, rows: np.ndarray) -> List[np.ndarray]:
+        """Split the selected rows into batches that fit the per-call token budget (~4 chars/token)"""
+        batches, current, used = [], [], 0
+        for row, cost in zip(rows, estimate_tokens(texts[rows])):
+            if current and used + cost > self.llm_batch_tokens:
+                batches.append(np.array(current, dtype='int64'))
+                current, used = [], 0
+            current.append(row)
+            used += cost
+        if current:
+            batches.append(np.array(current, dtype='int64'))
+        return batches
+
+    def _map_theme_batch(self, client, texts: np.ndarray, batch: np.ndarray) -> List[Dict]:
+        """Map step: themes for one batch, with tweet indices translated to global row positions"""
+        combined_text = "\n\n".join([f"Tweet {i+1}: {texts[row]}" for i, row in enumerate(batch)])
         
         prompt = f"""
         Analyze these tweets from Austin (Gauntlet AI founder) and identify the top 10 themes that would make great blog topics for Gauntlet AI marketing.
@@ -167,60 +518,150 @@ class GauntletBlogSystem:
         }}]
         """
 
+        parsed = self._chat(
+            client,
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=2000,
+            validate=_parse_json_array
+        )
+        
+        themes = [theme for theme in parsed if isinstance(theme, dict)]
+        for theme in themes:
+            # Prompt numbers tweets from 1 within the batch
+            indices = theme.get('tweet_indices')
+            theme['rows'] = np.array([batch[i - 1] for i in (indices if isinstance(indices, list) else [])
+                                      if isinstance(i, int) and 1 <= i <= len(batch)], dtype='int64')
+            theme['volume'] = _coerce_volume(theme.get('volume', 1))
+            keywords = theme.get('keywords')
+            theme['keywords'] = keywords if isinstance(keywords, list) else [keywords] if keywords else []
+        return themes
+
+    @staticmethod
+    def _merge_themes(partials: List[List[Dict]], limit: int = 10) -> List[Dict]:
+        """Reduce step: merge per-batch themes with the same question or overlapping keywords"""
+        priority_rank = {'high': 2, 'medium': 1, 'low': 0}
+        merged: List[Dict] = []
+        for themes in partials:
+            for theme in themes:
+                keywords = [str(k).lower() for k in theme.get('keywords', [])]
+                question = re.sub(r'\W+', ' ', str(theme.get('question', ''))).strip().lower()
+                for target in merged:
+                    shared = len(set(keywords) & set(target['keywords']))
+                    if question == target['_question'] or shared >= max(2, min(len(keywords), len(target['keywords'])) // 2 + 1):
+                        target['rows'] = np.union1d(target['rows'], theme['rows'])
+                        target['keywords'] += [k for k in keywords if k not in target['keywords']]
+                        target['volume'] = max(target['volume'], _coerce_volume(theme.get('volume', 1)))
+                        target['_batches'] += 1
+                        if priority_rank.get(theme.get('priority'), 0) > priority_rank.get(target['priority'], 0):
+                            target['priority'] = theme['priority']
+                        break
+                else:
+                    merged.append({
+                        'question': theme.get('question', ''),
+                        'keywords': keywords,
+                        'priority': theme.get('priority', 'medium'),
+                        'volume': _coerce_volume(theme.get('volume', 1)),
+                        'rows': np.asarray(theme['rows'], dtype='int64'),
+                        '_question': question,
+                        '_batches': 1
+                    })
+        for theme in merged:
+            # Recurring across batches is itself a volume signal
+            theme['volume'] = min(10, theme['volume'] + theme.pop('_batches') - 1)
+            theme['keywords'] = theme['keywords'][:5]
+            del theme['_question']
+        merged.sort(key=lambda t: (priority_rank.get(t['priority'], 0), t['volume'], len(t['rows'])), reverse=True)
+        return merged[:limit]
+
+    def _theme_sample(self, tweets_df: pd.DataFrame, rows: np.ndarray) -> TweetSample:
+        """
+        Rows for the LLM map-reduce: all of them, unless sampling is opted into
+        (sampled to llm_sample_tokens) or their tokens exceed the configured
+        ceiling (sampled to llm_token_budget, stratified unless a method is set)
+        """
+        method = self.llm_sampling
+        budget = self.llm_sample_tokens
+        if self.llm_token_budget > 0:
+            total = int(estimate_tokens(tweets_df['text'].to_numpy()[rows]).sum())
+            if total > self.llm_token_budget:
+                print(f"💰 {total} tweet tokens exceed the {self.llm_token_budget}-token LLM ceiling")
+                if method == 'none':
+                    method, budget = 'stratified', self.llm_token_budget
+                else:
+                    budget = min(budget, self.llm_token_budget)
+        return sample_tweets(tweets_df, rows, budget, method=method)
+
+    def _extract_themes_with_llm(self, tweets_df: pd.DataFrame, rows: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Map-reduce LLM theme extraction over every selected tweet (or a seeded
+        sample, see _theme_sample): token-budgeted batches are analyzed
+        concurrently (llm_concurrency), then merged.
+        """
+        if not self.openai_api_key:
+            print("⚠️ No OpenAI API key - using rule-based theme extraction")
+            return self._extract_themes_rule_based(tweets_df, rows)
+        
+        rows = np.arange(len(tweets_df)) if rows is None else rows
+        # Fallbacks classify every selected tweet, not just the LLM sample
+        selected = rows
+        texts = tweets_df['text'].to_numpy()
+        urls = tweets_df['url'].to_numpy()
+        
+        sample = self._theme_sample(tweets_df, rows)
+        self.last_theme_sample = sample
+        if sample.sampled:
+            print(f"🎲 Sampled {len(sample.rows)} of {sample.population} tweets ({sample.method}) for the LLM budget")
+        rows = sample.rows
+        batches = self._theme_batches(texts, rows)
+        print(f"🧠 LLM theme extraction: {len(rows)} tweets in {len(batches)} batches ({self.llm_concurrency} concurrent)")
+
         try:
             from openai import OpenAI
             client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=2000
-            )
-            
-            # Parse JSON response
-            themes_json = response.choices[0].message.content
-            themes = json.loads(themes_json)
-            
-            # Add tweet URLs
-            for theme in themes:
-                theme['tweet_urls'] = [tweets_df.iloc[i][url_col] for i in theme.get('tweet_indices', []) if i < len(tweets_df)]
-            
-            return themes
-            
         except Exception as e:
             print(f"⚠️ LLM analysis failed: {e}")
-            return self._extract_themes_rule_based(tweets_df)
+            return self._extract_themes_rule_based(tweets_df, selected)
+
+        partials = []
+        with ThreadPoolExecutor(max_workers=max(1, self.llm_concurrency), thread_name_prefix='theme-map') as executor:
+            futures = [executor.submit(self._map_theme_batch, client, texts, batch) for batch in batches]
+            for future in as_completed(futures):
+                try:
+                    partials.append(future.result())
+                except Exception as e:
+                    print(f"⚠️ LLM theme batch failed: {e}")
 
-    def _extract_themes_rule_based(self, tweets_df: pd.DataFrame) -> List[Dict]:
+        if not any(partials):
+            print("⚠️ LLM analysis failed for every batch")
+            return self._extract_themes_rule_based(tweets_df, selected)
+
+        themes = self._merge_themes(partials)
+        for theme in themes:
+            theme['tweet_urls'] = urls[theme['rows']].tolist()
+        return themes
+
+    def _extract_themes_rule_based(self, tweets_df: pd.DataFrame, rows: Optional[np.ndarray] = None) -> List[Dict]:
         """Fallback rule-based theme extraction"""
         themes = []
+        rows = np.arange(len(tweets_df)) if rows is None else rows
+        urls = tweets_df['url'].to_numpy()
         
-        # Determine correct column names
-        text_col = 'Tweet Text' if 'Tweet Text' in tweets_df.columns else 'text'
-        url_col = 'Tweet URL' if 'Tweet URL' in tweets_df.columns else 'url'
-        
-        # Common AI/automation themes
-        theme_patterns = {
-            "AI Workflow Automation": ["workflow", "automation", "process", "efficiency"],
-            "Business Productivity": ["productivity", "business", "growth", "scale"],
-            "AI Integration": ["integration", "api", "connect", "sync"],
-            "Tech Stack Optimization": ["tech stack", "tools", "software", "platform"],
-            "Startup Automation": ["startup", "founder", "entrepreneur", "scale"]
-        }
+        # One matching pass -> tweets x themes membership; counts and URLs come from the matrix
+        matrix = self.theme_classifier.classify(tweets_df, rows)
         
-        for theme_name, keywords in theme_patterns.items():
-            # Find tweets matching this theme
-            mask = tweets_df[text_col].str.contains('|'.join(keywords), case=False, na=False)
-            matching_tweets = tweets_df[mask]
+        for theme_name, keywords in RULE_BASED_THEMES.items():
+            matching_rows = rows[matrix.rows(theme_name)]
             
-            if len(matching_tweets) >= 3:  # PRD requirement: ≥ 3 similar replies
+            if len(matching_rows) >= 3:  # PRD requirement: ≥ 3 similar replies
                 themes.append({
                     "question": f"How to Implement {theme_name} for Business Growth?",
                     "keywords": keywords,
-                    "priority": "high" if len(matching_tweets) > 10 else "medium",
-                    "volume": min(len(matching_tweets), 10),
-                    "tweet_urls": matching_tweets[url_col].tolist()[:5]
+                    "priority": "high" if len(matching_rows) > 10 else "medium",
+                    "volume": min(len(matching_rows), 10),
+                    "tweet_urls": urls[matching_rows[:5]].tolist(),
+                    "rows": matching_rows
                 })
         
         return themes
@@ -302,54 +743,96 @@ class GauntletBlogSystem:
             client = OpenAI(api_key=self.openai_api_key)
             
             print(f"📝 Sending prompt to GPT-4 (length: {len(prompt)} chars)")
-            response = client.chat.completions.create(
+            # The validator parses the reply (control characters stripped) once; bad JSON raises
+            blog_data = self._chat(
+                client,
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.4,
-                max_tokens=1500
+                max_tokens=1500,
+                validate=_parse_json_object
             )
+            print(f"✅ GPT-4 response parsed with keys: {list(blog_data.keys())}")
             
-            print(f"✅ GPT-4 response received (length: {len(response.choices[0].message.content)} chars)")
-            raw_content = response.choices[0].message.content
-            
-            # Clean the response to remove control characters
-            import re
-            cleaned_content = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', raw_content)
-            print(f"🧹 Cleaned response (removed control chars, new length: {len(cleaned_content)} chars)")
-            
-            # Try to extract JSON from the response
-            try:
-                # Look for JSON block in the response
-                json_match = re.search(r'\{.*\}', cleaned_content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                    print(f"📦 Extracted JSON block (length: {len(json_str)} chars)")
-                else:
-                    print(f"⚠️ No JSON block found in response")
-                    raise ValueError("No JSON found in response")
-                
-                blog_data = json.loads(json_str)
-                print(f"✅ Successfully parsed JSON with keys: {list(blog_data.keys())}")
-                
-                return BlogPost(
-                    title=blog_data.get('title', topic.canonical_question),
-                    content=blog_data.get('content', 'Content generation failed'),
-                    meta_description=blog_data.get('meta_description', ''),
-                    keywords=topic.keywords,
-                    schema_markup=blog_data.get('schema_markup', ''),
-                    hubspot_properties=blog_data.get('hubspot_properties', {})
-                )
-                
-            except json.JSONDecodeError as je:
-                print(f"❌ JSON parsing failed: {je}")
-                print(f"🔍 Raw response preview: {cleaned_content[:200]}...")
-                raise je
+            return BlogPost(
+                title=blog_data.get('title', topic.canonical_question),
+                content=blog_data.get('content', 'Content generation failed'),
+                meta_description=blog_data.get('meta_description', ''),
+                keywords=topic.keywords,
+                schema_markup=blog_data.get('schema_markup', ''),
+                hubspot_properties=blog_data.get('hubspot_properties', {})
+            )
             
         except Exception as e:
             print(f"⚠️ Blog generation failed: {e}")
             print(f"🔧 Falling back to template generation")
             return self._generate_blog_template(topic)
 
+    def _chat(self, client, model: str, messages: List[Dict], temperature: Optional[float] = None,
+              max_tokens: Optional[int] = None, validate: Optional[Callable[[str], object]] = None):
+        """
+        Completion content, from the LLM cache or from chat.completions.create
+        (with retries). With validate, returns validate(content) instead;
+        replies it rejects are not cached.
+        """
+        request = {'model': model, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens}
+        return get_completion_cache().complete(lambda: self._create_with_retries(client, **request),
+                                               validate=validate, **request)
+
+    def chat_stream(self, client, on_delta: Callable[[str], None], model: str, messages: List[Dict],
+                    temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                    validate: Optional[Callable[[str], object]] = None,
+                    on_stream: Optional[Callable[[object], None]] = None):
+        """
+        Streaming _chat: on_delta gets text chunks as they arrive (the whole
+        text on a cache hit). A stream with no chunk for llm_stall_seconds
+        raises a timeout; on_delta may raise to cancel, and closing the stream
+        handed to on_stream cancels without waiting for the next chunk.
+        """
+        request = {'model': model, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens}
+        return get_completion_cache().complete_stream(
+            lambda: self._create_with_retries(client, stream=True, timeout=self.llm_stall_seconds, **request),
+            on_delta, validate=validate, on_stream=on_stream, **request)
+
+    def _create_with_retries(self, client, **request):
+        """chat.completions.create with exponential backoff (or the server's Retry-After) on transient errors"""
+        # Clamped so a negative setting still makes one attempt instead of returning None
+        max_retries = max(0, self.llm_max_retries)
+        for attempt in range(max_retries + 1):
+            try:
+                return client.chat.completions.create(**request)
+            except _RETRYABLE_LLM_ERRORS as e:
+                if attempt == max_retries:
+                    raise
+                delay = _retry_after(e) or min(60.0, 2.0 ** attempt) * (0.5 + random.random())
+                print(f"⏳ OpenAI {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+                time.sleep(delay)
+
+    def generate_blog_posts(self, topics: List[BlogTopic],
+                            generate: Optional[Callable[[BlogTopic], Optional[BlogPost]]] = None,
+                            on_complete: Optional[Callable[[int, BlogTopic, Optional[BlogPost]], None]] = None
+                            ) -> List[BlogPost]:
+        """
+        Generate posts for topics concurrently (at most blog_concurrency in flight).
+        on_complete(index, topic, post) runs in the calling thread as each post
+        finishes; posts are returned in topic order, failed ones omitted.
+        """
+        generate = generate or self.generate_blog_post
+        results: List[Optional[BlogPost]] = [None] * len(topics)
+        if not topics:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.blog_concurrency, len(topics)))) as executor:
+            futures = {executor.submit(generate, topic): i for i, topic in enumerate(topics)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Blog generation failed for '{topics[i].canonical_question}': {e}")
+                if on_complete:
+                    on_complete(i, topics[i], results[i])
+        return [post for post in results if post is not None]
+
     def _generate_blog_template(self, topic: BlogTopic) -> BlogPost:
         """Fallback blog template generation"""
         title = topic.canonical_question
@@ -508,7 +991,7 @@ AI-Training: allow
         print(f"🤖 robots.txt generated: {output_path}")
         return output_path
 
-    def run_complete_pipeline(self, tweet_file_path: str, num_blogs: int = 5):
+    def run_complete_pipeline(self, tweet_source: Union[str, TweetQuery], num_blogs: int = 5):
         """
         Run the complete blog generation pipeline
         PRD Requirement: End-to-end automation
@@ -518,26 +1001,28 @@ AI-Training: allow
         
         # Phase 1: Theme & Question Mining
         print("\n📊 PHASE 1: Theme & Question Mining")
-        blog_topics = self.analyze_tweets_for_themes(tweet_file_path)
+        blog_topics = self.analyze_tweets_for_themes(tweet_source)
         csv_path = self.generate_topic_csv(blog_topics)
         
-        # Phase 2: Blog Generation
-        print(f"\n✍️ PHASE 2: Generating {num_blogs} Blog Posts")
-        generated_blogs = []
-        
-        for i, topic in enumerate(blog_topics[:num_blogs]):
-            print(f"\nGenerating blog {i+1}/{num_blogs}: {topic.canonical_question}")
-            blog_post = self.generate_blog_post(topic)
-            generated_blogs.append(blog_post)
-        
-        # Phase 3: Publishing & Optimization
-        print(f"\n🚀 PHASE 3: Publishing {len(generated_blogs)} Blogs")
+        # Phase 2 + 3: Blog Generation, publishing each post as soon as it is ready
+        topics = blog_topics[:num_blogs]
+        print(f"\n✍️ PHASE 2: Generating {len(topics)} Blog Posts ({min(self.blog_concurrency, len(topics))} at a time)")
+        print(f"🚀 PHASE 3: Publishing each blog as it completes")
         published_count = 0
+        completed = 0
         
-        for blog_post in generated_blogs:
+        def on_complete(i: int, topic: BlogTopic, blog_post: Optional[BlogPost]):
+            nonlocal published_count, completed
+            completed += 1
+            if blog_post is None:
+                print(f"⚠️ Blog {completed}/{len(topics)} failed: {topic.canonical_question}")
+                return
+            print(f"\n✅ Blog {completed}/{len(topics)} ready: {blog_post.title}")
             if self.publish_to_hubspot(blog_post):
                 published_count += 1
         
+        generated_blogs = self.generate_blog_posts(topics, on_complete=on_complete)
+        
         # Generate robots.txt
         self.generate_robots_txt()
         
@@ -566,14 +1051,12 @@ def main():
     # Initialize system
     blog_system = GauntletBlogSystem()
     
-    # Find latest tweet file
-    tweet_files = [f for f in os.listdir('tweets') if f.endswith('.xlsx')]
-    if not tweet_files:
+    # Use the largest tweet file (most data) from the tweet catalog
+    latest_tweet_file = get_catalog().best_for_analysis(DEFAULT_TWEET_USERNAME)
+    if not latest_tweet_file:
         print("❌ No tweet files found in tweets/ directory")
         return
     
-    # Use the largest tweet file (most data)
-    latest_tweet_file = "tweets/Austen_20250728_162654.xlsx"  # 767 tweets
     print(f"📊 Using tweet data: {latest_tweet_file}")
     
     # Run complete pipeline
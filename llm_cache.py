@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+LLM Completion Cache
+====================
+
+Content-addressed SQLite cache for chat completions: the key is a SHA-256 of
+(model, messages, temperature, max_tokens), so re-running the pipeline on
+unchanged tweets and topics replays earlier answers instead of paying for
+and waiting on the same prompts again.
+
+- TTL: entries older than LLM_CACHE_TTL_DAYS (default 30) are ignored and purged
+- size: past LLM_CACHE_MAX_MB (default 200) the least recently used entries go
+- eviction runs when this process's running size estimate crosses the cap,
+  or every LLM_CACHE_EVICT_EVERY writes (default 50), not on every write
+- LLM_CACHE=0 disables lookups and writes
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_LLM_CACHE_PATH = os.path.join('tweets', 'llm_cache.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_completions_accessed_at ON completions (accessed_at);
+"""
+
+
+class CompletionCache:
+    def __init__(self, db_path: Optional[str] = None, ttl_days: Optional[float] = None,
+                 max_mb: Optional[float] = None, enabled: Optional[bool] = None):
+        """Open (and create if needed) the completion cache"""
+        self.db_path = db_path or os.getenv('LLM_CACHE_PATH', DEFAULT_LLM_CACHE_PATH)
+        self.ttl_seconds = float(ttl_days if ttl_days is not None else os.getenv('LLM_CACHE_TTL_DAYS', 30)) * 86400
+        self.max_bytes = int(float(max_mb if max_mb is not None else os.getenv('LLM_CACHE_MAX_MB', 200)) * 1024 * 1024)
+        self.enabled = enabled if enabled is not None else os.getenv('LLM_CACHE', '1') != '0'
+        self.evict_every = max(1, int(os.getenv('LLM_CACHE_EVICT_EVERY', 50)))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Cache size as of the last evict() plus what this process has written since
+        # (other processes' writes are picked up at the next periodic evict)
+        self._approx_bytes: Optional[int] = None
+        self._writes_since_evict = 0
+        if self.enabled:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Short-lived connections: completions are cached from worker threads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None) -> str:
+        payload = json.dumps({'model': model, 'messages': messages, 'temperature': temperature,
+                              'max_tokens': max_tokens}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached content for a key (None if missing or expired)"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT content FROM completions WHERE key = ? AND created_at >= ?",
+                               (key, now - self.ttl_seconds)).fetchone()
+            if row:
+                conn.execute("UPDATE completions SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key: str, model: str, content: str):
+        if not self.enabled or not content:
+            return
+        now = time.time()
+        size = len(content.encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, content, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now, now)
+            )
+        with self._lock:
+            self._writes_since_evict += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            due = (self._approx_bytes is None or self._approx_bytes > self.max_bytes
+                   or self._writes_since_evict >= self.evict_every)
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under the size cap"""
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM completions WHERE created_at < ?",
+                                   (time.time() - self.ttl_seconds,)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            victims = []
+            freed = 0
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                for key, size in conn.execute("SELECT key, size FROM completions ORDER BY accessed_at"):
+                    if freed >= excess:
+                        break
+                    victims.append((key,))
+                    freed += size
+                conn.executemany("DELETE FROM completions WHERE key = ?", victims)
+        with self._lock:
+            self._approx_bytes = total - freed
+            self._writes_since_evict = 0
+        return removed + len(victims)
+
+    def complete(self, create: Callable, model: str, messages: List[Dict], temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None, validate: Optional[Callable[[str], object]] = None):
+        """
+        Content of a chat completion, from the cache or from create() - a
+        zero-argument call returning an OpenAI-style response - on a miss.
+        With validate, returns validate(content) (e.g. the parsed reply) instead;
+        if it raises, the reply is not cached and the error propagates.
+        """
+        key = self.make_key(model, messages, temperature, max_tokens)
+        cached = self.get(key)
+        if cached is not None:
+            print(f"♻️ LLM cache hit ({model}, {len(cached)} chars)")
+            return validate(cached) if validate is not None else cached
+        content = create().choices[0].message.content
+        result = validate(content) if validate is not None else content
+        self.put(key, model, content)
+        return result
+
+    def complete_stream(self, create: Callable, on_delta: Callable[[str], None], model: str, messages: List[Dict],
+                        temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                        validate: Optional[Callable[[str], object]] = None,
+                        on_stream: Optional[Callable[[object], None]] = None):
+        """
+        Streaming complete(): create() returns a stream of chat completion
+        chunks and on_delta gets each text delta as it arrives (the whole text
+        at once on a cache hit). on_delta may raise to abandon the stream; only
+        finished replies are cached. on_stream gets the stream as soon as it is
+        open, so another thread can close() it to abort a stalled read.
+        """
+        key = self.make_key(model, messages, temperature, max_tokens)
+        cached = self.get(key)
+        if cached is not None:
+            print(f"♻️ LLM cache hit ({model}, {len(cached)} chars)")
+            on_delta(cached)
+            return validate(cached) if validate is not None else cached
+        stream = create()
+        parts = []
+        try:
+            if on_stream is not None:
+                on_stream(stream)
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_delta(delta)
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+        content = ''.join(parts)
+        result = validate(content) if validate is not None else content
+        self.put(key, model, content)
+        return result
+
+    def info(self) -> Dict:
+        if not self.enabled:
+            return {'enabled': False}
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+        return {'enabled': True, 'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """Process-wide completion cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CompletionCache()
+        return _cache
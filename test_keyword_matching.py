@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+KeywordMatcher / ThemeClassifier parity checks: bitsets must equal the plain
+substring check on the NFKC-normalized, lowercased text (the test
+tweet_record.match_keywords applies), overlapping keywords and non-ASCII
+text included, and theme membership must agree with the original per-tweet
+theme rules. Run with pytest or directly.
+"""
+
+import numpy as np
+import pandas as pd
+
+from blog_generator import GauntletBlogGenerator, GENERAL_THEME
+from gauntlet_blog_system import GauntletBlogSystem, RULE_BASED_THEMES
+from tweet_index import KeywordIndex
+from tweet_matching import KeywordMatcher, ThemeClassifier
+from tweet_record import Tweet, match_keywords
+from tweet_text import normalize_text
+
+KEYWORDS = GauntletBlogSystem().gauntlet_keywords + ['ai engineer', 'c++', 'ai-first']
+
+TEXTS = [
+    "Become a Gauntlet AI engineer",
+    "gauntlet ai engineers ship no-code and low-code workflows",
+    "Yeni APİ entegrasyonu",
+    "ſaas and ＡＰＩ full-width",
+    "Straße automation für KI-Agenten",
+    "Learning C++ then AI-first development",
+    "the automationautomation loop",
+    "APIs everywhere 🚀 #api @api_guy",
+    "",
+    "nothing to see here",
+    "Gauntlet training program for legacy COBOL enterprise teams",
+    "AI-first jobs pay $200k; claude and gpt agents",
+    "Our ai engineer career path with the Gauntlet bootcamp",
+    "machine learning with llm agents",
+    "Fortran assembly at a startup",
+]
+
+
+def substring_bits(text: str, keywords) -> int:
+    lowered = normalize_text(text).lower()
+    return sum(1 << i for i, keyword in enumerate(keywords) if keyword in lowered)
+
+
+def test_matches_substring_check():
+    matcher = KeywordMatcher(KEYWORDS)
+    bits = matcher.scan(pd.Series(TEXTS))
+    for text, got in zip(TEXTS, bits):
+        assert int(got) == substring_bits(text, matcher.keywords), text
+
+
+def test_overlapping_keywords():
+    matcher = KeywordMatcher(['gauntlet ai', 'ai engineer', 'gauntlet'])
+    bits = int(matcher.scan(pd.Series(["Become a Gauntlet AI engineer"]))[0])
+    assert bits == 0b111
+
+
+def test_matches_match_keywords():
+    matcher = KeywordMatcher(KEYWORDS)
+    bits = matcher.scan(pd.Series(TEXTS))
+    tweets = [Tweet(text=text) for text in TEXTS]
+    match_keywords(tweets, KEYWORDS)
+    for tweet, got in zip(tweets, bits):
+        matched = {kw for i, kw in enumerate(matcher.keywords) if int(got) >> i & 1}
+        assert matched == {kw.lower() for kw in tweet.matched_keywords}, tweet.text
+    # Full-width letters read as plain ones on both paths
+    assert int(KeywordMatcher(['api']).scan(pd.Series(["ＡＰＩ docs"]))[0]) == 1
+
+
+def test_index_matches_matcher():
+    matcher = KeywordMatcher(KEYWORDS)
+    bits = matcher.scan(pd.Series(TEXTS))
+    index = KeywordIndex.build(np.array(TEXTS, dtype=object), np.arange(1, len(TEXTS) + 1))
+    for keyword in matcher.keywords:
+        expected = np.flatnonzero(matcher.mask(bits, [keyword]))
+        assert index.keyword_rows(keyword).tolist() == expected.tolist(), keyword
+
+
+def test_match_bits_cache_is_bounded():
+    matcher = KeywordMatcher(['ai'], cache_size=100)
+    df = pd.DataFrame({'id': range(1, 251), 'text': ['ai'] * 125 + ['no'] * 125})
+    first = matcher.match_bits(df)
+    assert len(matcher._cache) == 100
+    assert (matcher.match_bits(df) == first).all()
+    assert matcher.info()['hits'] == 100
+
+
+def test_filter_handles_non_ascii():
+    system = GauntletBlogSystem()
+    df = pd.DataFrame({'id': [1, 2, 3], 'text': ['Yeni APİ entegrasyonu', 'Become a Gauntlet AI engineer', 'hello'],
+                       'likes': ['1', '1', '1'], 'retweets': ['0', '0', '0'], 'replies': ['0', '0', '0']})
+    rows = system._filter_gauntlet_tweets(df)
+    assert list(rows) == [0, 1]
+
+
+def baseline_theme(text: str, gate) -> str:
+    """The original blog_generator.extract_gauntlet_themes chain (first matching theme wins), on normalized text"""
+    text = normalize_text(text).lower()
+    if not any(keyword in text for keyword in gate):
+        return None
+    if 'gauntlet' in text and ('training' in text or 'bootcamp' in text or 'program' in text):
+        return 'Training Program'
+    elif 'legacy' in text or 'enterprise' in text or any(lang in text for lang in ['fortran', 'cobol', 'assembly']):
+        return 'Legacy Code & Enterprise'
+    elif 'ai-first' in text or 'ai engineer' in text:
+        return 'AI-First Development'
+    elif 'job' in text or 'career' in text or '$' in text:
+        return 'Career & Salary'
+    elif 'agent' in text or 'claude' in text or 'gpt' in text:
+        return 'AI Tools & Agents'
+    return GENERAL_THEME
+
+
+def test_blog_themes_match_baseline():
+    generator = GauntletBlogGenerator()
+    matrix = generator.theme_classifier.classify(TEXTS)
+    dense = matrix.dense()
+    for row, text in enumerate(TEXTS):
+        themes = {theme for theme, member in zip(matrix.themes, dense[row]) if member}
+        expected = baseline_theme(text, generator.gauntlet_keywords)
+        if expected is None:
+            assert not themes, text
+        else:
+            # Multi-label: the first theme of the old chain is always among the tweet's themes,
+            # and the fallback only applies when no other theme does
+            assert expected in themes, text
+            assert (GENERAL_THEME in themes) == (expected == GENERAL_THEME), text
+    assert list(matrix.rows('AI-First Development')[:1]) == [TEXTS.index("Become a Gauntlet AI engineer")]
+
+
+def test_rule_based_themes_match_substring_check():
+    classifier = ThemeClassifier(RULE_BASED_THEMES)
+    matrix = classifier.classify(TEXTS)
+    for theme, keywords in RULE_BASED_THEMES.items():
+        expected = [row for row, text in enumerate(TEXTS)
+                    if any(kw in normalize_text(text).lower() for kw in keywords)]
+        assert list(matrix.rows(theme)) == expected, theme
+
+
+if __name__ == '__main__':
+    test_matches_substring_check()
+    test_overlapping_keywords()
+    test_matches_match_keywords()
+    test_index_matches_matcher()
+    test_match_bits_cache_is_bounded()
+    test_filter_handles_non_ascii()
+    test_blog_themes_match_baseline()
+    test_rule_based_themes_match_substring_check()
+    print("✅ KeywordMatcher, KeywordIndex and ThemeClassifier match the substring checks")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+LLM completion cache: hits and misses, validation, streamed replies
+replayed from the cache, and eviction only when it is due.
+"""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_cache import CompletionCache
+
+MESSAGES = [{'role': 'user', 'content': 'Name three AI topics'}]
+
+
+def response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def chunk(delta):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.closed = False
+
+    def __iter__(self):
+        return (chunk(delta) for delta in self.deltas)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompletionCache(db_path=str(tmp_path / 'llm_cache.db'), ttl_days=30, max_mb=1, enabled=True)
+
+
+def test_miss_then_hit(cache):
+    calls = []
+
+    def create():
+        calls.append(1)
+        return response('agents, evals, rag')
+
+    assert cache.complete(create, 'gpt-4', MESSAGES, temperature=0.3) == 'agents, evals, rag'
+    assert cache.complete(create, 'gpt-4', MESSAGES, temperature=0.3) == 'agents, evals, rag'
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Any change to the request is a different key
+    cache.complete(create, 'gpt-4', MESSAGES, temperature=0.4)
+    assert len(calls) == 2
+
+
+def test_validate_returns_parsed_reply_and_skips_bad_replies(cache):
+    assert cache.complete(lambda: response('{"a": 1}'), 'gpt-4', MESSAGES, validate=json.loads) == {'a': 1}
+    assert cache.complete(lambda: response('ignored'), 'gpt-4', MESSAGES, validate=json.loads) == {'a': 1}
+
+    other = [{'role': 'user', 'content': 'bad'}]
+    with pytest.raises(ValueError):
+        cache.complete(lambda: response('not json'), 'gpt-4', other, validate=json.loads)
+    assert cache.get(cache.make_key('gpt-4', other)) is None
+
+
+def test_stream_is_replayed_from_cache(cache):
+    stream = FakeStream(['TITLE: ', 'Agents', '\n\nCONTENT: ...'])
+    opened, deltas = [], []
+    content = cache.complete_stream(lambda: stream, deltas.append, 'gpt-4', MESSAGES, on_stream=opened.append)
+    assert content == 'TITLE: Agents\n\nCONTENT: ...'
+    assert deltas == ['TITLE: ', 'Agents', '\n\nCONTENT: ...']
+    assert opened == [stream] and stream.closed
+
+    replayed = []
+    assert cache.complete_stream(lambda: pytest.fail('cache hit expected'), replayed.append,
+                                 'gpt-4', MESSAGES) == content
+    assert replayed == [content]
+
+
+def test_abandoned_stream_is_not_cached(cache):
+    stream = FakeStream(['partial ', 'reply'])
+
+    def on_delta(delta):
+        raise RuntimeError('cancelled')
+
+    with pytest.raises(RuntimeError):
+        cache.complete_stream(lambda: stream, on_delta, 'gpt-4', MESSAGES)
+    assert stream.closed
+    assert cache.get(cache.make_key('gpt-4', MESSAGES)) is None
+
+
+def test_expired_entries_are_ignored(cache):
+    key = cache.make_key('gpt-4', MESSAGES)
+    cache.put(key, 'gpt-4', 'old')
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get(key) is None
+
+
+def test_evicts_only_when_due(cache, monkeypatch):
+    cache.evict_every = 5
+    evictions = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: evictions.append(1) or evict())
+
+    for i in range(11):
+        cache.put(f'key{i}', 'gpt-4', 'x' * 100)
+    # First write sizes the cache, then every evict_every writes
+    assert len(evictions) == 3
+
+    # Crossing the size cap evicts at once, least recently used first
+    cache.get('key10')
+    cache.put('big', 'gpt-4', 'y' * (cache.max_bytes - 150))
+    assert len(evictions) == 4
+    assert cache.get('key0') is None
+    assert cache.get('key10') is not None and cache.get('big') is not None
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tweet archive: append -> range reads over the sidecar block index ->
+compaction -> reads, including appends that land while a compaction is
+merging (sequence numbers reserved for its output must not be reused).
+"""
+
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from tweet_archive import ArchivePolicy, TweetArchive
+
+DAY_MS = 86_400_000
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def frame(ids, likes=0, day_offset=0):
+    """Tweet table with one tweet per day from START (+ day_offset days)"""
+    return pd.DataFrame({
+        'id': pd.Series(ids, dtype='int64'),
+        'timestamp': pd.to_datetime([START.timestamp() * 1000 + (i + day_offset) * DAY_MS for i in range(len(ids))],
+                                    unit='ms', utc=True),
+        'username': 'austen',
+        'text': [f'tweet {i}' for i in ids],
+        'likes': likes,
+        'retweets': 0,
+        'url': [f'https://x.com/austen/status/{i}' for i in ids],
+        'matched_keywords': ''
+    })
+
+
+def make_archive(tmp_path, **policy):
+    policy = {'block_records': 10, 'segment_records': 1000, 'compact_after_segments': 100, **policy}
+    return TweetArchive(str(tmp_path / 'archive'), ArchivePolicy(**policy))
+
+
+def segment_files(archive):
+    return sorted(f for f in os.listdir(archive._account_dir('austen')) if f.startswith('seg_'))
+
+
+def test_append_and_range_reads(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.append('austen', frame(range(1, 51), likes=1))
+    archive.append('austen', frame(range(41, 61), likes=2, day_offset=40))
+
+    df = archive.read('austen')
+    assert df['id'].tolist() == list(range(1, 61))
+    # Overlapping ids: the later segment's metrics win
+    assert set(df.loc[df['id'] > 40, 'likes']) == {2}
+    assert set(df.loc[df['id'] <= 40, 'likes']) == {1}
+
+    assert archive.read('austen', min_id=15, max_id=24)['id'].tolist() == list(range(15, 25))
+    since = datetime(2025, 1, 11, tzinfo=timezone.utc)
+    until = datetime(2025, 1, 20, tzinfo=timezone.utc)
+    assert archive.read('austen', since=since, until=until)['id'].tolist() == list(range(11, 21))
+
+    segment = archive.load_index('austen')['segments'][0]
+    assert len(segment['blocks']) == 5
+    assert [(b['min_id'], b['max_id']) for b in segment['blocks']][:2] == [(1, 10), (11, 20)]
+
+
+def test_compact_then_read(tmp_path):
+    archive = make_archive(tmp_path, segment_records=25)
+    for start in range(0, 60, 20):
+        archive.append('austen', frame(range(start + 1, start + 31), likes=start))
+    before = archive.read('austen')
+
+    index = archive.compact('austen')
+    assert [s['sequence'] for s in index['segments']] == [4, 5, 6]
+    assert [s['count'] for s in index['segments']] == [25, 25, 20]
+    assert segment_files(archive) == [s['file'] for s in index['segments']]
+    pd.testing.assert_frame_equal(archive.read('austen'), before)
+    assert archive.read('austen', min_id=26, max_id=30)['id'].tolist() == [26, 27, 28, 29, 30]
+
+    # Below min_segments nothing is rewritten
+    assert archive.compact('austen', min_segments=10)['segments'] == index['segments']
+
+
+def test_append_during_compaction_uses_reserved_sequences(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.append('austen', frame(range(1, 21), likes=1))
+    archive.append('austen', frame(range(11, 31), likes=2))
+
+    merge = archive._iter_segments
+    appended = []
+
+    def merge_with_concurrent_append(username, segments, *args):
+        # The index lock is released while compaction merges: an append lands now
+        appended.append(archive.append('austen', frame(range(25, 36), likes=3)))
+        return merge(username, segments, *args)
+
+    archive._iter_segments = merge_with_concurrent_append
+    index = archive.compact('austen')
+    archive._iter_segments = merge
+
+    # Sequence 3 was reserved for the compacted output, so the append took 4
+    assert appended[0]['sequence'] == 4
+    assert [s['sequence'] for s in index['segments']] == [3, 4]
+    assert segment_files(archive) == ['seg_000003.jsonl.gz', 'seg_000004.jsonl.gz']
+    assert archive._next_sequence(index) == 5
+
+    df = archive.read('austen')
+    assert df['id'].tolist() == list(range(1, 36))
+    likes = dict(zip(df['id'], df['likes']))
+    assert (likes[5], likes[15], likes[24], likes[25], likes[35]) == (1, 2, 2, 3, 3)
+
+
+def test_compaction_removes_unindexed_segments(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.append('austen', frame(range(1, 11)))
+    orphan = os.path.join(archive._account_dir('austen'), 'seg_000099.jsonl.gz')
+    with open(orphan, 'wb') as f:
+        f.write(b'partial')
+
+    archive.compact('austen')
+    assert not os.path.exists(orphan)
+    assert archive.read('austen')['id'].tolist() == list(range(1, 11))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Round trip through the export writers and the streaming readers: tweets
+written by tweet_exporters as .txt and .jsonl read back through
+tweet_readers with the same count, text, parsed metrics, ids and dates.
+"""
+
+import pytest
+
+from tweet_exporters import export_tweets
+from tweet_readers import iter_jsonl_export, iter_tweets, iter_txt_export
+from tweet_record import Tweet
+
+RAW = [
+    # text, date, likes, retweets
+    ("Plain tweet about AI engineers", '2025-01-02T10:00:00.000Z', '1.2K', '30'),
+    ("Multi-line\n\nwith a blank line\nLikes: 999\nTweet #2:\nstill the same tweet", '2025-01-03T11:30:00.000Z', '1,234', '3M'),
+    ("Unicode 🚀 𝐀𝐈 straße — “quotes”", '2025-01-04T00:00:00.000Z', '.5K', '0'),
+    ("", None, '2.5B', 'junk'),
+    ("--------------------------------------------------------------------------------", '2025-01-05T08:00:00.000Z', '7', '1'),
+]
+
+
+def make_tweets():
+    return [
+        Tweet.from_scraped('austen', text, date, f'https://x.com/austen/status/{1000 + i}', likes, retweets)
+        for i, (text, date, likes, retweets) in enumerate(RAW)
+    ]
+
+
+@pytest.mark.parametrize('fmt, reader', [('txt', iter_txt_export), ('jsonl', iter_jsonl_export)])
+def test_round_trip(tmp_path, fmt, reader):
+    tweets = make_tweets()
+    result = export_tweets('austen', tweets, keywords=['ai'], base_path=str(tmp_path / 'austen_20250101_000000'),
+                           formats=[fmt])
+    for future in result.pending.values():
+        future.result()
+    path = result.paths[fmt]
+
+    records = list(reader(path))
+    assert len(records) == len(tweets)
+    for written, read in zip(tweets, records):
+        assert read.text == written.text
+        assert (read.likes, read.retweets) == (written.likes, written.retweets)
+        assert read.id == written.id
+        assert read.url == written.url
+        assert read.timestamp == written.timestamp
+        assert read.matched_keywords == written.matched_keywords
+    assert [record.likes for record in records] == [1_200, 1_234, 500, 2_500_000_000, 7]
+    assert [record.retweets for record in records] == [30, 3_000_000, 0, 0, 1]
+    assert list(iter_tweets(path))[1].text == tweets[1].text
+
+
+def test_empty_txt_export(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_text('')
+    assert list(iter_txt_export(str(path))) == []
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Engagement count parsing: parse_count (one scraped value) and parse_counts
+(vectorized, for table columns) must agree on Twitter's abbreviated counts.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tweet_store import parse_count, parse_counts
+
+CASES = [
+    ('1.2K', 1_200),
+    ('1,234', 1_234),
+    ('3M', 3_000_000),
+    ('2.5B', 2_500_000_000),
+    ('.5K', 500),
+    ('12k', 12_000),
+    (' 7 ', 7),
+    ('0', 0),
+    ('junk', 0),
+    ('1.2.3', 0),
+    ('K', 0),
+    ('-5', 0),
+    ('', 0),
+    ('N/A', 0),
+]
+
+
+def test_parse_count():
+    for raw, expected in CASES:
+        assert parse_count(raw) == expected, raw
+
+
+def test_parse_count_non_strings():
+    assert parse_count(None) == 0
+    assert parse_count(42) == 42
+    assert parse_count(float('nan')) == 0
+
+
+def test_parse_counts_matches_parse_count():
+    raw = pd.Series([raw for raw, _ in CASES] + [None], dtype=object)
+    counts = parse_counts(raw)
+    assert counts.dtype == np.int64
+    assert counts.tolist() == [expected for _, expected in CASES] + [0]
+
+
+def test_parse_counts_typed_columns():
+    assert parse_counts(pd.Series([1, 2, 3], dtype='int64')).tolist() == [1, 2, 3]
+    assert parse_counts(pd.Series([1.0, np.nan])).tolist() == [1, 0]
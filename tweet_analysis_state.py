@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Incremental Theme Analysis
+==========================
+
+Persisted theme-analysis state, one per analysis scope (an account or a set
+of accounts) in tweets/analysis/{scope}.npz:
+
+- the TF-IDF vocabulary with running document frequencies (unknown terms are
+  promoted once they reach min_df, so new topics get their own vocabulary)
+- k-means centroids with their update counts; each centroid is a topic with
+  a stable uid, so topic IDs survive re-runs
+- per-topic size, representative tweets, phrase counters, recurrence and the
+  LLM label (kept until the topic's top terms drift away from it)
+- every status id already seen and the topic it was assigned to
+
+fold() only touches tweets whose id isn't in the state yet: they join the
+nearest centroid (mini-batch update), and enough tweets that fit no topic
+seed new topics. A daily run costs O(new tweets), not O(corpus). Trend
+baselines live in tweet_trends, which is incremental the same way.
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from file_lock import file_lock
+from tweet_clustering import MiniBatchKMeans, TfidfIndex, default_cluster_count
+from tweet_dedupe import near_duplicate_groups
+from tweet_phrases import PhraseMiner, TopKCounter
+
+DEFAULT_ANALYSIS_DIR = os.path.join('tweets', 'analysis')
+
+# Out-of-vocabulary terms tracked for promotion, and phrase counter size per topic
+_PENDING_TERMS_CAPACITY = 20000
+_TOPIC_PHRASE_CAPACITY = 2000
+
+
+def _topic_phrases() -> PhraseMiner:
+    return PhraseMiner(capacity=_TOPIC_PHRASE_CAPACITY)
+
+
+@dataclass
+class TopicState:
+    uid: int
+    size: int = 0
+    recurrence: int = 0                     # largest near-duplicate group seen in the topic
+    representatives: List[Dict] = field(default_factory=list)   # {'id', 'url', 'text', 'similarity'}
+    label: Optional[Dict] = None            # LLM question/keywords/priority
+    label_terms: List[str] = field(default_factory=list)        # top terms when the label was written
+    phrases: PhraseMiner = field(default_factory=_topic_phrases)
+    top_terms: List[str] = field(default_factory=list)
+
+    @property
+    def topic_id(self) -> str:
+        return f"gauntlet_topic_{self.uid}"
+
+    @property
+    def needs_label(self) -> bool:
+        """No label yet, or the topic drifted (fewer than 2 of its top 5 terms still match)"""
+        return self.label is None or len(set(self.label_terms[:5]) & set(self.top_terms[:5])) < 2
+
+    def to_dict(self) -> Dict:
+        return {
+            'uid': self.uid, 'size': self.size, 'recurrence': self.recurrence,
+            'representatives': self.representatives, 'label': self.label, 'label_terms': self.label_terms,
+            'phrases': {'words': self.phrases.words.counts, 'ngrams': self.phrases.ngrams.counts,
+                        'total_words': self.phrases.total_words}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TopicState':
+        topic = cls(uid=data['uid'], size=data['size'], recurrence=data['recurrence'],
+                    representatives=data['representatives'], label=data['label'], label_terms=data['label_terms'])
+        topic.phrases.words.counts = data['phrases']['words']
+        topic.phrases.ngrams.counts = data['phrases']['ngrams']
+        topic.phrases.total_words = data['phrases']['total_words']
+        return topic
+
+
+class ThemeState:
+    """Incremental topic model for one analysis scope"""
+
+    def __init__(self, min_size: int = 3, new_topic_similarity: float = 0.1, n_terms: int = 8,
+                 n_representatives: int = 5, seed: int = 42):
+        self.min_size = min_size
+        self.new_topic_similarity = new_topic_similarity
+        self.n_terms = n_terms
+        self.n_representatives = n_representatives
+        self.seed = seed
+        self.tfidf: Optional[TfidfIndex] = None
+        self.centers = np.empty((0, 0), dtype='float64')
+        self.center_counts = np.empty(0, dtype='float64')   # k-means learning-rate counts
+        self.topics: List[TopicState] = []                   # centers[i] belongs to topics[i]
+        self.next_uid = 1
+        self.pending = TopKCounter(_PENDING_TERMS_CAPACITY)  # document frequency of unknown terms
+        self.ids = np.empty(0, dtype='int64')                # seen status ids, sorted
+        self.assignments = np.empty(0, dtype='int64')        # topic uid per seen id (-1: not clustered)
+        self.updated_at: Optional[str] = None
+
+    def unseen_rows(self, ids: Sequence[int]) -> np.ndarray:
+        """Positions of tweets not folded in yet (first occurrence of each id; id 0 can't be tracked)"""
+        ids = np.asarray(ids, dtype='int64')
+        candidates = np.flatnonzero((ids > 0) & ~np.isin(ids, self.ids))
+        _, first = np.unique(ids[candidates], return_index=True)
+        return candidates[np.sort(first)]
+
+    def uids_for(self, ids: Sequence[int]) -> np.ndarray:
+        """Topic uid of each status id (-1 if unseen or not clustered)"""
+        found = pd.Index(self.ids).get_indexer(np.asarray(ids, dtype='int64'))
+        uids = np.full(len(found), -1, dtype='int64')
+        uids[found >= 0] = self.assignments[found[found >= 0]]
+        return uids
+
+    def active_topics(self) -> List[TopicState]:
+        """Topics with at least min_size tweets, largest first"""
+        return sorted((t for t in self.topics if t.size >= self.min_size), key=lambda t: t.size, reverse=True)
+
+    def fold(self, ids: Sequence[int], texts: Sequence[str], urls: Sequence[str], selected: Sequence[bool]) -> int:
+        """
+        Fold unseen tweets into the state; only `selected` ones are clustered, the
+        rest are just marked seen. Returns how many tweets were added (0 while
+        there are too few selected tweets to fit the first topics).
+        """
+        ids = np.asarray(ids, dtype='int64')
+        texts = np.asarray(texts, dtype=object)
+        rows = np.flatnonzero(np.asarray(selected, dtype=bool))
+        uids = np.full(len(ids), -1, dtype='int64')
+
+        if len(rows):
+            if self.tfidf is None:
+                X = self._bootstrap(texts[rows])
+                if X is None:
+                    return 0
+            else:
+                X = self._extend(texts[rows])
+            model = MiniBatchKMeans(len(self.topics), seed=self.seed)
+            model.centers = self.centers
+            labels, similarity = model.predict(X)
+            labels[X.getnnz(axis=1) == 0] = -1
+            self._update_topics(ids[rows], texts[rows], np.asarray(urls, dtype=object)[rows], labels, similarity)
+            topic_uids = np.array([t.uid for t in self.topics], dtype='int64')
+            uids[rows] = np.where(labels >= 0, topic_uids[np.maximum(labels, 0)], -1)
+
+        self._mark_seen(ids, uids)
+        self.updated_at = datetime.now(timezone.utc).isoformat()
+        return len(ids)
+
+    def _new_topics(self, count: int) -> List[TopicState]:
+        topics = [TopicState(uid=self.next_uid + i) for i in range(count)]
+        self.next_uid += count
+        return topics
+
+    def _bootstrap(self, texts: np.ndarray):
+        """First fit: vocabulary and topics from the initial corpus"""
+        if len(texts) < 2 * self.min_size:
+            return None
+        tfidf = TfidfIndex(min_df=2 if len(texts) < 1000 else 3)
+        X = tfidf.fit_transform(texts)
+        if X.shape[1] == 0:
+            return None
+        model = MiniBatchKMeans(min(default_cluster_count(len(texts)), len(texts)), seed=self.seed).fit(X)
+        self.tfidf = tfidf
+        self.centers, self.center_counts = model.centers, model.seen
+        self.topics = self._new_topics(len(self.centers))
+        return X
+
+    def _extend(self, texts: np.ndarray):
+        """Vectorize new tweets, move the centroids towards them and seed topics for outliers"""
+        self._grow_vocabulary(texts)
+        X = self.tfidf.transform(texts, update_idf=True)
+        nonempty = X.getnnz(axis=1) > 0
+        best = np.asarray((X @ self.centers.T).max(axis=1)).ravel() if len(self.centers) else np.zeros(X.shape[0])
+        outliers = nonempty & (best < self.new_topic_similarity)
+
+        if outliers.sum() >= max(10, 2 * self.min_size):
+            n_topics = min(default_cluster_count(int(outliers.sum())), int(outliers.sum()) // self.min_size)
+            seeded = MiniBatchKMeans(n_topics, seed=self.seed).fit(X[outliers])
+            self.centers = np.vstack([self.centers, seeded.centers])
+            self.center_counts = np.concatenate([self.center_counts, seeded.seen])
+            self.topics.extend(self._new_topics(n_topics))
+            nonempty &= ~outliers
+
+        model = MiniBatchKMeans(len(self.topics), seed=self.seed)
+        model.centers, model.seen = self.centers, self.center_counts
+        model.partial_fit(X[nonempty])
+        return X
+
+    def _grow_vocabulary(self, texts: np.ndarray):
+        """Promote unknown terms that reached min_df (the centroids get zero weight for them)"""
+        tfidf = self.tfidf
+        batch = Counter()
+        for text in texts:
+            batch.update({term for term in tfidf.terms_of(text) if term not in tfidf.vocabulary})
+        for term, count in batch.items():
+            self.pending.add(term, count)
+
+        room = tfidf.max_features - len(tfidf.terms)
+        ready = sorted(((count, term) for term, count in self.pending.counts.items() if count >= tfidf.min_df),
+                       reverse=True)[:max(room, 0)]
+        if not ready:
+            return
+        # transform(update_idf=True) counts this batch, so only earlier documents go in here
+        tfidf.add_terms({term: count - batch.get(term, 0) for count, term in ready})
+        for _, term in ready:
+            del self.pending.counts[term]
+        self.centers = np.hstack([self.centers, np.zeros((len(self.centers), len(ready)))])
+
+    def _update_topics(self, ids: np.ndarray, texts: np.ndarray, urls: np.ndarray,
+                       labels: np.ndarray, similarity: np.ndarray):
+        for index in np.unique(labels[labels >= 0]):
+            topic = self.topics[index]
+            members = np.flatnonzero(labels == index)
+            topic.size += len(members)
+            topic.phrases.feed_all(texts[members])
+            best = members[np.argsort(-similarity[members], kind='stable')[:self.n_representatives]]
+            candidates = topic.representatives + [
+                {'id': int(ids[i]), 'url': urls[i], 'text': texts[i][:280], 'similarity': round(float(similarity[i]), 4)}
+                for i in best
+            ]
+            candidates.sort(key=lambda rep: rep['similarity'], reverse=True)
+            topic.representatives = candidates[:self.n_representatives]
+
+        # Recurrence within this batch of new tweets (earlier batches already counted)
+        for group in near_duplicate_groups(texts, min_size=self.min_size):
+            for index in np.unique(labels[group][labels[group] >= 0]):
+                self.topics[index].recurrence = max(self.topics[index].recurrence, len(group))
+        self.refresh_terms()
+
+    def refresh_terms(self):
+        for topic, center in zip(self.topics, self.centers):
+            top = np.argsort(-center)[:self.n_terms]
+            topic.top_terms = [self.tfidf.terms[i] for i in top if center[i] > 0]
+
+    def _mark_seen(self, ids: np.ndarray, uids: np.ndarray):
+        keep = (ids > 0) & ~np.isin(ids, self.ids)
+        all_ids = np.concatenate([self.ids, ids[keep]])
+        order = np.argsort(all_ids, kind='stable')
+        self.ids = all_ids[order]
+        self.assignments = np.concatenate([self.assignments, uids[keep]])[order]
+
+
+class AnalysisStateStore:
+    def __init__(self, analysis_dir: str = DEFAULT_ANALYSIS_DIR):
+        self.analysis_dir = analysis_dir
+
+    def _path(self, scope: str) -> str:
+        name = re.sub(r'[^a-z0-9_+-]', '_', scope.lstrip('@').lower())
+        return os.path.join(self.analysis_dir, f"{name}.npz")
+
+    def locked(self, scope: str):
+        """Hold around load -> fold -> save of a scope; shared with other processes (app, CLI)"""
+        return file_lock(self._path(scope) + '.lock')
+
+    def load(self, scope: str) -> ThemeState:
+        state = ThemeState()
+        path = self._path(scope)
+        if not os.path.exists(path):
+            return state
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            state.ids = data['ids'].copy()
+            state.assignments = data['assignments'].copy()
+            if meta['terms']:
+                state.tfidf = TfidfIndex(min_df=meta['min_df'])
+                state.tfidf.terms = meta['terms']
+                state.tfidf.vocabulary = {term: i for i, term in enumerate(meta['terms'])}
+                state.tfidf.doc_freq = data['doc_freq'].copy()
+                state.tfidf.n_docs = meta['n_docs']
+                state.centers = data['centers'].astype('float64')
+                state.center_counts = data['center_counts'].copy()
+        state.topics = [TopicState.from_dict(topic) for topic in meta['topics']]
+        state.next_uid = meta['next_uid']
+        state.pending.counts = meta['pending']
+        state.updated_at = meta['updated_at']
+        if state.tfidf is not None:
+            state.refresh_terms()
+        return state
+
+    def save(self, scope: str, state: ThemeState):
+        os.makedirs(self.analysis_dir, exist_ok=True)
+        tfidf = state.tfidf
+        meta = json.dumps({
+            'terms': tfidf.terms if tfidf else [],
+            'min_df': tfidf.min_df if tfidf else 2,
+            'n_docs': tfidf.n_docs if tfidf else 0,
+            'topics': [topic.to_dict() for topic in state.topics],
+            'next_uid': state.next_uid,
+            'pending': state.pending.counts,
+            'updated_at': state.updated_at
+        })
+        path = self._path(scope)
+        tmp_path = path[:-len('.npz')] + '.tmp.npz'
+        np.savez(tmp_path, ids=state.ids, assignments=state.assignments,
+                 doc_freq=tfidf.doc_freq if tfidf else np.empty(0),
+                 centers=state.centers.astype('float32'), center_counts=state.center_counts,
+                 meta=np.array(meta))
+        os.replace(tmp_path, path)
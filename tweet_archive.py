@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Compressed Tweet Archive
+========================
+
+Per-account archive of compressed JSONL segments under tweets/archive/{username}/.
+
+Each segment is a sequence of independently compressed blocks (gzip members
+or zstd frames). A sidecar index.json records, per segment and per block, the
+id range, date range, record count and byte offsets, so readers seek straight
+to the blocks that can match a query and stream-decompress only those.
+
+Retention (drop tweets older than N days) and compaction (merge segments,
+dedupe by tweet id, keep the freshest metrics) are driven by ArchivePolicy.
+Index updates hold a per-account file lock (scraper and maintenance processes
+may write the same account), and compaction runs off the append path: in a
+background thread once an account has enough segments, or via the CLI.
+"""
+
+import gzip
+import json
+import math
+import os
+import sys
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from file_lock import file_lock
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+DEFAULT_ARCHIVE_DIR = os.path.join('tweets', 'archive')
+INDEX_FILENAME = 'index.json'
+ARCHIVE_FIELDS = ['id', 'timestamp', 'username', 'text', 'likes', 'retweets', 'url', 'matched_keywords']
+
+
+@dataclass
+class ArchivePolicy:
+    """Archive configuration: codec, block/segment sizes, retention and compaction"""
+    codec: str = 'gzip'                       # 'gzip' or 'zstd'
+    block_records: int = 1000                 # records per independently compressed block
+    segment_records: int = 100_000            # max records per segment after compaction
+    retention_days: Optional[int] = None      # drop tweets older than this on compaction
+    compact_after_segments: int = 8           # compact an account once it has this many segments
+
+    @classmethod
+    def from_env(cls) -> 'ArchivePolicy':
+        """Build a policy from TWEET_ARCHIVE_* environment variables"""
+        retention = os.getenv('TWEET_ARCHIVE_RETENTION_DAYS')
+        return cls(
+            codec=os.getenv('TWEET_ARCHIVE_CODEC', 'gzip'),
+            block_records=int(os.getenv('TWEET_ARCHIVE_BLOCK_RECORDS', 1000)),
+            segment_records=int(os.getenv('TWEET_ARCHIVE_SEGMENT_RECORDS', 100_000)),
+            retention_days=int(retention) if retention else None,
+            compact_after_segments=int(os.getenv('TWEET_ARCHIVE_COMPACT_AFTER', 8))
+        )
+
+
+def archive_enabled() -> bool:
+    """Archival mode is opt-in via TWEET_ARCHIVE=1"""
+    return os.getenv('TWEET_ARCHIVE', '').lower() in ('1', 'true', 'yes')
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _to_epoch_ms(value) -> Optional[int]:
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(pd.Timestamp(value).timestamp() * 1000)
+
+
+def _ranges_overlap(lo, hi, query_lo, query_hi) -> bool:
+    """Closed-range overlap test where None on the query side means unbounded"""
+    if lo is None or hi is None:
+        return query_lo is None and query_hi is None
+    if query_lo is not None and hi < query_lo:
+        return False
+    if query_hi is not None and lo > query_hi:
+        return False
+    return True
+
+
+# Accounts with a background compaction running in this process
+_compacting = set()
+_compacting_lock = threading.Lock()
+
+
+class TweetArchive:
+    def __init__(self, archive_dir: str = DEFAULT_ARCHIVE_DIR, policy: Optional[ArchivePolicy] = None):
+        """Open an archive rooted at archive_dir"""
+        self.archive_dir = archive_dir
+        self.policy = policy or ArchivePolicy.from_env()
+        if self.policy.codec == 'zstd' and zstandard is None:
+            print("⚠️ zstandard not installed - archive falls back to gzip")
+            self.policy.codec = 'gzip'
+
+    # ------------------------------------------------------------------ index
+
+    def _account_dir(self, username: str) -> str:
+        return os.path.join(self.archive_dir, username.lstrip('@').lower())
+
+    def load_index(self, username: str) -> Dict:
+        path = os.path.join(self._account_dir(username), INDEX_FILENAME)
+        if not os.path.exists(path):
+            return {'username': username, 'segments': []}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _index_lock(self, username: str):
+        """Per-account lock around index read-modify-writes (threads and processes)"""
+        return file_lock(os.path.join(self._account_dir(username), INDEX_FILENAME + '.lock'))
+
+    @staticmethod
+    def _next_sequence(index: Dict) -> int:
+        # next_sequence covers sequence numbers reserved by a compaction in progress
+        return max(max((s['sequence'] for s in index['segments']), default=0) + 1, index.get('next_sequence', 1))
+
+    def _save_index(self, username: str, index: Dict):
+        path = os.path.join(self._account_dir(username), INDEX_FILENAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def accounts(self) -> List[str]:
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.archive_dir)
+            if os.path.exists(os.path.join(self.archive_dir, name, INDEX_FILENAME))
+        )
+
+    # ------------------------------------------------------------------ write
+
+    def _write_segment(self, username: str, records: List[Dict], sequence: int) -> Dict:
+        """Write records as one segment of compressed blocks and return its index entry"""
+        account_dir = self._account_dir(username)
+        os.makedirs(account_dir, exist_ok=True)
+        codec = self.policy.codec
+        extension = '.jsonl.zst' if codec == 'zstd' else '.jsonl.gz'
+        filename = f"seg_{sequence:06d}{extension}"
+
+        blocks = []
+        offset = 0
+        with open(os.path.join(account_dir, filename), 'wb') as f:
+            for start in range(0, len(records), self.policy.block_records):
+                block = records[start:start + self.policy.block_records]
+                payload = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in block).encode('utf-8')
+                compressed = _compress(payload, codec)
+                f.write(compressed)
+                ids = [r['id'] for r in block]
+                stamps = [r['timestamp'] for r in block if r['timestamp'] is not None]
+                blocks.append({
+                    'offset': offset,
+                    'length': len(compressed),
+                    'count': len(block),
+                    'min_id': min(ids),
+                    'max_id': max(ids),
+                    'min_ts': min(stamps) if stamps else None,
+                    'max_ts': max(stamps) if stamps else None
+                })
+                offset += len(compressed)
+
+        return {
+            'file': filename,
+            'codec': codec,
+            'sequence': sequence,
+            'count': len(records),
+            'bytes': offset,
+            'min_id': min(b['min_id'] for b in blocks),
+            'max_id': max(b['max_id'] for b in blocks),
+            'min_ts': min((b['min_ts'] for b in blocks if b['min_ts'] is not None), default=None),
+            'max_ts': max((b['max_ts'] for b in blocks if b['max_ts'] is not None), default=None),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'blocks': blocks
+        }
+
+    @staticmethod
+    def _frame_to_records(df: pd.DataFrame) -> List[Dict]:
+        records = []
+        for row in df.itertuples(index=False):
+            row = row._asdict()
+            records.append({
+                'id': int(row['id']),
+                'timestamp': _to_epoch_ms(row.get('timestamp')),
+                'username': str(row.get('username', '')),
+                'text': row.get('text') or '',
+                'likes': int(row.get('likes', 0)),
+                'retweets': int(row.get('retweets', 0)),
+                'url': row.get('url') or '',
+                'matched_keywords': row.get('matched_keywords') or ''
+            })
+        return records
+
+    def append(self, username: str, df: pd.DataFrame) -> Optional[Dict]:
+        """Archive a tweet table (see tweet_store.tweets_to_frame) as a new segment"""
+        df = df[df['id'] > 0].sort_values('id')
+        if df.empty:
+            return None
+
+        records = self._frame_to_records(df)
+        with self._index_lock(username):
+            index = self.load_index(username)
+            sequence = self._next_sequence(index)
+            segment = self._write_segment(username, records, sequence)
+            index['segments'].append(segment)
+            index['next_sequence'] = sequence + 1
+            self._save_index(username, index)
+
+        if len(index['segments']) >= self.policy.compact_after_segments:
+            self.compact_in_background(username)
+        return segment
+
+    # ------------------------------------------------------------------- read
+
+    def iter_records(self, username: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     min_id: Optional[int] = None, max_id: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Stream archived records matching an id/date range.
+
+        Only blocks whose sidecar ranges overlap the query are read and
+        decompressed. Records may repeat across segments; see read().
+        """
+        return self._iter_segments(username, self.load_index(username)['segments'], since, until, min_id, max_id)
+
+    def _iter_segments(self, username: str, segments: List[Dict], since: Optional[datetime] = None,
+                       until: Optional[datetime] = None, min_id: Optional[int] = None,
+                       max_id: Optional[int] = None) -> Iterator[Dict]:
+        since_ms, until_ms = _to_epoch_ms(since), _to_epoch_ms(until)
+        account_dir = self._account_dir(username)
+
+        for segment in segments:
+            if not _ranges_overlap(segment['min_id'], segment['max_id'], min_id, max_id):
+                continue
+            if (since_ms or until_ms) and not _ranges_overlap(segment['min_ts'], segment['max_ts'], since_ms, until_ms):
+                continue
+
+            with open(os.path.join(account_dir, segment['file']), 'rb') as f:
+                for block in segment['blocks']:
+                    if not _ranges_overlap(block['min_id'], block['max_id'], min_id, max_id):
+                        continue
+                    if (since_ms or until_ms) and not _ranges_overlap(block['min_ts'], block['max_ts'], since_ms, until_ms):
+                        continue
+                    f.seek(block['offset'])
+                    payload = _decompress(f.read(block['length']), segment['codec'])
+                    for line in payload.decode('utf-8').splitlines():
+                        record = json.loads(line)
+                        if min_id is not None and record['id'] < min_id:
+                            continue
+                        if max_id is not None and record['id'] > max_id:
+                            continue
+                        ts = record['timestamp']
+                        if since_ms is not None and (ts is None or ts < since_ms):
+                            continue
+                        if until_ms is not None and (ts is None or ts > until_ms):
+                            continue
+                        yield record
+
+    def read(self, username: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+             min_id: Optional[int] = None, max_id: Optional[int] = None) -> pd.DataFrame:
+        """Read matching records as a typed tweet table, deduped by id (latest segment wins)"""
+        latest = {}
+        for record in self.iter_records(username, since, until, min_id, max_id):
+            latest[record['id']] = record
+        df = pd.DataFrame(list(latest.values()), columns=ARCHIVE_FIELDS)
+        df['id'] = df['id'].astype('int64')
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+        df['username'] = df['username'].astype('category')
+        df['likes'] = df['likes'].astype('int64')
+        df['retweets'] = df['retweets'].astype('int64')
+        return df.sort_values('id').reset_index(drop=True)
+
+    # ------------------------------------------------------------ maintenance
+
+    def compact(self, username: str, min_segments: int = 1) -> Dict:
+        """
+        Merge an account's segments, dedupe by id, apply retention and rewrite
+        (skipped below min_segments). One compaction per account at a time;
+        the merge runs without the index lock, and segments appended meanwhile
+        are kept (after the compacted ones, so their records still win).
+        """
+        with file_lock(os.path.join(self._account_dir(username), 'compact.lock')):
+            return self._compact(username, min_segments)
+
+    def _compact(self, username: str, min_segments: int) -> Dict:
+        account_dir = self._account_dir(username)
+        with self._index_lock(username):
+            index = self.load_index(username)
+            old_segments = index['segments']
+            # Segments a killed compaction wrote but never indexed (no writer is mid-segment now)
+            indexed = {s['file'] for s in old_segments}
+            for filename in os.listdir(account_dir) if os.path.isdir(account_dir) else []:
+                if filename.startswith('seg_') and filename not in indexed:
+                    os.remove(os.path.join(account_dir, filename))
+            if not old_segments or len(old_segments) < min_segments:
+                return index
+            # Reserve sequence numbers for the output so concurrent appends can't reuse them
+            first_sequence = self._next_sequence(index)
+            reserved = max(1, math.ceil(sum(s['count'] for s in old_segments) / self.policy.segment_records))
+            index['next_sequence'] = first_sequence + reserved
+            self._save_index(username, index)
+
+        latest = {}
+        for record in self._iter_segments(username, old_segments):
+            latest[record['id']] = record
+
+        if self.policy.retention_days is not None:
+            cutoff = _to_epoch_ms(datetime.now(timezone.utc) - timedelta(days=self.policy.retention_days))
+            latest = {k: r for k, r in latest.items() if r['timestamp'] is None or r['timestamp'] >= cutoff}
+
+        records = [latest[k] for k in sorted(latest)]
+        sequence = first_sequence - 1
+        new_segments = []
+        for start in range(0, len(records), self.policy.segment_records):
+            sequence += 1
+            new_segments.append(self._write_segment(username, records[start:start + self.policy.segment_records], sequence))
+
+        with self._index_lock(username):
+            index = self.load_index(username)
+            compacted = {s['file'] for s in old_segments}
+            index['segments'] = new_segments + [s for s in index['segments'] if s['file'] not in compacted]
+            index['compacted_at'] = datetime.now(timezone.utc).isoformat()
+            self._save_index(username, index)
+
+        for segment in old_segments:
+            try:
+                os.remove(os.path.join(account_dir, segment['file']))
+            except OSError:
+                pass
+
+        before = sum(s['count'] for s in old_segments)
+        print(f"🗜️ Compacted @{username}: {len(old_segments)} segments ({before} records) -> "
+              f"{len(new_segments)} segments ({len(records)} records)")
+        return index
+
+    def compact_in_background(self, username: str) -> bool:
+        """Start compacting an account in a daemon thread (False if one is already running)"""
+        key = os.path.abspath(self._account_dir(username))
+        with _compacting_lock:
+            if key in _compacting:
+                return False
+            _compacting.add(key)
+
+        def run():
+            try:
+                self.compact(username, min_segments=self.policy.compact_after_segments)
+            except Exception as e:
+                print(f"⚠️ Background compaction of @{username} failed: {e}")
+            finally:
+                with _compacting_lock:
+                    _compacting.discard(key)
+
+        threading.Thread(target=run, name=f'compact-{username}', daemon=True).start()
+        return True
+
+    def stats(self, username: str) -> Dict:
+        segments = self.load_index(username)['segments']
+        return {
+            'username': username,
+            'segments': len(segments),
+            'records': sum(s['count'] for s in segments),
+            'bytes': sum(s['bytes'] for s in segments),
+            'policy': asdict(self.policy)
+        }
+
+
+def main():
+    """Maintenance entry point: python tweet_archive.py [compact|stats] [username ...]"""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    archive = TweetArchive()
+    usernames = sys.argv[2:] or archive.accounts()
+    for username in usernames:
+        if command == 'compact':
+            archive.compact(username)
+        print(json.dumps(archive.stats(username)))
+
+
+if __name__ == "__main__":
+    main()
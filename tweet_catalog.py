@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Tweet File Catalog
+==================
+
+Persisted catalog of scrape outputs (tweets/catalog.json). Each entry records
+the username, filters, date range, row count, format, size and mtime of one
+exported file. The scraper registers files as it writes them, and consumers
+ask for "latest/largest file for user X" from in-memory maps instead of
+scanning the tweets/ directory on every request.
+
+Several processes write the catalog (scraper app, dashboard, compaction), so
+every change reloads the file and applies itself under a file lock before the
+atomic write. Entries are keyed by normalized absolute path: relative and
+absolute spellings of a file find the same entry.
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from file_lock import file_lock
+
+DEFAULT_TWEETS_DIR = 'tweets'
+CATALOG_FILENAME = 'catalog.json'
+
+# Formats analysis can load, in order of preference
+ANALYSIS_FORMATS = ('parquet', 'xlsx', 'csv', 'jsonl', 'txt')
+
+# {username}[_keywords_{kw-kw}][_from_{YYYYMMDD}]_{YYYYMMDD}_{HHMMSS}.{ext}
+_EXPORT_NAME_RE = re.compile(
+    r'^(?P<username>.+?)(?:_keywords_(?P<keywords>.+?))?(?:_from_(?P<from>\d{8}))?_(?P<ts>\d{8}_\d{6})\.(?P<ext>\w+)$'
+)
+
+
+def _count_rows(path: str, fmt: str) -> Optional[int]:
+    """Cheap row count for legacy files found during a catalog rebuild"""
+    try:
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(path).metadata.num_rows
+        if fmt == 'xlsx':
+            from openpyxl import load_workbook
+            workbook = load_workbook(path, read_only=True)
+            rows = max(workbook.active.max_row - 1, 0)
+            workbook.close()
+            return rows
+        if fmt == 'txt':
+            with open(path, 'r', encoding='utf-8') as f:
+                for _ in range(6):
+                    line = f.readline()
+                    if line.startswith('Total tweets found:'):
+                        return int(line.split(':', 1)[1])
+            return None
+        if fmt in ('csv', 'jsonl'):
+            with open(path, 'rb') as f:
+                lines = sum(1 for _ in f)
+            return lines - 1 if fmt == 'csv' else lines
+    except Exception:
+        return None
+    return None
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class TweetCatalog:
+    def __init__(self, tweets_dir: str = DEFAULT_TWEETS_DIR):
+        """Load the catalog, rebuilding it once from tweets/ if it doesn't exist yet"""
+        self.tweets_dir = tweets_dir
+        self.catalog_path = os.path.join(tweets_dir, CATALOG_FILENAME)
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict] = {}
+        self._latest: Dict[tuple, Dict] = {}
+        self._largest: Dict[tuple, Dict] = {}
+        self._canonical: Dict[str, Dict] = {}
+        self._loaded_mtime = None
+
+        if os.path.exists(self.catalog_path):
+            self._load()
+        elif os.path.isdir(tweets_dir):
+            self.rebuild()
+
+    # ---------------------------------------------------------- persistence
+
+    def _load(self):
+        with open(self.catalog_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._loaded_mtime = os.path.getmtime(self.catalog_path)
+        self._entries = {}
+        self._latest = {}
+        self._largest = {}
+        self._canonical = {}
+        for entry in data.get('files', []):
+            self._index(entry)
+
+    def _save(self):
+        os.makedirs(self.tweets_dir, exist_ok=True)
+        tmp_path = self.catalog_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': list(self._entries.values())}, f, indent=1)
+        os.replace(tmp_path, self.catalog_path)
+        self._loaded_mtime = os.path.getmtime(self.catalog_path)
+
+    def _commit(self, upserts: Iterable[Dict] = (), removals: Iterable[str] = (), replace_exports: bool = False):
+        """
+        Apply this process's changes on top of the catalog file as it is now
+        (other processes may have written it since we loaded) and save.
+        replace_exports drops every non-canonical entry first (rebuild).
+        """
+        with self._lock, file_lock(self.catalog_path + '.lock'):
+            if os.path.exists(self.catalog_path):
+                self._load()
+            if replace_exports:
+                self._entries = {key: e for key, e in self._entries.items()
+                                 if e.get('canonical') and os.path.exists(e['path'])}
+            for path in removals:
+                self._entries.pop(_path_key(path), None)
+            for entry in upserts:
+                self._entries[_path_key(entry['path'])] = entry
+            self._reindex()
+            self._save()
+
+    def refresh(self):
+        """Reload if another process (e.g. the scraper app) updated the catalog file"""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.catalog_path)
+            except OSError:
+                return
+            if mtime != self._loaded_mtime:
+                self._load()
+
+    # --------------------------------------------------------------- index
+
+    @staticmethod
+    def _better_latest(entry: Dict, current: Optional[Dict]) -> bool:
+        return current is None or entry['mtime'] >= current['mtime']
+
+    @staticmethod
+    def _better_largest(entry: Dict, current: Optional[Dict]) -> bool:
+        if current is None:
+            return True
+        return ((entry.get('rows') or 0), entry['mtime']) >= ((current.get('rows') or 0), current['mtime'])
+
+    def _index(self, entry: Dict):
+        self._entries[_path_key(entry['path'])] = entry
+        user = entry['username'].lower()
+        if entry.get('canonical'):
+            # Compacted per-account dataset (see tweet_compaction), kept apart from raw exports
+            self._canonical[user] = entry
+            return
+        for key in ((user, entry['format']), (user, None), (None, entry['format']), (None, None)):
+            if self._better_latest(entry, self._latest.get(key)):
+                self._latest[key] = entry
+            if self._better_largest(entry, self._largest.get(key)):
+                self._largest[key] = entry
+
+    def _reindex(self):
+        entries = list(self._entries.values())
+        self._entries, self._latest, self._largest, self._canonical = {}, {}, {}, {}
+        for entry in entries:
+            self._index(entry)
+
+    # ---------------------------------------------------------------- write
+
+    def register(self, path: str, username: str, fmt: Optional[str] = None, rows: Optional[int] = None,
+                 keywords: Optional[List[str]] = None, start_date: Optional[datetime] = None,
+                 min_date: Optional[str] = None, max_date: Optional[str] = None, canonical: bool = False,
+                 save: bool = True) -> Dict:
+        """Add or update the catalog entry for an exported file (save=False: this process only)"""
+        stat = os.stat(path)
+        entry = {
+            'path': path.replace(os.sep, '/'),
+            'username': username.lstrip('@'),
+            'format': fmt or os.path.splitext(path)[1].lstrip('.'),
+            'rows': rows,
+            'keywords': list(keywords) if keywords else [],
+            'start_date_filter': start_date.strftime('%Y-%m-%d') if start_date else None,
+            'min_date': min_date,
+            'max_date': max_date,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'canonical': canonical
+        }
+        if save:
+            self._commit(upserts=[entry])
+        else:
+            with self._lock:
+                self._index(entry)
+        return entry
+
+    def rebuild(self) -> int:
+        """One-off scan of tweets/ to catalog files written before the catalog existed"""
+        scanned = []
+        for filename in sorted(os.listdir(self.tweets_dir)):
+            match = _EXPORT_NAME_RE.match(filename)
+            if not match:
+                continue
+            fmt = match.group('ext').lower()
+            if fmt not in ANALYSIS_FORMATS:
+                continue
+            path = os.path.join(self.tweets_dir, filename)
+            start_date = datetime.strptime(match.group('from'), '%Y%m%d') if match.group('from') else None
+            keywords = match.group('keywords').split('-') if match.group('keywords') else None
+            scanned.append(self.register(path, match.group('username'), fmt, rows=_count_rows(path, fmt),
+                                         keywords=keywords, start_date=start_date, save=False))
+        self._commit(upserts=scanned, replace_exports=True)
+        print(f"📚 Tweet catalog rebuilt: {len(self._entries)} files")
+        return len(self._entries)
+
+    # ---------------------------------------------------------------- read
+
+    def _lookup(self, which: str, username: Optional[str], fmt: Optional[str]) -> Optional[Dict]:
+        key = (username.lstrip('@').lower() if username else None, fmt)
+        with self._lock:
+            if which == 'canonical':
+                entry = self._canonical.get(key[0])
+            else:
+                entry = (self._latest if which == 'latest' else self._largest).get(key)
+            if entry and not os.path.exists(entry['path']):
+                # File was deleted out from under us - drop it and recompute the maps
+                self._commit(removals=[entry['path']])
+                return self._lookup(which, username, fmt)
+            return entry
+
+    def latest(self, username: Optional[str] = None, fmt: Optional[str] = None) -> Optional[Dict]:
+        """Most recently written file (optionally for a user and/or format)"""
+        return self._lookup('latest', username, fmt)
+
+    def largest(self, username: Optional[str] = None, fmt: Optional[str] = None) -> Optional[Dict]:
+        """File with the most rows (optionally for a user and/or format)"""
+        return self._lookup('largest', username, fmt)
+
+    def canonical(self, username: str) -> Optional[Dict]:
+        """Compacted dataset for a user, if tweet_compaction has built one"""
+        return self._lookup('canonical', username, None)
+
+    def canonical_is_current(self, username: str) -> bool:
+        """
+        Whether the canonical dataset covers every export of a user: it exists
+        and is at least as new (mtime and max_date) as the latest export.
+        """
+        canonical = self.canonical(username)
+        if not canonical:
+            return False
+        latest = self.latest(username)
+        if not latest:
+            return True
+        if latest['mtime'] > canonical['mtime']:
+            return False
+        return not (latest.get('max_date') and (canonical.get('max_date') or '') < latest['max_date'])
+
+    def best_for_analysis(self, username: Optional[str] = None, largest: bool = True) -> Optional[str]:
+        """
+        Path analysis should read for a user: the compacted canonical dataset when
+        it is current, else the largest (or latest) export, preferring the
+        columnar store on ties. A canonical dataset older than the latest export
+        would hide every scrape since the compaction, so it is skipped until
+        tweet_compaction runs again.
+        """
+        if username and largest:
+            if self.canonical_is_current(username):
+                return self.canonical(username)['path']
+            if self.canonical(username):
+                print(f"⚠️ Canonical dataset for @{username.lstrip('@')} is older than the latest export - "
+                      f"using the export (rerun tweet_compaction to merge it)")
+        candidates = []
+        for preference, fmt in enumerate(ANALYSIS_FORMATS):
+            entry = self.largest(username, fmt) if largest else self.latest(username, fmt)
+            if entry:
+                rank = (entry.get('rows') or 0) if largest else entry['mtime']
+                candidates.append((rank, -preference, entry['path']))
+        return max(candidates)[2] if candidates else None
+
+    def entry(self, path: str) -> Optional[Dict]:
+        """Catalog entry for a file path, if cataloged"""
+        with self._lock:
+            return self._entries.get(_path_key(path))
+
+    def entries(self, username: Optional[str] = None, fmt: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            return [
+                e for e in self._entries.values()
+                if (username is None or e['username'].lower() == username.lstrip('@').lower())
+                and (fmt is None or e['format'] == fmt)
+            ]
+
+    def scrape_count(self) -> int:
+        """Number of scrape runs (files sharing a base name are one run)"""
+        with self._lock:
+            return len({os.path.splitext(key)[0] for key, e in self._entries.items() if not e.get('canonical')})
+
+    def count(self, fmt: Optional[str] = None) -> int:
+        with self._lock:
+            if fmt is None:
+                return len(self._entries)
+            return sum(1 for e in self._entries.values() if e['format'] == fmt)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(tweets_dir: str = DEFAULT_TWEETS_DIR) -> TweetCatalog:
+    """Process-wide catalog instance (reloaded only when the catalog file changes)"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None or _catalog.tweets_dir != tweets_dir:
+            _catalog = TweetCatalog(tweets_dir)
+        else:
+            _catalog.refresh()
+        return _catalog
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Offline Theme Clustering
+========================
+
+Local theme engine for the blog pipeline: sparse TF-IDF over unigrams and
+bigrams, then spherical mini-batch k-means (Sculley, 2010) on one core.
+Every selected tweet is clustered (no sampling); each cluster reports its
+top terms and the tweets closest to its centroid, so an LLM - if one is
+configured - only has to put a title on each cluster.
+
+Clustering can also run on precomputed dense embeddings (see
+tweet_embeddings.EmbeddingStore); top terms then come from each cluster's
+mean TF-IDF vector.
+
+Requires scipy (sparse matrices); callers fall back to rule-based themes
+without it.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from tweet_text import tokenize
+
+
+@dataclass
+class TweetCluster:
+    cluster_id: int
+    size: int
+    top_terms: List[str]
+    rows: np.ndarray                  # positions into the clustered texts
+    representative_rows: np.ndarray   # closest to the centroid first
+    cohesion: float                   # mean cosine similarity to the centroid
+
+
+class TfidfIndex:
+    """Vocabulary + L2-normalized sublinear TF-IDF matrix for a list of texts"""
+
+    def __init__(self, min_df: int = 2, max_df: float = 0.5, max_features: int = 20000, bigrams: bool = True):
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_features = max_features
+        self.bigrams = bigrams
+        self.vocabulary: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.doc_freq: Optional[np.ndarray] = None
+        self.n_docs = 0
+        self.idf: Optional[np.ndarray] = None
+
+    def terms_of(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        if self.bigrams:
+            tokens += [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return tokens
+
+    def fit_transform(self, texts: Sequence[str]) -> sp.csr_matrix:
+        docs = [self.terms_of(text) for text in texts]
+        n_docs = len(docs)
+
+        doc_freq = Counter()
+        for terms in docs:
+            doc_freq.update(set(terms))
+        max_count = max(self.max_df * n_docs, self.min_df)
+        kept = [(count, term) for term, count in doc_freq.items() if self.min_df <= count <= max_count]
+        kept.sort(reverse=True)
+        self.terms = sorted(term for _, term in kept[:self.max_features])
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.doc_freq = np.array([doc_freq[term] for term in self.terms], dtype='float64')
+        self.n_docs = n_docs
+        return self._matrix(docs)
+
+    def transform(self, texts: Sequence[str], update_idf: bool = False) -> sp.csr_matrix:
+        """TF-IDF rows over the fitted vocabulary; update_idf folds the texts into the document frequencies"""
+        docs = [self.terms_of(text) for text in texts]
+        if update_idf:
+            for terms in docs:
+                for term in set(terms):
+                    index = self.vocabulary.get(term)
+                    if index is not None:
+                        self.doc_freq[index] += 1
+            self.n_docs += len(docs)
+        return self._matrix(docs)
+
+    def add_terms(self, doc_freq: Dict[str, int]) -> int:
+        """Append new terms (with their document frequency so far) to a fitted vocabulary"""
+        new = [term for term in doc_freq if term not in self.vocabulary]
+        for term in new:
+            self.vocabulary[term] = len(self.terms)
+            self.terms.append(term)
+        self.doc_freq = np.concatenate([self.doc_freq, np.array([doc_freq[t] for t in new], dtype='float64')])
+        return len(new)
+
+    def _matrix(self, docs: List[List[str]]) -> sp.csr_matrix:
+        self.idf = np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+        vocabulary = self.vocabulary
+        indptr = [0]
+        indices: List[int] = []
+        for terms in docs:
+            indices.extend(vocabulary[t] for t in terms if t in vocabulary)
+            indptr.append(len(indices))
+        matrix = sp.csr_matrix(
+            (np.ones(len(indices), dtype='float64'), np.array(indices, dtype='int32'), np.array(indptr, dtype='int64')),
+            shape=(len(docs), len(self.terms))
+        )
+        matrix.sum_duplicates()
+        matrix.data = (1 + np.log(matrix.data)) * self.idf[matrix.indices]
+        return _normalize_rows(matrix)
+
+
+def _dense(matrix) -> np.ndarray:
+    return matrix.toarray() if sp.issparse(matrix) else np.asarray(matrix)
+
+
+def _normalize_rows(matrix: sp.csr_matrix) -> sp.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.csr_matrix(sp.diags(1 / norms) @ matrix)
+
+
+class MiniBatchKMeans:
+    """Spherical mini-batch k-means for L2-normalized rows, sparse or dense (cosine similarity)"""
+
+    def __init__(self, n_clusters: int, batch_size: int = 2048, n_batches: int = 100, seed: int = 42):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.n_batches = n_batches
+        self.rng = np.random.default_rng(seed)
+        self.centers: Optional[np.ndarray] = None
+        self.seen: Optional[np.ndarray] = None
+
+    def _init_centers(self, X) -> np.ndarray:
+        """k-means++ seeding on a sample of non-empty rows"""
+        candidates = np.flatnonzero(_nonempty_rows(X))
+        sample_size = 200 * self.n_clusters
+        if len(candidates) > sample_size:
+            candidates = self.rng.choice(candidates, sample_size, replace=False)
+        sample = X[candidates]
+        centers = [_dense(sample[self.rng.integers(sample.shape[0])]).ravel().astype('float64')]
+        best = np.asarray(sample @ centers[0]).ravel()
+        while len(centers) < self.n_clusters:
+            distance = np.clip(1 - best, 0, None)
+            if distance.sum() == 0:
+                break
+            choice = self.rng.choice(sample.shape[0], p=distance / distance.sum())
+            centers.append(_dense(sample[choice]).ravel().astype('float64'))
+            best = np.maximum(best, np.asarray(sample @ centers[-1]).ravel())
+        return np.vstack(centers)
+
+    def _update(self, batch):
+        """One mini-batch step on self.centers / self.seen"""
+        centers, k = self.centers, self.centers.shape[0]
+        labels = np.asarray((batch @ centers.T).argmax(axis=1)).ravel()
+        members = sp.csr_matrix((np.ones(batch.shape[0]), (labels, np.arange(batch.shape[0]))), shape=(k, batch.shape[0]))
+        sums = _dense(members @ batch)
+        counts = np.bincount(labels, minlength=k)
+        self.seen += counts
+        # Per-center learning rate 1/seen: c <- c * (1 - n/seen) + sum(x)/seen
+        active = counts > 0
+        centers[active] *= (1 - counts[active] / self.seen[active])[:, None]
+        centers[active] += sums[active] / self.seen[active][:, None]
+        norms = np.linalg.norm(centers, axis=1)
+        norms[norms == 0] = 1
+        centers /= norms[:, None]
+
+    def fit(self, X) -> 'MiniBatchKMeans':
+        self.centers = self._init_centers(X)
+        self.seen = np.zeros(self.centers.shape[0])
+        n_rows = X.shape[0]
+        batch_size = min(self.batch_size, n_rows)
+        for _ in range(self.n_batches):
+            self._update(X[np.sort(self.rng.choice(n_rows, batch_size, replace=False))])
+        return self
+
+    def partial_fit(self, X) -> 'MiniBatchKMeans':
+        """Fold new rows into existing centers (self.centers / self.seen restored by the caller)"""
+        for start in range(0, X.shape[0], self.batch_size):
+            self._update(X[start:start + self.batch_size])
+        return self
+
+    def predict(self, X):
+        """(labels, cosine similarity to the assigned center)"""
+        similarity = np.asarray(X @ self.centers.T)
+        labels = similarity.argmax(axis=1)
+        return labels, similarity[np.arange(X.shape[0]), labels]
+
+
+def _nonempty_rows(X) -> np.ndarray:
+    if sp.issparse(X):
+        return np.diff(X.indptr) > 0
+    return np.abs(X).sum(axis=1) > 0
+
+
+def default_cluster_count(n_tweets: int, max_clusters: int = 20) -> int:
+    return int(min(max_clusters, max(2, round(np.sqrt(n_tweets / 5)))))
+
+
+def cluster_texts(texts: Sequence[str], n_clusters: Optional[int] = None, min_size: int = 3,
+                  n_terms: int = 8, n_representatives: int = 5, seed: int = 42,
+                  vectors: Optional[np.ndarray] = None) -> List[TweetCluster]:
+    """
+    Cluster every text (on TF-IDF, or on `vectors` - one L2-normalized embedding
+    per text - when given); clusters smaller than min_size are dropped. Largest first.
+    """
+    if len(texts) < max(min_size, 2):
+        return []
+    tfidf = TfidfIndex(min_df=2 if len(texts) < 1000 else 3)
+    X = tfidf.fit_transform(texts)
+    if X.shape[1] == 0:
+        return []
+
+    features = X if vectors is None else vectors
+    n_clusters = min(n_clusters or default_cluster_count(len(texts)), len(texts))
+    model = MiniBatchKMeans(n_clusters, seed=seed).fit(features)
+    labels, similarity = model.predict(features)
+    empty = ~_nonempty_rows(features)
+
+    clusters = []
+    for label in range(model.centers.shape[0]):
+        rows = np.flatnonzero((labels == label) & ~empty)
+        if len(rows) < min_size:
+            continue
+        order = rows[np.argsort(-similarity[rows], kind='stable')]
+        weights = model.centers[label] if vectors is None else np.asarray(X[rows].mean(axis=0)).ravel()
+        top = np.argsort(-weights)[:n_terms]
+        clusters.append(TweetCluster(
+            cluster_id=label,
+            size=len(rows),
+            top_terms=[tfidf.terms[i] for i in top if weights[i] > 0],
+            rows=rows,
+            representative_rows=order[:n_representatives],
+            cohesion=float(similarity[rows].mean())
+        ))
+    clusters.sort(key=lambda c: c.size, reverse=True)
+    return clusters
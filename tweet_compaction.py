@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Legacy Export Compaction
+========================
+
+Merges every overlapping tweets/{user}_..._{timestamp}.* export of an account
+into one canonical dataset: tweets/canonical/{user}.parquet.
+
+- Exports are read in parallel (one process per file; Excel parsing is CPU-bound)
+- The two column conventions are normalized (Tweet Text/text, Tweet URL/url, ...)
+- Rows are deduped by status id, keeping the most recently scraped metrics
+- Output is sorted by timestamp and typed like the columnar tweet store
+
+The canonical file is registered in the tweet catalog, which then hands it to
+analysis in preference to any single export - until a newer export is
+registered; rerun the compaction to fold it in.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from tweet_catalog import get_catalog, DEFAULT_TWEETS_DIR
+from tweet_store import TWEET_STORE_COLUMNS, normalize_tweet_table, tweets_to_frame, write_tweet_store
+from tweet_readers import iter_tweets
+
+CANONICAL_DIR = os.path.join(DEFAULT_TWEETS_DIR, 'canonical')
+
+# Read one file per scrape run, preferring the typed store
+_READ_PREFERENCE = ('parquet', 'jsonl', 'csv', 'xlsx', 'txt')
+
+def normalize_export(df: pd.DataFrame, username: str, scraped_at: datetime) -> pd.DataFrame:
+    """Map either column convention onto the typed tweet store schema (+ scraped_at)"""
+    out = normalize_tweet_table(df, username)
+    out['username'] = username
+    scraped = df.get('Scraped At', df.get('scraped_at'))
+    if scraped is not None:
+        out['scraped_at'] = pd.to_datetime(scraped, errors='coerce').fillna(pd.Timestamp(scraped_at))
+    else:
+        out['scraped_at'] = pd.Timestamp(scraped_at)
+    return out[out['id'] > 0]
+
+
+def read_export(path: str, fmt: str, username: str) -> pd.DataFrame:
+    """Read and normalize a single export file (runs in a worker process)"""
+    scraped_at = datetime.fromtimestamp(os.path.getmtime(path))
+    if fmt == 'parquet':
+        df = pd.read_parquet(path)
+    elif fmt in ('jsonl', 'txt'):
+        df = tweets_to_frame(list(iter_tweets(path)), username)
+    elif fmt == 'csv':
+        df = pd.read_csv(path)
+    elif fmt == 'xlsx':
+        df = pd.read_excel(path)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return normalize_export(df, username, scraped_at)
+
+
+def _select_exports(entries: List[Dict]) -> List[Dict]:
+    """One catalog entry per scrape run, in the most efficient readable format"""
+    runs: Dict[str, Dict] = {}
+    for entry in entries:
+        if entry.get('canonical') or entry['format'] not in _READ_PREFERENCE:
+            continue
+        base = os.path.splitext(entry['path'])[0]
+        current = runs.get(base)
+        if current is None or _READ_PREFERENCE.index(entry['format']) < _READ_PREFERENCE.index(current['format']):
+            runs[base] = entry
+    return list(runs.values())
+
+
+def compact_account(username: str, max_workers: Optional[int] = None) -> Optional[str]:
+    """Build tweets/canonical/{username}.parquet from every export of an account"""
+    catalog = get_catalog()
+    exports = _select_exports(catalog.entries(username))
+    if not exports:
+        print(f"⚠️ No exports found for @{username}")
+        return None
+
+    print(f"🗜️ Compacting {len(exports)} exports for @{username}...")
+    frames = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(read_export, entry['path'], entry['format'], username): entry['path']
+            for entry in exports
+        }
+        for future, path in futures.items():
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Skipping {path}: {e}")
+
+    if not frames:
+        return None
+
+    merged = pd.concat(frames, ignore_index=True)
+    total_rows = len(merged)
+    # Freshest scrape wins for metrics; dedupe by status id
+    merged = merged.sort_values('scraped_at').drop_duplicates('id', keep='last')
+    merged = merged.sort_values(['timestamp', 'id'], na_position='first').reset_index(drop=True)
+    merged['username'] = merged['username'].astype('category')
+    canonical = merged[TWEET_STORE_COLUMNS]
+
+    path = os.path.join(CANONICAL_DIR, f"{username.lstrip('@')}.parquet")
+    write_tweet_store(path, canonical)
+
+    timestamps = canonical['timestamp'].dropna()
+    catalog.register(
+        path, username, 'parquet', rows=len(canonical), canonical=True,
+        min_date=timestamps.min().strftime('%Y-%m-%d') if len(timestamps) else None,
+        max_date=timestamps.max().strftime('%Y-%m-%d') if len(timestamps) else None
+    )
+    print(f"✅ @{username}: {total_rows} rows from {len(frames)} exports -> {len(canonical)} unique tweets ({path})")
+    return path
+
+
+def compact_all(max_workers: Optional[int] = None) -> Dict[str, str]:
+    """Compact every account known to the tweet catalog"""
+    usernames = sorted({entry['username'] for entry in get_catalog().entries() if not entry.get('canonical')})
+    results = {}
+    for username in usernames:
+        path = compact_account(username, max_workers=max_workers)
+        if path:
+            results[username] = path
+    return results
+
+
+def main():
+    """Compact the given accounts (or all of them): python tweet_compaction.py [username ...]"""
+    usernames = sys.argv[1:]
+    if usernames:
+        for username in usernames:
+            compact_account(username)
+    else:
+        compact_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+SQLite Tweet Database
+=====================
+
+Embedded database that merges every scrape into one table keyed by tweet id:
+- Upserts on re-scrape (fresh metrics overwrite old ones, no duplicate rows)
+- Index on (username, timestamp) for account/date slices
+- FTS5 index over tweet text for keyword search (keywords with symbols such as
+  'c++' are checked literally on top of the index)
+
+Analysis can pass a TweetQuery instead of a file path, so keyword and date
+slices across many accounts never rescan Excel exports.
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
+
+import pandas as pd
+
+from tweet_store import TWEET_STORE_COLUMNS
+
+DEFAULT_DB_PATH = os.path.join('tweets', 'tweets.db')
+
+# Keywords with characters the FTS tokenizer ignores ('c++', '#ai', '$200k') need a literal check
+_SYMBOL_RE = re.compile(r'[^\w\s]|_')
+_WORD_RE = re.compile(r'[^\W_]')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL COLLATE NOCASE,
+    timestamp INTEGER,
+    text TEXT NOT NULL DEFAULT '',
+    likes INTEGER NOT NULL DEFAULT 0,
+    retweets INTEGER NOT NULL DEFAULT 0,
+    url TEXT NOT NULL DEFAULT '',
+    matched_keywords TEXT NOT NULL DEFAULT '',
+    scraped_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_username_timestamp ON tweets (username, timestamp);
+CREATE INDEX IF NOT EXISTS idx_tweets_timestamp ON tweets (timestamp);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(
+    text, content='tweets', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS tweets_ai AFTER INSERT ON tweets BEGIN
+    INSERT INTO tweets_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_ad AFTER DELETE ON tweets BEGIN
+    INSERT INTO tweets_fts (tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_au AFTER UPDATE OF text ON tweets BEGIN
+    INSERT INTO tweets_fts (tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO tweets_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO tweets (id, username, timestamp, text, likes, retweets, url, matched_keywords, scraped_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    likes = excluded.likes,
+    retweets = excluded.retweets,
+    text = excluded.text,
+    timestamp = COALESCE(excluded.timestamp, tweets.timestamp),
+    matched_keywords = CASE WHEN excluded.matched_keywords != '' THEN excluded.matched_keywords ELSE tweets.matched_keywords END,
+    scraped_at = excluded.scraped_at
+"""
+
+
+@dataclass
+class TweetQuery:
+    """A slice of the tweet database: accounts, keywords (FTS, any match) and date range"""
+    usernames: Optional[List[str]] = None
+    keywords: Optional[List[str]] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    limit: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TweetQuery':
+        """Build a query from a JSON request body; raises ValueError on malformed fields"""
+        if not isinstance(data, dict):
+            raise ValueError("Query must be a JSON object")
+
+        def parse_date(field_name):
+            value = data.get(field_name)
+            if not value:
+                return None
+            try:
+                return datetime.strptime(str(value), '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"Invalid '{field_name}' date {value!r}. Please use YYYY-MM-DD")
+
+        def parse_list(field_name):
+            value = data.get(field_name)
+            if isinstance(value, str):
+                value = value.split(',')
+            if value is None:
+                return None
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ValueError(f"'{field_name}' must be a list of strings or a comma-separated string")
+            return [item.strip() for item in value if item.strip()] or None
+
+        limit = data.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid 'limit' {limit!r}: expected a positive integer")
+            if limit <= 0:
+                raise ValueError(f"Invalid 'limit' {limit}: expected a positive integer")
+
+        usernames = parse_list('usernames') or parse_list('username')
+        return cls(
+            usernames=usernames,
+            keywords=parse_list('keywords'),
+            since=parse_date('since'),
+            until=parse_date('until'),
+            limit=limit
+        )
+
+
+def _to_epoch_ms(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def _fts_phrase(keyword: str) -> str:
+    """Quote a keyword as an FTS5 phrase ('no-code' matches the token sequence 'no code')"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def _keyword_condition(keyword: str):
+    """
+    SQL condition (and params) for one keyword. The unicode61 tokenizer drops
+    symbols, so 'c++' is the token 'c' to FTS5: keywords with symbols are
+    narrowed by the FTS index and then checked literally with LIKE
+    (case-insensitive for ASCII), and symbol-only keywords use LIKE alone.
+    """
+    fts = "t.id IN (SELECT rowid FROM tweets_fts WHERE tweets_fts MATCH ?)"
+    if not _SYMBOL_RE.search(keyword):
+        return fts, [_fts_phrase(keyword)]
+    like = "t.text LIKE ? ESCAPE '\\'"
+    pattern = '%' + re.sub(r'([\\%_])', r'\\\1', keyword) + '%'
+    if not _WORD_RE.search(keyword):
+        return like, [pattern]
+    return f"({fts} AND {like})", [_fts_phrase(keyword), pattern]
+
+
+class TweetDatabase:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """Open (and create if needed) the tweet database"""
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe to use from
+        # Flask request threads and background scrape threads alike.
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert_frame(self, df: pd.DataFrame) -> int:
+        """Insert or update tweets from a tweet table; returns the number of rows written"""
+        df = df[df['id'] > 0]
+        if df.empty:
+            return 0
+
+        scraped_at = int(datetime.now(timezone.utc).timestamp() * 1000)
+        rows = [
+            (
+                int(tweet_id),
+                str(username),
+                None if pd.isna(ts) else _to_epoch_ms(ts.to_pydatetime()),
+                text,
+                int(likes),
+                int(retweets),
+                url,
+                matched or '',
+                scraped_at
+            )
+            for tweet_id, username, ts, text, likes, retweets, url, matched in zip(
+                df['id'], df['username'], df['timestamp'], df['text'],
+                df['likes'], df['retweets'], df['url'], df['matched_keywords']
+            )
+        ]
+
+        with self._connect() as conn:
+            conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def query(self, tweet_query: TweetQuery, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Return the tweets matching a query as a typed tweet table, newest first"""
+        columns = columns or TWEET_STORE_COLUMNS
+        select = ', '.join(f't.{col}' for col in columns)
+        sql = f"SELECT {select} FROM tweets t"
+        conditions, params = [], []
+
+        if tweet_query.keywords:
+            keyword_conditions = []
+            for keyword in tweet_query.keywords:
+                condition, condition_params = _keyword_condition(keyword)
+                keyword_conditions.append(condition)
+                params.extend(condition_params)
+            conditions.append("(" + " OR ".join(keyword_conditions) + ")")
+        if tweet_query.usernames:
+            conditions.append(f"t.username IN ({', '.join('?' * len(tweet_query.usernames))})")
+            params.extend(u.lstrip('@') for u in tweet_query.usernames)
+        if tweet_query.since:
+            conditions.append("t.timestamp >= ?")
+            params.append(_to_epoch_ms(tweet_query.since))
+        if tweet_query.until:
+            conditions.append("t.timestamp < ?")
+            params.append(_to_epoch_ms(tweet_query.until))
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY t.timestamp DESC"
+        if tweet_query.limit:
+            sql += " LIMIT ?"
+            params.append(int(tweet_query.limit))
+
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+
+        if 'timestamp' in df.columns:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+        if 'username' in df.columns:
+            df['username'] = df['username'].astype('category')
+        return df
+
+    def count(self) -> int:
+        """Total number of stored tweets"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
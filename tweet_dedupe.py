@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Grouping
+=======================
+
+Finds groups of similar tweets/replies ("≥ 3 similar replies") in roughly
+linear time: word 2-gram shingles -> MinHash signatures -> LSH banding.
+Only tweets sharing a band bucket are compared (signature agreement as the
+Jaccard estimate), then linked with union-find.
+"""
+
+import zlib
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from tweet_text import text_features
+
+
+def _shingles(text: str, size: int) -> List[int]:
+    # Tokens (stopwords included) come from the shared per-text analysis
+    words = text_features(text).tokens
+    if len(words) <= size:
+        return [zlib.crc32(' '.join(words).encode('utf-8'))] if words else []
+    return list({zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)})
+
+
+def minhash_signatures(texts: Sequence[str], num_perm: int = 64, shingle_size: int = 2,
+                       seed: int = 42) -> np.ndarray:
+    """(len(texts), num_perm) uint64 MinHash signatures; empty texts get all-max rows"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, num_perm, dtype='uint64') | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, num_perm, dtype='uint64')
+
+    shingles = [_shingles(text, shingle_size) for text in texts]
+    lengths = np.fromiter((len(s) for s in shingles), dtype='int64', count=len(shingles))
+    hashes = np.fromiter((h for s in shingles for h in s), dtype='uint64', count=int(lengths.sum()))
+    signatures = np.full((len(texts), num_perm), np.iinfo('uint64').max, dtype='uint64')
+    nonempty = lengths > 0
+    if not nonempty.any():
+        return signatures
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))[nonempty]
+    for i in range(num_perm):
+        # Multiply-shift universal hashing (uint64 arithmetic wraps around)
+        signatures[nonempty, i] = np.minimum.reduceat((a[i] * hashes + b[i]) >> np.uint64(32), offsets)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def near_duplicate_groups(texts: Sequence[str], threshold: float = 0.5, min_size: int = 3,
+                          num_perm: int = 64, bands: int = 16) -> List[np.ndarray]:
+    """Groups (row position arrays, largest first) of texts with estimated Jaccard >= threshold"""
+    n = len(texts)
+    if n < min_size:
+        return []
+    signatures = minhash_signatures(texts, num_perm=num_perm)
+    empty = signatures[:, 0] == np.iinfo('uint64').max
+    rows_per_band = num_perm // bands
+    mixers = np.random.default_rng(7).integers(1, 2 ** 63, rows_per_band, dtype='uint64') | np.uint64(1)
+    union_find = _UnionFind(n)
+
+    for band in range(bands):
+        chunk = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        # Band key: wrap-around multiply-add of the band's values (collisions are verified below)
+        keys = (chunk * mixers).sum(axis=1, dtype='uint64')
+        frame = pd.DataFrame({'key': keys[~empty], 'row': np.flatnonzero(~empty)})
+        leaders = frame.groupby('key')['row'].transform('min').to_numpy()
+        rows = frame['row'].to_numpy()
+        candidates = rows != leaders
+        rows, leaders = rows[candidates], leaders[candidates]
+        if not len(rows):
+            continue
+        # Verify bucket collisions against the full signature before linking
+        agreement = (signatures[rows] == signatures[leaders]).mean(axis=1)
+        for row, leader in zip(rows[agreement >= threshold], leaders[agreement >= threshold]):
+            union_find.union(int(row), int(leader))
+
+    roots = np.fromiter((union_find.find(i) for i in range(n)), dtype='int64', count=n)
+    order = np.argsort(roots, kind='stable')
+    _, starts, counts = np.unique(roots[order], return_index=True, return_counts=True)
+    groups = [order[start:start + count] for start, count in zip(starts, counts) if count >= min_size]
+    groups.sort(key=len, reverse=True)
+    return groups
+
+
+def group_sizes(texts: Sequence[str], **kwargs) -> np.ndarray:
+    """Per-text size of its near-duplicate group (1 for texts without one)"""
+    sizes = np.ones(len(texts), dtype='int64')
+    for rows in near_duplicate_groups(texts, min_size=2, **kwargs):
+        sizes[rows] = len(rows)
+    return sizes
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Tweet Embedding Store
+=====================
+
+Embeddings are computed once per tweet and kept in a memory-mapped float32
+matrix: tweets/embeddings/{embedder}.npy (rows) + {embedder}.ids.npy (the
+status id of each row). Re-runs only embed tweets whose id isn't stored yet.
+
+Consumers (semantic clustering, most_similar) read the matrix through
+np.load(..., mmap_mode='r'), so worker processes share the OS page cache
+instead of each holding a copy; rows are read as contiguous slices, never
+gathered by fancy indexing (which copies). Appends from several processes
+(scraper, dashboard) are serialized with a file lock.
+
+Embedders are pluggable: any object with `name`, `dim` and
+`embed(texts) -> float32 array`. The default HashingEmbedder works offline.
+"""
+
+import os
+import threading
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from file_lock import file_lock
+from tweet_text import tokenize
+
+DEFAULT_EMBEDDINGS_DIR = os.path.join('tweets', 'embeddings')
+
+
+class HashingEmbedder:
+    """Signed feature hashing of unigrams + bigrams (sublinear tf, L2-normalized)"""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f'hashing-{dim}'
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype='float32')
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            terms = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            counts = {}
+            for term in terms:
+                h = zlib.crc32(term.encode('utf-8'))
+                key = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+                counts[key] = counts.get(key, 0) + 1
+            for (bucket, sign), count in counts.items():
+                vectors[i, bucket] += sign * (1 + np.log(count))
+        norms = np.linalg.norm(vectors, axis=1)
+        norms[norms == 0] = 1
+        return vectors / norms[:, None]
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings API (needs OPENAI_API_KEY)"""
+
+    def __init__(self, model: str = 'text-embedding-3-small', dim: int = 1536, api_key: Optional[str] = None,
+                 batch_size: int = 512):
+        self.model = model
+        self.dim = dim
+        self.name = f'openai-{model}'
+        self.batch_size = batch_size
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        from openai import OpenAI
+        client = OpenAI(api_key=self.api_key)
+        vectors = np.zeros((len(texts), self.dim), dtype='float32')
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text or ' ' for text in texts[start:start + self.batch_size]]
+            response = client.embeddings.create(model=self.model, input=batch)
+            for offset, item in enumerate(response.data):
+                vectors[start + offset] = item.embedding
+        return vectors
+
+
+def get_embedder(name: Optional[str] = None):
+    """Embedder by name ('hashing' or 'openai'); TWEET_EMBEDDER env var by default"""
+    name = (name or os.getenv('TWEET_EMBEDDER', 'hashing')).lower()
+    if name == 'openai':
+        return OpenAIEmbedder()
+    if name.startswith('hashing'):
+        dim = name.partition('-')[2]
+        return HashingEmbedder(int(dim)) if dim else HashingEmbedder()
+    raise ValueError(f"Unknown embedder '{name}'. Available: hashing, hashing-<dim>, openai")
+
+
+def load_embeddings(matrix_path: str) -> np.ndarray:
+    """Read-only mmap of a stored embedding matrix (valid rows only)"""
+    ids = np.load(matrix_path[:-len('.npy')] + '.ids.npy')
+    return np.load(matrix_path, mmap_mode='r')[:len(ids)]
+
+
+class EmbeddingStore:
+    def __init__(self, embedder=None, embeddings_dir: str = DEFAULT_EMBEDDINGS_DIR):
+        """Open (or create on first write) the store for an embedder"""
+        self.embedder = embedder or get_embedder()
+        self.embeddings_dir = embeddings_dir
+        self.matrix_path = os.path.join(embeddings_dir, f'{self.embedder.name}.npy')
+        self.ids_path = os.path.join(embeddings_dir, f'{self.embedder.name}.ids.npy')
+        self._lock = threading.Lock()
+        self._ids = np.load(self.ids_path) if os.path.exists(self.ids_path) else np.empty(0, dtype='int64')
+        self._index = pd.Index(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only mmap of all stored vectors (row i belongs to ids[i])"""
+        if not len(self._ids):
+            return np.empty((0, self.embedder.dim), dtype='float32')
+        return np.load(self.matrix_path, mmap_mode='r')[:len(self._ids)]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids
+
+    def _capacity(self) -> int:
+        if not os.path.exists(self.matrix_path):
+            return 0
+        return np.load(self.matrix_path, mmap_mode='r').shape[0]
+
+    def _reload_ids(self):
+        if os.path.exists(self.ids_path):
+            self._ids = np.load(self.ids_path)
+            self._index = pd.Index(self._ids)
+
+    def _append(self, ids: np.ndarray, vectors: np.ndarray):
+        """Write new rows under the store's file lock (other processes may have appended since we loaded)"""
+        with file_lock(self.ids_path + '.lock'):
+            self._reload_ids()
+            new = self._index.get_indexer(ids) == -1
+            if new.any():
+                self._append_rows(ids[new], vectors[new])
+
+    def _append_rows(self, ids: np.ndarray, vectors: np.ndarray):
+        """Write new rows, growing the matrix file by doubling when full"""
+        count = len(self._ids)
+        needed = count + len(ids)
+        capacity = self._capacity()
+        if needed > capacity:
+            os.makedirs(self.embeddings_dir, exist_ok=True)
+            new_capacity = max(needed, 2 * capacity, 1024)
+            tmp_path = self.matrix_path + '.tmp'
+            grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype='float32',
+                                              shape=(new_capacity, self.embedder.dim))
+            if count:
+                grown[:count] = np.load(self.matrix_path, mmap_mode='r')[:count]
+            grown.flush()
+            del grown
+            os.replace(tmp_path, self.matrix_path)
+
+        matrix = np.load(self.matrix_path, mmap_mode='r+')
+        matrix[count:needed] = vectors
+        matrix.flush()
+        del matrix
+
+        # The id list is the commit point: rows past len(ids) are ignored by readers
+        self._ids = np.concatenate([self._ids, ids.astype('int64')])
+        tmp_path = self.ids_path + '.tmp.npy'
+        np.save(tmp_path, self._ids)
+        os.replace(tmp_path, self.ids_path)
+        self._index = pd.Index(self._ids)
+
+    def rows_for(self, ids: Sequence[int], texts: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Matrix rows for the given status ids, embedding unseen tweets first
+        (texts required for those). Tweets without an id (0) can't be stored: -1.
+        """
+        ids = np.asarray(ids, dtype='int64')
+        with self._lock:
+            rows = self._index.get_indexer(ids)
+            missing = np.flatnonzero((rows == -1) & (ids > 0))
+            if len(missing) and texts is not None:
+                # First occurrence of each new id only
+                _, first = np.unique(ids[missing], return_index=True)
+                missing = missing[np.sort(first)]
+                vectors = self.embedder.embed([texts[i] for i in missing])
+                print(f"🧬 Embedding {len(missing)} new tweets ({self.embedder.name})")
+                self._append(ids[missing], vectors)
+                rows = self._index.get_indexer(ids)
+        return rows
+
+    def _read_rows(self, rows: np.ndarray, out: np.ndarray, positions: np.ndarray):
+        """out[positions[i]] = matrix[rows[i]], copied run by run from contiguous mmap slices"""
+        matrix = self.matrix
+        order = np.argsort(rows, kind='stable')
+        rows, positions = rows[order], positions[order]
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        for run_rows, run_positions in zip(np.split(rows, breaks), np.split(positions, breaks)):
+            out[run_positions] = matrix[run_rows[0]:run_rows[-1] + 1]
+
+    def vectors_for(self, ids: Sequence[int], texts: Sequence[str]) -> np.ndarray:
+        """Vectors for a batch of tweets; tweets without an id are embedded on the fly"""
+        rows = self.rows_for(ids, texts)
+        vectors = np.empty((len(rows), self.embedder.dim), dtype='float32')
+        stored = rows >= 0
+        if stored.any():
+            self._read_rows(rows[stored], vectors, np.flatnonzero(stored))
+        if (~stored).any():
+            vectors[~stored] = self.embedder.embed([texts[i] for i in np.flatnonzero(~stored)])
+        return vectors
+
+    def most_similar(self, query: str, k: int = 10, chunk_rows: int = 65536) -> List[Tuple[int, float]]:
+        """Top-k stored tweets by cosine similarity to a query text: [(status id, score)]"""
+        if not len(self._ids):
+            return []
+        vector = self.embedder.embed([query])[0]
+        matrix = self.matrix
+        best_rows, best_scores = np.empty(0, dtype='int64'), np.empty(0, dtype='float32')
+        for start in range(0, len(matrix), chunk_rows):
+            scores = matrix[start:start + chunk_rows] @ vector
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+        order = np.argsort(-best_scores)[:k]
+        return [(int(self._ids[best_rows[i]]), float(best_scores[i])) for i in order]
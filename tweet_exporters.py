@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Tweet Export Formats
+====================
+
+Registry of scrape export formats (txt, xlsx, csv, jsonl, parquet).
+
+Selected exports are written concurrently on a shared thread pool. The
+caller only waits for the primary durable format; the rest (notably the
+slow Excel writer) finish in the background, so the scrape coroutine and
+the Socket.IO loop are never blocked on them.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from tweet_record import Tweet, match_keywords
+from tweet_store import tweets_to_frame, write_tweet_store
+
+PRIMARY_FORMAT = 'parquet'
+DEFAULT_FORMATS = ['parquet', 'txt', 'xlsx']
+
+# Export writers share one small pool; Excel writes are CPU-bound in openpyxl
+# but release the GIL often enough for the other formats to make progress.
+_export_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='tweet-export')
+
+
+@dataclass
+class ExportJob:
+    """Everything an exporter needs to write one scrape"""
+    username: str
+    tweets: List[Tweet]
+    keywords: Optional[List[str]]
+    start_date: Optional[datetime]
+    base_path: str
+    table: pd.DataFrame
+    scraped_at: datetime = field(default_factory=datetime.now)
+
+
+@dataclass
+class ExportResult:
+    """Paths of a scrape export; background formats are still pending"""
+    primary_format: str
+    paths: Dict[str, str]
+    pending: Dict[str, Future]
+    table: pd.DataFrame
+
+    @property
+    def primary_path(self) -> str:
+        return self.paths[self.primary_format]
+
+
+# format name -> (file extension, writer)
+EXPORTERS: Dict[str, tuple] = {}
+
+
+def register_exporter(name: str, extension: str):
+    """Decorator registering a writer `fn(job, path)` for an export format"""
+    def decorator(fn: Callable[[ExportJob, str], None]):
+        EXPORTERS[name] = (extension, fn)
+        return fn
+    return decorator
+
+
+def parse_formats(formats) -> List[str]:
+    """Normalize a format selection (list or comma-separated string); raises ValueError on unknown formats"""
+    if not formats:
+        return list(DEFAULT_FORMATS)
+    if isinstance(formats, str):
+        formats = formats.split(',')
+    selected = []
+    for fmt in formats:
+        fmt = fmt.strip().lower().lstrip('.')
+        if not fmt:
+            continue
+        if fmt not in EXPORTERS:
+            raise ValueError(f"Unknown export format '{fmt}'. Available: {', '.join(sorted(EXPORTERS))}")
+        if fmt not in selected:
+            selected.append(fmt)
+    return selected or list(DEFAULT_FORMATS)
+
+
+@register_exporter('parquet', '.parquet')
+def export_parquet(job: ExportJob, path: str):
+    write_tweet_store(path, job.table)
+
+
+@register_exporter('txt', '.txt')
+def export_txt(job: ExportJob, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"Tweets from @{job.username}\n")
+        if job.keywords:
+            f.write(f"Filtered by keywords: {', '.join(job.keywords)}\n")
+        if job.start_date:
+            f.write(f"From date: {job.start_date.strftime('%Y-%m-%d')}\n")
+        f.write(f"Scraped at: {job.scraped_at.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Total tweets found: {len(job.tweets)}\n")
+        f.write("=" * 80 + "\n\n")
+
+        for i, tweet in enumerate(job.tweets, 1):
+            f.write(f"Tweet #{i}:\n")
+            f.write(f"Date: {tweet.date or 'N/A'}\n")
+            f.write(f"Text: {tweet.text or 'N/A'}\n")
+            f.write(f"Likes: {tweet.likes}\n")
+            f.write(f"Retweets: {tweet.retweets}\n")
+            f.write(f"URL: {tweet.url or 'N/A'}\n")
+            if job.keywords:
+                f.write(f"Matched Keywords: {', '.join(tweet.matched_keywords or ())}\n")
+            f.write("-" * 80 + "\n\n")
+
+
+@register_exporter('xlsx', '.xlsx')
+def export_xlsx(job: ExportJob, path: str):
+    from openpyxl.styles import Font
+
+    excel_data = []
+    for i, tweet in enumerate(job.tweets, 1):
+        excel_data.append({
+            'Tweet #': i,
+            'Username': f"@{job.username}",
+            'Date': tweet.date or 'N/A',
+            'Tweet Text': tweet.text or 'N/A',
+            'Likes': tweet.likes,
+            'Retweets': tweet.retweets,
+            'Tweet URL': tweet.url or 'N/A',
+            'Matched Keywords': ', '.join(tweet.matched_keywords) if tweet.matched_keywords else 'N/A',
+            'Filter Keywords': ', '.join(job.keywords) if job.keywords else 'None',
+            'Start Date Filter': job.start_date.strftime('%Y-%m-%d') if job.start_date else 'None',
+            'Scraped At': job.scraped_at.strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    df = pd.DataFrame(excel_data)
+
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        sheet_name = f'{job.username}_tweets'
+        if job.keywords or job.start_date:
+            sheet_name = f'{job.username}_filtered'
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        worksheet = writer.sheets[sheet_name]
+
+        # Auto-adjust column widths (with some padding, capped at 50 characters)
+        for column in worksheet.columns:
+            max_length = max((len(str(cell.value)) for cell in column if cell.value is not None), default=0)
+            worksheet.column_dimensions[column[0].column_letter].width = min(max_length + 2, 50)
+
+        # Make headers bold
+        for cell in worksheet[1]:
+            cell.font = Font(bold=True)
+
+
+@register_exporter('csv', '.csv')
+def export_csv(job: ExportJob, path: str):
+    job.table.to_csv(path, index=False, date_format='%Y-%m-%dT%H:%M:%SZ')
+
+
+@register_exporter('jsonl', '.jsonl')
+def export_jsonl(job: ExportJob, path: str):
+    job.table.to_json(path, orient='records', lines=True, date_format='iso', force_ascii=False)
+
+
+def run_in_background(fn: Callable, *args) -> Future:
+    """Run follow-up work for a scrape (database, trends, archive) on the export pool"""
+    return _export_executor.submit(fn, *args)
+
+
+def export_tweets(username: str, tweets: List[Tweet], keywords: Optional[List[str]] = None,
+                  start_date: Optional[datetime] = None, base_path: Optional[str] = None,
+                  formats=None, primary_format: str = PRIMARY_FORMAT,
+                  on_done: Optional[Callable[[str, str, Optional[Exception]], None]] = None) -> ExportResult:
+    """
+    Write the selected export formats concurrently.
+
+    Blocks only until the primary format is on disk (raising if it fails);
+    the other formats are returned as pending futures. `on_done(format, path, error)`
+    is called from the worker thread as each format finishes.
+    """
+    selected = parse_formats(formats)
+    if primary_format not in selected:
+        selected.insert(0, primary_format)
+
+    if base_path is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base_path = os.path.join('tweets', f'{username}_{timestamp}')
+    directory = os.path.dirname(base_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    match_keywords(tweets, keywords)
+    job = ExportJob(
+        username=username,
+        tweets=tweets,
+        keywords=keywords,
+        start_date=start_date,
+        base_path=base_path,
+        table=tweets_to_frame(tweets, username)
+    )
+
+    def run(fmt: str, path: str) -> str:
+        try:
+            EXPORTERS[fmt][1](job, path)
+        except Exception as e:
+            if on_done:
+                on_done(fmt, path, e)
+            raise
+        if on_done:
+            on_done(fmt, path, None)
+        return path
+
+    paths = {fmt: base_path + EXPORTERS[fmt][0] for fmt in selected}
+    futures = {fmt: _export_executor.submit(run, fmt, path) for fmt, path in paths.items()}
+
+    futures.pop(primary_format).result()
+    return ExportResult(primary_format=primary_format, paths=paths, pending=futures, table=job.table)
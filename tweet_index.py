@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Inverted Keyword Index
+======================
+
+token -> sorted postings over one tweet table, so repeated keyword slices of
+the same corpus are postings merges instead of full text scans:
+
+- tokens are lowercase \\w+ runs of the full NFKC-normalized text (URLs and
+  mentions included)
+- a keyword matches the same tweets as KeywordMatcher / match_keywords
+  (substring of the normalized, lowercased text): each \\w+ part of the keyword selects every
+  vocabulary token containing it, a keyword's parts are intersected, and only
+  keywords with other characters ('no-code', 'ai agents') verify the
+  candidate texts
+- OR / AND over keywords are unions / intersections of sorted row arrays
+
+Postings are row positions in the indexed table (ascending); `ids` maps rows
+to status ids. keyword_index_for() builds the index for a tweet file once and
+persists it next to the store ({store}.index.npz), rebuilt when the file changes.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from tweet_matching import normalize_keyword
+from tweet_text import normalize_text
+
+_WORD_RE = re.compile(r'\w+')
+_BUILD_CHUNK_ROWS = 100000
+# Bumped when tokenization changes, so persisted indexes built the old way are rebuilt
+_INDEX_FORMAT = 2
+
+
+def _normalized_lower(text) -> str:
+    return normalize_text(text).lower() if isinstance(text, str) else ''
+
+
+def _sorted_unique(values: np.ndarray) -> np.ndarray:
+    """np.unique by sort (faster than np.unique's hashing for large int arrays)"""
+    values = np.sort(values)
+    if len(values) < 2:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+class KeywordIndex:
+    def __init__(self, vocabulary: List[str], offsets: np.ndarray, postings: np.ndarray, ids: np.ndarray,
+                 texts: Optional[Callable[[], Sequence[str]]] = None, cache_size: int = 256):
+        """vocabulary sorted; postings[offsets[t]:offsets[t + 1]] are the rows containing token t"""
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.ids = ids
+        self.n_rows = len(ids)
+        self.source_key = None
+        self._texts_loader = texts
+        self._texts = None
+        # All tokens '\n'-joined: substring search over the vocabulary is one str.find loop
+        self._joined = '\n'.join(vocabulary) + '\n'
+        self._starts = np.concatenate(([0], np.cumsum([len(t) + 1 for t in vocabulary]))).astype('int64')
+        self._part_rows: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, texts: Sequence[str], ids: Optional[Sequence[int]] = None) -> 'KeywordIndex':
+        """Index a text column (row i of texts = row i of the table)"""
+        n_rows = len(texts)
+        global_codes: Dict[str, int] = {}
+        codes, rows = [], []
+        for start in range(0, n_rows, _BUILD_CHUNK_ROWS):
+            chunk = pd.Series(texts[start:start + _BUILD_CHUNK_ROWS], dtype=object)
+            tokens = chunk.map(_normalized_lower).str.findall(_WORD_RE)
+            lengths = tokens.str.len().to_numpy()
+            flat = [token for row_tokens in tokens for token in row_tokens]
+            if not flat:
+                continue
+            local_codes, local_vocab = pd.factorize(np.array(flat, dtype=object))
+            to_global = np.array([global_codes.setdefault(t, len(global_codes)) for t in local_vocab], dtype='int64')
+            codes.append(to_global[local_codes])
+            rows.append(np.repeat(np.arange(start, start + len(chunk), dtype='int64'), lengths))
+
+        vocabulary = sorted(global_codes, key=global_codes.get)
+        order = np.argsort(np.array(vocabulary, dtype=object), kind='stable') if vocabulary else np.empty(0, 'int64')
+        rank = np.empty(len(vocabulary), dtype='int64')
+        rank[order] = np.arange(len(vocabulary))
+        if codes:
+            keys = _sorted_unique(rank[np.concatenate(codes)] * max(n_rows, 1) + np.concatenate(rows))
+        else:
+            keys = np.empty(0, dtype='int64')
+        tokens_of = keys // max(n_rows, 1)
+        offsets = np.searchsorted(tokens_of, np.arange(len(vocabulary) + 1)).astype('int64')
+        ids = np.asarray(ids, dtype='int64') if ids is not None else np.zeros(n_rows, dtype='int64')
+        index = cls([vocabulary[i] for i in order], offsets, (keys % max(n_rows, 1)).astype('int32'), ids)
+        index._texts = np.asarray(texts, dtype=object)
+        return index
+
+    def _tokens_containing(self, part: str) -> np.ndarray:
+        joined, starts = self._joined, self._starts
+        found = []
+        position = joined.find(part)
+        while position != -1:
+            token = int(np.searchsorted(starts, position, side='right')) - 1
+            found.append(token)
+            position = joined.find(part, int(starts[token + 1]))
+        return np.array(found, dtype='int64')
+
+    def part_rows(self, part: str) -> np.ndarray:
+        """Rows with a token containing `part` (a lowercase \\w+ run); memoized with verified keywords"""
+        with self._lock:
+            cached = self._part_rows.get(part)
+            if cached is not None:
+                self._part_rows.move_to_end(part)
+                return cached
+        tokens = self._tokens_containing(part)
+        if len(tokens) == 1:
+            rows = self.postings[self.offsets[tokens[0]]:self.offsets[tokens[0] + 1]]
+        elif len(tokens):
+            rows = _sorted_unique(np.concatenate([self.postings[self.offsets[t]:self.offsets[t + 1]] for t in tokens]))
+        else:
+            rows = np.empty(0, dtype='int32')
+        self._remember(part, rows)
+        return rows
+
+    def _remember(self, key: str, rows: np.ndarray):
+        with self._lock:
+            self._part_rows[key] = rows
+            while len(self._part_rows) > self._cache_size:
+                self._part_rows.popitem(last=False)
+
+    def _texts_array(self) -> Sequence[str]:
+        if self._texts is None:
+            if self._texts_loader is None:
+                raise ValueError("Keyword needs text verification but the index has no texts attached")
+            self._texts = self._texts_loader()
+        return np.asarray(self._texts, dtype=object)
+
+    def keyword_rows(self, keyword: str) -> np.ndarray:
+        """Rows containing `keyword` (case-insensitive substring), ascending"""
+        keyword = normalize_keyword(keyword)
+        parts = _WORD_RE.findall(keyword)
+        if parts == [keyword]:
+            return self.part_rows(keyword)
+        if not keyword:
+            return np.empty(0, dtype='int32')
+        # Punctuation or spaces: intersect the word parts, then verify candidates (memoized by keyword)
+        with self._lock:
+            cached = self._part_rows.get(keyword)
+        if cached is not None:
+            return cached
+        if parts:
+            postings = sorted((self.part_rows(part) for part in set(parts)), key=len)
+            rows = postings[0]
+            for other in postings[1:]:
+                rows = np.intersect1d(rows, other, assume_unique=True)
+        else:
+            rows = np.arange(self.n_rows)
+        candidates = pd.Series(self._texts_array()[rows], dtype=object)
+        found = candidates.map(_normalized_lower).str.contains(keyword, regex=False, na=False).to_numpy()
+        rows = np.asarray(rows[found], dtype='int32')
+        self._remember(keyword, rows)
+        return rows
+
+    def query(self, keywords: Sequence[str], mode: str = 'any') -> np.ndarray:
+        """Rows matching any (OR) or all (AND) of the keywords, ascending"""
+        if mode not in ('any', 'all'):
+            raise ValueError(f"Unknown query mode '{mode}'. Available: any, all")
+        postings = [self.keyword_rows(keyword) for keyword in keywords if keyword.strip()]
+        if not postings:
+            return np.empty(0, dtype='int32')
+        if mode == 'all':
+            postings.sort(key=len)
+            rows = postings[0]
+            for other in postings[1:]:
+                rows = np.intersect1d(rows, other, assume_unique=True)
+            return rows
+        return _sorted_unique(np.concatenate(postings)) if len(postings) > 1 else postings[0]
+
+    def mask(self, keywords: Sequence[str], mode: str = 'any') -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.query(keywords, mode)] = True
+        return mask
+
+    def save(self, path: str, source_key=None):
+        tmp_path = path[:-len('.npz')] + '.tmp.npz'
+        vocabulary = np.frombuffer(self._joined.encode('utf-8'), dtype='uint8')
+        np.savez(tmp_path, vocabulary=vocabulary, offsets=self.offsets, postings=self.postings, ids=self.ids,
+                 source_key=np.array(repr(source_key)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source_key=None, texts: Optional[Callable[[], Sequence[str]]] = None
+             ) -> Optional['KeywordIndex']:
+        """Stored index, or None if missing or built from a different version of the source"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if str(data['source_key']) != repr(source_key):
+                return None
+            vocabulary = data['vocabulary'].tobytes().decode('utf-8').split('\n')[:-1]
+            return cls(vocabulary, data['offsets'], data['postings'], data['ids'], texts=texts)
+
+
+_indexes: 'OrderedDict[str, KeywordIndex]' = OrderedDict()
+_indexes_lock = threading.Lock()
+_MAX_INDEXES = int(os.getenv('TWEET_INDEX_CACHE_ENTRIES', 8))
+
+
+def keyword_index_for(tweet_file_path: str) -> KeywordIndex:
+    """
+    Keyword index for a tweet file (rows aligned with load_tweet_table), loaded
+    from {store}.index.npz or built and persisted on first use; memoized.
+    """
+    from tweet_store import STORE_EXTENSION, load_tweet_table, store_path_for
+
+    if not tweet_file_path.endswith(STORE_EXTENSION) and os.path.exists(store_path_for(tweet_file_path)):
+        tweet_file_path = store_path_for(tweet_file_path)
+    stat = os.stat(tweet_file_path)
+    source_key = (os.path.basename(tweet_file_path), stat.st_mtime_ns, stat.st_size, _INDEX_FORMAT)
+    memo_key = os.path.abspath(tweet_file_path)
+
+    with _indexes_lock:
+        index = _indexes.get(memo_key)
+        if index is not None and index.source_key == source_key:
+            _indexes.move_to_end(memo_key)
+            return index
+
+    def texts():
+        return load_tweet_table(tweet_file_path, columns=['text'])['text'].to_numpy()
+
+    index_path = os.path.splitext(tweet_file_path)[0] + '.index.npz'
+    index = KeywordIndex.load(index_path, source_key, texts=texts)
+    if index is None:
+        table = load_tweet_table(tweet_file_path, columns=['id', 'text'])
+        index = KeywordIndex.build(table['text'].to_numpy(), table['id'].to_numpy())
+        print(f"🗂️ Indexed {index.n_rows} tweets ({len(index.vocabulary)} tokens) for keyword queries")
+        try:
+            index.save(index_path, source_key)
+        except OSError as e:
+            print(f"⚠️ Could not persist keyword index: {e}")
+    index.source_key = source_key
+
+    with _indexes_lock:
+        _indexes[memo_key] = index
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
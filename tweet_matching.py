@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Keyword Matching
+================
+
+KeywordMatcher compiles a keyword list once into (keyword, bit) pairs and
+scans a tweet table in one pass, producing a uint64 bitset per tweet: bit i is
+set when keyword i occurs in the text - the same test as
+tweet_record.match_keywords (substring of the NFKC-normalized, lowercased
+text), so keywords match literally ('no-code', 'c++'), full-width and
+math-bold letters read as plain ones, and keywords may overlap ('gauntlet ai
+engineer' sets both 'gauntlet ai' and 'ai engineer'). C-level substring tests
+beat a combined regex, which has to stop at every position where any keyword
+could start.
+
+Bitsets are cached by status id (up to KEYWORD_CACHE_SIZE tweets, oldest
+dropped first), so repeated runs over the same corpus (file reloads, database
+queries) skip the text scan for tweets already seen.
+
+ThemeClassifier evaluates a data-driven theme table against those bitsets,
+producing a sparse tweets x themes membership matrix (ThemeMatrix). Themes are
+multi-label, and adding one costs a bitmask test, not another text scan.
+"""
+
+import os
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from tweet_text import normalize_text
+
+MAX_KEYWORDS = 64
+CACHE_SIZE = int(os.getenv('KEYWORD_CACHE_SIZE', 500_000))
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Keyword as matched against normalize_text(text).lower()"""
+    return normalize_text(keyword.strip()).lower()
+
+
+class KeywordMatcher:
+    def __init__(self, keywords: List[str], cache_size: int = CACHE_SIZE):
+        """Compile the keyword table (at most 64 keywords, one bit each)"""
+        self.keywords: List[str] = []
+        for keyword in keywords:
+            keyword = normalize_keyword(keyword)
+            if keyword and keyword not in self.keywords:
+                self.keywords.append(keyword)
+        if len(self.keywords) > MAX_KEYWORDS:
+            raise ValueError(f"KeywordMatcher supports at most {MAX_KEYWORDS} keywords, got {len(self.keywords)}")
+
+        self._keyword_bits = [(kw, 1 << i) for i, kw in enumerate(self.keywords)]
+        self._cache: Dict[int, int] = {}
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+    def _text_bits(self, text) -> int:
+        if not isinstance(text, str):
+            return 0
+        text = normalize_text(text).lower()
+        bits = 0
+        for keyword, bit in self._keyword_bits:
+            if keyword in text:
+                bits |= bit
+        return bits
+
+    def scan(self, texts: pd.Series) -> np.ndarray:
+        """Match bitsets for a text column (always scans)"""
+        return np.fromiter((self._text_bits(text) for text in texts), dtype='uint64', count=len(texts))
+
+    def match_bits(self, df: pd.DataFrame, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Match bitsets for a tweet table (or the given row positions), reusing cached bitsets by status id"""
+        texts = df['text']
+        if rows is not None:
+            texts = texts.iloc[rows]
+        if 'id' not in df.columns:
+            return self.scan(texts)
+
+        ids = df['id'].to_numpy(dtype='int64')
+        if rows is not None:
+            ids = ids[rows]
+        cache = self._cache
+        cached = [cache.get(tweet_id) for tweet_id in ids.tolist()]
+        missing = np.fromiter((bits is None for bits in cached), dtype=bool, count=len(cached))
+        result = np.fromiter((bits or 0 for bits in cached), dtype='uint64', count=len(cached))
+        if missing.any():
+            positions = np.flatnonzero(missing)
+            scanned = self.scan(texts.iloc[positions])
+            result[positions] = scanned
+            # Only real status ids are cacheable
+            for tweet_id, bits in zip(ids[positions].tolist(), scanned.tolist()):
+                if tweet_id > 0:
+                    cache[tweet_id] = bits
+            excess = len(cache) - self.cache_size
+            if excess > 0:
+                # Dicts keep insertion order: drop the oldest entries
+                for tweet_id in list(islice(cache, excess)):
+                    del cache[tweet_id]
+        self.hits += int((~missing).sum())
+        self.misses += int(missing.sum())
+        return result
+
+    def mask(self, bits: np.ndarray, keywords: Optional[List[str]] = None) -> np.ndarray:
+        """Rows whose bitset matches any of `keywords` (default: any keyword)"""
+        if keywords is None:
+            return bits != 0
+        wanted = 0
+        for keyword in keywords:
+            wanted |= 1 << self.keywords.index(normalize_keyword(keyword))
+        return (bits & np.uint64(wanted)) != 0
+
+    def info(self) -> dict:
+        return {'keywords': len(self.keywords), 'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+# A theme is a list of keywords (any matches), or a list of keyword groups that
+# must all match, e.g. [['gauntlet'], ['training', 'bootcamp', 'program']].
+ThemeSpec = Union[List[str], List[List[str]]]
+
+
+@dataclass
+class ThemeMatrix:
+    """Sparse tweets x themes membership (column-compressed: row positions per theme)"""
+    themes: List[str]
+    indptr: np.ndarray
+    indices: np.ndarray
+    n_rows: int
+
+    def rows(self, theme: str) -> np.ndarray:
+        """Row positions of the tweets in a theme"""
+        t = self.themes.index(theme)
+        return self.indices[self.indptr[t]:self.indptr[t + 1]]
+
+    def counts(self) -> Dict[str, int]:
+        return dict(zip(self.themes, np.diff(self.indptr).tolist()))
+
+    def dense(self) -> np.ndarray:
+        """Boolean n_rows x themes matrix"""
+        matrix = np.zeros((self.n_rows, len(self.themes)), dtype=bool)
+        for t in range(len(self.themes)):
+            matrix[self.indices[self.indptr[t]:self.indptr[t + 1]], t] = True
+        return matrix
+
+
+class ThemeClassifier:
+    def __init__(self, themes: Dict[str, ThemeSpec], gate: Optional[List[str]] = None,
+                 fallback: Optional[str] = None):
+        """
+        Compile a theme table. Tweets are only classified when they match `gate`
+        (if given); gated tweets matching no theme go to the `fallback` theme.
+        """
+        self.themes = {
+            name: [spec] if spec and isinstance(spec[0], str) else list(spec)
+            for name, spec in themes.items()
+        }
+        keywords = list(gate or [])
+        for groups in self.themes.values():
+            for group in groups:
+                keywords.extend(group)
+        self.matcher = KeywordMatcher(keywords)
+        self.gate = self._mask_of(gate) if gate else None
+        self.fallback = fallback
+        self._theme_masks = [[self._mask_of(group) for group in groups] for groups in self.themes.values()]
+
+    def _mask_of(self, keywords: List[str]) -> np.uint64:
+        mask = 0
+        for keyword in keywords:
+            mask |= 1 << self.matcher.keywords.index(normalize_keyword(keyword))
+        return np.uint64(mask)
+
+    def classify_bits(self, bits: np.ndarray) -> ThemeMatrix:
+        """Membership matrix from precomputed match bitsets (no text scan)"""
+        gated = (bits & self.gate) != 0 if self.gate is not None else np.ones(len(bits), dtype=bool)
+        columns = []
+        for groups in self._theme_masks:
+            member = gated.copy()
+            for mask in groups:
+                member &= (bits & mask) != 0
+            columns.append(np.flatnonzero(member))
+        names = list(self.themes)
+        if self.fallback:
+            assigned = np.zeros(len(bits), dtype=bool)
+            for rows in columns:
+                assigned[rows] = True
+            names.append(self.fallback)
+            columns.append(np.flatnonzero(gated & ~assigned))
+        indptr = np.concatenate(([0], np.cumsum([len(rows) for rows in columns]))).astype('int64')
+        indices = np.concatenate(columns).astype('int64') if columns else np.empty(0, dtype='int64')
+        return ThemeMatrix(themes=names, indptr=indptr, indices=indices, n_rows=len(bits))
+
+    def classify(self, tweets: Union[pd.DataFrame, Sequence[str]], rows: Optional[np.ndarray] = None) -> ThemeMatrix:
+        """
+        One matching pass over a tweet table (cached by id) or a list of texts.
+        With `rows`, only those table rows are classified and matrix rows are
+        positions into `rows`.
+        """
+        if isinstance(tweets, pd.DataFrame):
+            bits = self.matcher.match_bits(tweets, rows)
+        else:
+            bits = self.matcher.scan(tweets)
+        return self.classify_bits(bits)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Phrase Mining
+=============
+
+Streaming n-gram phrase miner: tweets are fed one at a time, n-grams never
+span a stopword, URL or mention, and counts live in bounded-memory top-k
+counters, so memory stays flat however large the corpus is.
+
+Multi-word phrases are ranked by frequency x PMI (words that occur together
+more than chance); single technical terms ("langchain", "gpt-4") are ranked
+by frequency. Miners merge, so themes can be mined in parallel.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tweet_text import STOPWORDS, tokenize
+
+# Below this many tweets in total, a process pool costs more than it saves
+_PARALLEL_MIN_TWEETS = 5000
+
+
+class TopKCounter:
+    """
+    Bounded frequency counter: when it grows past 2 x capacity it keeps the
+    `capacity` largest counts. `error` bounds how much any count can be under.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.error = 0
+
+    def add(self, key: str, count: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + count
+        if len(self.counts) > 2 * self.capacity:
+            self._prune()
+
+    def _prune(self):
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        self.error = max(self.error, ranked[self.capacity][1])
+        self.counts = dict(ranked[:self.capacity])
+
+    def get(self, key: str) -> int:
+        return self.counts.get(key, 0)
+
+    def merge(self, other: 'TopKCounter'):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.error += other.error
+        if len(self.counts) > 2 * self.capacity:
+            self._prune()
+
+    def most_common(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return ranked if k is None else ranked[:k]
+
+
+class PhraseMiner:
+    def __init__(self, max_n: int = 3, capacity: int = 10000):
+        self.max_n = max_n
+        self.words = TopKCounter(capacity)
+        self.ngrams = TopKCounter(capacity)
+        self.total_words = 0
+
+    def feed(self, text: str):
+        """Count one tweet's words and within-run n-grams (runs break at stopwords)"""
+        run: List[str] = []
+        for token in tokenize(text, stopwords=()) + ['']:
+            if token and token not in STOPWORDS:
+                run.append(token)
+                continue
+            for word in run:
+                self.words.add(word)
+            self.total_words += len(run)
+            for n in range(2, self.max_n + 1):
+                for i in range(len(run) - n + 1):
+                    self.ngrams.add(' '.join(run[i:i + n]))
+            run = []
+
+    def feed_all(self, texts: Iterable[str]) -> 'PhraseMiner':
+        for text in texts:
+            self.feed(text)
+        return self
+
+    def merge(self, other: 'PhraseMiner') -> 'PhraseMiner':
+        self.words.merge(other.words)
+        self.ngrams.merge(other.ngrams)
+        self.total_words += other.total_words
+        return self
+
+    def pmi(self, phrase: str) -> float:
+        """log P(phrase) / prod P(word), with word probabilities from unigram counts"""
+        words = phrase.split()
+        total = max(self.total_words, 1)
+        score = math.log(self.ngrams.get(phrase) / total)
+        for word in words:
+            score -= math.log(max(self.words.get(word), 1) / total)
+        return score
+
+    def top_phrases(self, k: int = 10, min_count: int = 2) -> List[str]:
+        """Multi-word phrases by frequency x PMI, then frequent single terms"""
+        scored = []
+        for phrase, count in self.ngrams.counts.items():
+            if count >= min_count:
+                pmi = self.pmi(phrase)
+                if pmi > 0:
+                    scored.append((count * pmi, phrase))
+        scored.sort(reverse=True)
+        phrases = [phrase for _, phrase in scored[:k]]
+        for word, count in self.words.most_common():
+            if len(phrases) >= k or count < min_count:
+                break
+            if not any(word in phrase.split() for phrase in phrases):
+                phrases.append(word)
+        return phrases
+
+
+def mine_phrases(texts: Iterable[str], k: int = 10, min_count: int = 2) -> List[str]:
+    """Top phrases of a tweet stream"""
+    return PhraseMiner().feed_all(texts).top_phrases(k, min_count)
+
+
+def _mine_theme(args) -> Tuple[str, List[str]]:
+    theme, texts, k, min_count = args
+    return theme, mine_phrases(texts, k, min_count)
+
+
+def mine_phrases_by_theme(themes: Dict[str, List[str]], k: int = 10, min_count: int = 2,
+                          max_workers: Optional[int] = None) -> Dict[str, List[str]]:
+    """Top phrases per theme; themes are mined in parallel processes for large corpora"""
+    jobs = [(theme, texts, k, min_count) for theme, texts in themes.items()]
+    if len(jobs) < 2 or sum(len(texts) for texts in themes.values()) < _PARALLEL_MIN_TWEETS:
+        return dict(map(_mine_theme, jobs))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(_mine_theme, jobs))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Streaming Tweet Export Readers
+==============================
+
+Generator-based readers that yield one complete tweet record at a time:
+
+- iter_txt_export: walks the human-readable .txt export through mmap. Record
+  boundaries are the separator line followed by the *next expected*
+  "Tweet #{n}:" header, so tweet text containing "Tweet #", blank lines or
+  field-like lines ("Likes: ...") is kept intact.
+- iter_jsonl_export: one JSON object per line; round-trips multi-line text exactly.
+
+Records are tweet_record.Tweet instances.
+"""
+
+import json
+import mmap
+import os
+import re
+from typing import Iterator, Optional
+
+from tweet_record import Tweet
+
+_USERNAME_RE = re.compile(rb'^Tweets from @(\S+)', re.MULTILINE)
+
+_SEPARATOR = b'-' * 80 + b'\n\n'
+_TAIL_FIELDS = ('Matched Keywords', 'URL', 'Retweets', 'Likes')
+
+
+def _clean(value: Optional[str]) -> str:
+    return '' if value in (None, 'N/A', 'None') else value
+
+
+def _make_record(username: str, date: str, text: str, likes, retweets, url: str, matched_keywords=None) -> Tweet:
+    tweet = Tweet.from_scraped(
+        username or '',
+        _clean(text),
+        _clean(date) or None,
+        _clean(url),
+        _clean(likes) or 0,
+        _clean(retweets) or 0
+    )
+    if isinstance(matched_keywords, str):
+        matched_keywords = [kw.strip() for kw in _clean(matched_keywords).split(',')]
+    tweet.matched_keywords = tuple(kw for kw in matched_keywords or () if kw)
+    return tweet
+
+
+def _parse_txt_block(block: str, username: str = '') -> Optional[Tweet]:
+    """Parse one 'Date/Text/.../URL' block (header line already stripped)"""
+    if not block.startswith('Date:'):
+        return None
+    date_line, _, rest = block.partition('\n')
+    if not rest.startswith('Text:'):
+        return None
+
+    # Trailing fields are single-line and written in a fixed order, so peel
+    # them off from the end; whatever remains after "Text: " is the tweet text.
+    fields = {}
+    body = rest.rstrip('\n')
+    for name in _TAIL_FIELDS:
+        head, sep, line = body.rpartition('\n')
+        if sep and line.startswith(f'{name}:'):
+            fields[name] = line[len(name) + 1:].strip()
+            body = head
+    text = body[len('Text:'):]
+    if text.startswith(' '):
+        text = text[1:]
+
+    return _make_record(
+        username,
+        date_line[len('Date:'):].strip(),
+        text,
+        fields.get('Likes'),
+        fields.get('Retweets'),
+        fields.get('URL'),
+        fields.get('Matched Keywords', '')
+    )
+
+
+def iter_txt_export(path: str) -> Iterator[Tweet]:
+    """Stream tweet records from a .txt export without loading the file into memory"""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        number = 1
+        start = mm.find(b'Tweet #1:\n')
+        header = _USERNAME_RE.search(mm[:start if start != -1 else 0])
+        username = header.group(1).decode('utf-8', errors='replace') if header else ''
+        while start != -1:
+            body_start = start + len(f'Tweet #{number}:\n')
+            next_header = _SEPARATOR + f'Tweet #{number + 1}:\n'.encode()
+            next_start = mm.find(next_header, body_start)
+            if next_start == -1:
+                # Last record: runs to the final separator
+                end = mm.rfind(_SEPARATOR, body_start)
+                end = len(mm) if end == -1 else end
+            else:
+                end = next_start
+
+            record = _parse_txt_block(mm[body_start:end].decode('utf-8', errors='replace'), username)
+            if record is not None:
+                yield record
+
+            if next_start == -1:
+                break
+            start = next_start + len(_SEPARATOR)
+            number += 1
+
+
+def iter_jsonl_export(path: str) -> Iterator[Tweet]:
+    """Stream tweet records from a .jsonl export (tweet_exporters.export_jsonl)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            record = _make_record(
+                row.get('username'),
+                row.get('timestamp') or row.get('date'),
+                row.get('text'),
+                row.get('likes'),
+                row.get('retweets'),
+                row.get('url'),
+                row.get('matched_keywords') or ''
+            )
+            if row.get('id'):
+                record.id = int(row['id'])
+            yield record
+
+
+def iter_tweets(path: str) -> Iterator[Tweet]:
+    """Stream tweet records from a .txt or .jsonl export"""
+    if path.endswith('.jsonl'):
+        return iter_jsonl_export(path)
+    return iter_txt_export(path)
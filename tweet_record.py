@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tweet Record
+============
+
+The one tweet type shared by the scraper, filters, exporters, readers and
+analysis. Metrics are parsed to ints and the date to an epoch timestamp once,
+at extraction; __slots__ keeps the per-tweet footprint small.
+
+Text features (normalized/lowercase text, tokens, hashtags, mentions) are
+computed on first use and kept on the record, so every filter and miner
+shares them; records only streamed through (export readers) never pay for
+them or fill the shared feature cache.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+from tweet_store import parse_count, parse_status_id
+from tweet_text import TextFeatures, normalize_text, text_features
+
+
+class Tweet:
+    __slots__ = ('id', 'timestamp', 'username', 'text', 'likes', 'retweets', 'url',
+                 'matched_keywords', 'session', '_features')
+
+    def __init__(self, id: int = 0, timestamp: Optional[float] = None, username: str = '', text: str = '',
+                 likes: int = 0, retweets: int = 0, url: str = '',
+                 matched_keywords: Optional[Tuple[str, ...]] = None, session: int = 0):
+        self.id = id
+        self.timestamp = timestamp                # epoch seconds (UTC), None if unknown
+        self.username = username
+        self.text = text
+        self.likes = likes
+        self.retweets = retweets
+        self.url = url
+        self.matched_keywords = matched_keywords  # None until keyword matching has run
+        self.session = session
+        self._features: Optional[TextFeatures] = None
+
+    @classmethod
+    def from_scraped(cls, username: str, text: str, date: Optional[str], url: str,
+                     likes='0', retweets='0', session: int = 0) -> 'Tweet':
+        """Build a record from raw scraped strings, parsing id, date and metrics once"""
+        return cls(
+            id=parse_status_id(url),
+            timestamp=parse_timestamp(date),
+            username=username.lstrip('@'),
+            text=text or '',
+            likes=parse_count(likes),
+            retweets=parse_count(retweets),
+            url=url or '',
+            session=session
+        )
+
+    @property
+    def features(self) -> TextFeatures:
+        if self._features is None:
+            self._features = text_features(self.text)
+        return self._features
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        return self.features.tokens
+
+    @property
+    def hashtags(self) -> Tuple[str, ...]:
+        return self.features.hashtags
+
+    @property
+    def mentions(self) -> Tuple[str, ...]:
+        return self.features.mentions
+
+    @property
+    def date(self) -> Optional[str]:
+        """ISO-8601 UTC date string, as Twitter reports it"""
+        if self.timestamp is None:
+            return None
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'date': self.date,
+            'username': self.username,
+            'text': self.text,
+            'likes': self.likes,
+            'retweets': self.retweets,
+            'url': self.url,
+            'matched_keywords': list(self.matched_keywords or ())
+        }
+
+    def __repr__(self) -> str:
+        return f"Tweet(id={self.id}, date={self.date!r}, likes={self.likes}, text={self.text[:40]!r})"
+
+
+def parse_timestamp(date: Optional[str]) -> Optional[float]:
+    """Parse a tweet date string to epoch seconds (UTC); None if missing or unparseable"""
+    if not date or date in ('N/A', 'None'):
+        return None
+    try:
+        parsed = date_parser.parse(date)
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def match_keywords(tweets: Iterable[Tweet], keywords: Optional[List[str]]) -> None:
+    """Record which keywords (case-insensitive substring) each tweet matches, once per tweet"""
+    keywords = [kw.strip() for kw in keywords or [] if kw.strip()]
+    lowered = [(kw, normalize_text(kw).lower()) for kw in keywords]
+    for tweet in tweets:
+        if tweet.matched_keywords is not None:
+            continue
+        text = tweet.features.lower
+        tweet.matched_keywords = tuple(kw for kw, kw_lower in lowered if kw_lower in text)
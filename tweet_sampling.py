@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tweet Sampling
+==============
+
+Seeded samplers for bounding LLM work on large corpora:
+
+- reservoir: uniform sample of a stream in one pass (Algorithm R)
+- stratified: engagement quantile x time bucket strata, allocated in
+  proportion to stratum size with extra weight on high-engagement strata
+
+Samples record both row positions and status ids, so anything derived from
+the sample (e.g. theme tweet_urls) maps back to exact tweets.
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Rough tokens per tweet in a prompt: ~4 characters per token plus numbering
+CHARS_PER_TOKEN = 4
+TWEET_OVERHEAD_TOKENS = 8
+
+
+@dataclass
+class TweetSample:
+    rows: np.ndarray                 # positions into the source table, ascending
+    ids: List[int] = field(default_factory=list)
+    method: str = 'all'
+    population: int = 0
+
+    @property
+    def sampled(self) -> bool:
+        return self.method != 'all'
+
+
+def estimate_tokens(texts: Iterable[str]) -> np.ndarray:
+    return np.fromiter((len(text) // CHARS_PER_TOKEN + TWEET_OVERHEAD_TOKENS for text in texts), dtype='int64')
+
+
+def sample_size_for_budget(texts: np.ndarray, token_budget: int) -> int:
+    """How many (average) tweets fit in a token budget"""
+    if not len(texts):
+        return 0
+    return int(token_budget // max(estimate_tokens(texts).mean(), 1))
+
+
+def reservoir_sample(items: Iterable[int], k: int, seed: int = 42) -> np.ndarray:
+    """Uniform k-sample of a stream of any length in one pass (Algorithm R)"""
+    rng = np.random.default_rng(seed)
+    reservoir: List[int] = []
+    for n, item in enumerate(items):
+        if n < k:
+            reservoir.append(item)
+        else:
+            j = rng.integers(0, n + 1)
+            if j < k:
+                reservoir[j] = item
+    return np.sort(np.array(reservoir, dtype='int64'))
+
+
+def stratified_sample(tweets_df: pd.DataFrame, rows: np.ndarray, k: int, seed: int = 42,
+                      engagement_bins: int = 4, time_bins: int = 6, engagement_boost: float = 1.0) -> np.ndarray:
+    """
+    Engagement x time stratified k-sample of `rows`. Stratum quotas are
+    proportional to size, scaled by (1 + engagement_boost * level / (bins - 1))
+    so the top-engagement quantile gets up to (1 + boost)x its share.
+    """
+    rng = np.random.default_rng(seed)
+    likes = tweets_df['likes'].to_numpy()[rows].astype('float64')
+    engagement = pd.qcut(pd.Series(likes).rank(method='first'), engagement_bins, labels=False).to_numpy() \
+        if len(rows) >= engagement_bins else np.zeros(len(rows), dtype='int64')
+
+    if 'timestamp' in tweets_df.columns:
+        timestamps = pd.to_datetime(tweets_df['timestamp'], utc=True, errors='coerce').iloc[rows]
+        epoch = timestamps.astype('int64').to_numpy()
+        known = timestamps.notna().to_numpy()
+        time_bucket = np.zeros(len(rows), dtype='int64')
+        if known.sum() >= time_bins:
+            time_bucket[known] = pd.qcut(pd.Series(epoch[known]).rank(method='first'), time_bins, labels=False).to_numpy() + 1
+    else:
+        time_bucket = np.zeros(len(rows), dtype='int64')
+
+    strata = engagement.astype('int64') * (time_bins + 1) + time_bucket
+    labels, inverse, sizes = np.unique(strata, return_inverse=True, return_counts=True)
+    levels = labels // (time_bins + 1)
+    weights = sizes * (1 + engagement_boost * levels / max(engagement_bins - 1, 1))
+    quotas = np.minimum(sizes, np.floor(k * weights / weights.sum()).astype('int64'))
+
+    # Hand out the rounding remainder by largest weight, never exceeding a stratum
+    remainder = k - quotas.sum()
+    for s in np.argsort(-weights):
+        if remainder <= 0:
+            break
+        extra = min(sizes[s] - quotas[s], remainder)
+        quotas[s] += extra
+        remainder -= extra
+
+    picked = []
+    for s, quota in enumerate(quotas):
+        if quota:
+            members = np.flatnonzero(inverse == s)
+            picked.append(rng.choice(members, quota, replace=False))
+    positions = np.concatenate(picked) if picked else np.empty(0, dtype='int64')
+    return np.sort(rows[positions])
+
+
+def sample_tweets(tweets_df: pd.DataFrame, rows: np.ndarray, token_budget: int, method: str = 'stratified',
+                  seed: int = 42) -> TweetSample:
+    """Sample `rows` down to what fits in token_budget (no-op when everything fits)"""
+    texts = tweets_df['text'].to_numpy()[rows]
+    k = sample_size_for_budget(texts, token_budget)
+    if method == 'none' or k >= len(rows):
+        sampled_rows, method = np.asarray(rows, dtype='int64'), 'all'
+    elif method == 'reservoir':
+        sampled_rows = reservoir_sample(rows, k, seed=seed)
+    elif method == 'stratified':
+        sampled_rows = stratified_sample(tweets_df, np.asarray(rows), k, seed=seed)
+    else:
+        raise ValueError(f"Unknown sampling method '{method}'. Available: stratified, reservoir, none")
+    ids = tweets_df['id'].to_numpy()[sampled_rows].tolist() if 'id' in tweets_df.columns else []
+    return TweetSample(rows=sampled_rows, ids=ids, method=method, population=len(rows))
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Columnar Tweet Store
+====================
+
+Typed Parquet store for scraped tweets. This is the primary scrape output:
+the .txt and .xlsx exports are kept for humans, while analysis reads the
+store and only the columns it needs.
+
+Schema:
+- id: int64 tweet status id (parsed from the tweet URL)
+- timestamp: UTC datetime
+- username: categorical
+- text, url, matched_keywords: string
+- likes, retweets: int64
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+STORE_EXTENSION = '.parquet'
+
+TWEET_STORE_COLUMNS = [
+    'id', 'timestamp', 'username', 'text', 'likes', 'retweets', 'url', 'matched_keywords'
+]
+
+# Columns needed by theme analysis (GauntletBlogSystem.analyze_tweets_for_themes)
+ANALYSIS_COLUMNS = ['id', 'timestamp', 'text', 'likes', 'url']
+
+_STATUS_ID_RE = re.compile(r'/status/(\d+)')
+# Count as Twitter displays it, commas removed: '1234', '1.2K', '.5K', '3M', '2.5B'
+# (shared by parse_count and the vectorized parse_counts)
+_COUNT_RE = re.compile(r'^\s*(\d+(?:\.\d+)?|\.\d+)\s*([KMB]?)\s*$', re.IGNORECASE)
+_COUNT_MULTIPLIERS = {'': 1, 'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+
+def parse_status_id(url: Optional[str]) -> int:
+    """Extract the numeric status id from a tweet URL (0 if missing)"""
+    match = _STATUS_ID_RE.search(url or '')
+    return int(match.group(1)) if match else 0
+
+
+def parse_count(value) -> int:
+    """Parse an engagement count as displayed by Twitter ('1,234', '1.2K', '3M')"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 0 if pd.isna(value) else int(value)
+    match = _COUNT_RE.match(str(value).replace(',', ''))
+    if not match:
+        return 0
+    return int(round(float(match.group(1)) * _COUNT_MULTIPLIERS[match.group(2).upper()]))
+
+
+def parse_counts(values) -> np.ndarray:
+    """Vectorized parse_count: abbreviated counts ('1,234', '1.2K', '3M') -> int64 array"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series.to_numpy(dtype='int64')  # already typed at ingest: no copy
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.fillna(0).to_numpy(dtype='int64')
+    parts = series.astype(str).str.replace(',', '', regex=False).str.extract(_COUNT_RE)
+    numbers = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype='float64')
+    multipliers = parts[1].str.upper().map(_COUNT_MULTIPLIERS).to_numpy(dtype='float64')
+    counts = np.rint(numbers * multipliers)
+    return np.where(np.isnan(counts), 0, counts).astype('int64')
+
+
+def store_path_for(export_path: str) -> str:
+    """Return the store path that sits next to a .txt/.xlsx export"""
+    return os.path.splitext(export_path)[0] + STORE_EXTENSION
+
+
+def tweets_to_frame(tweets: List, username: Optional[str] = None) -> pd.DataFrame:
+    """Convert Tweet records (see tweet_record.Tweet) into a typed tweet table"""
+    count = len(tweets)
+    df = pd.DataFrame({
+        'id': np.fromiter((tweet.id for tweet in tweets), dtype='int64', count=count),
+        'timestamp': pd.to_datetime(
+            np.fromiter((np.nan if tweet.timestamp is None else tweet.timestamp for tweet in tweets), dtype='float64', count=count),
+            unit='s', utc=True
+        ),
+        'username': pd.Categorical([tweet.username or username or '' for tweet in tweets]),
+        'text': [tweet.text for tweet in tweets],
+        'likes': np.fromiter((tweet.likes for tweet in tweets), dtype='int64', count=count),
+        'retweets': np.fromiter((tweet.retweets for tweet in tweets), dtype='int64', count=count),
+        'url': [tweet.url for tweet in tweets],
+        'matched_keywords': [', '.join(tweet.matched_keywords or ()) for tweet in tweets],
+    }, columns=TWEET_STORE_COLUMNS)
+    return df
+
+
+# Legacy Excel headers -> tweet store columns
+_LEGACY_COLUMNS = {
+    'Tweet Text': 'text',
+    'Tweet URL': 'url',
+    'Likes': 'likes',
+    'Retweets': 'retweets',
+    'Date': 'timestamp',
+    'date': 'timestamp',
+    'Username': 'username',
+    'Matched Keywords': 'matched_keywords'
+}
+
+
+def normalize_tweet_table(df: pd.DataFrame, username: Optional[str] = None) -> pd.DataFrame:
+    """Map a legacy export (either column convention) onto the typed tweet store schema"""
+    df = df.rename(columns={k: v for k, v in _LEGACY_COLUMNS.items() if k in df.columns})
+
+    def column(name, default=''):
+        return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+    urls = column('url').fillna('').astype(str).replace('N/A', '')
+    if 'id' in df.columns:
+        ids = pd.to_numeric(df['id'], errors='coerce').fillna(0).astype('int64')
+    else:
+        ids = urls.map(parse_status_id).astype('int64')
+    usernames = column('username', username or '').fillna(username or '').astype(str).str.lstrip('@')
+
+    out = pd.DataFrame({
+        'id': ids,
+        'timestamp': pd.to_datetime(column('timestamp', None), utc=True, errors='coerce'),
+        'username': usernames.astype('category'),
+        'text': column('text').fillna('').astype(str),
+        'likes': parse_counts(column('likes', 0)),
+        'retweets': parse_counts(column('retweets', 0)),
+        'url': urls,
+        'matched_keywords': column('matched_keywords').fillna('').astype(str).replace('N/A', '')
+    }, columns=TWEET_STORE_COLUMNS)
+    return out
+
+
+def write_tweet_store(path: str, df: pd.DataFrame) -> str:
+    """Write a tweet table (see tweets_to_frame) to a Parquet store and return its path"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    df.to_parquet(path, index=False)
+    return path
+
+
+def read_tweet_store(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a Parquet tweet store, loading only the requested columns"""
+    return pd.read_parquet(path, columns=columns)
+
+
+class TweetTableCache:
+    """
+    LRU cache of parsed tweet tables keyed by (path, mtime, size, columns).
+
+    Entries are evicted least-recently-used first once either the entry count
+    or the total in-memory size passes its cap. A changed file gets a new key,
+    so stale tables are never served.
+    """
+
+    def __init__(self, max_entries: int = 16, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._tables = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, key) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._tables.get(key)
+            if df is None:
+                self.misses += 1
+                return None
+            self._tables.move_to_end(key)
+            self.hits += 1
+            return df
+
+    def put(self, key, df: pd.DataFrame):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # Drop older versions of the same file/columns
+            for old_key in [k for k in self._tables if k[0] == key[0] and k[3] == key[3]]:
+                self._tables.pop(old_key)
+                self._sizes.pop(old_key)
+            self._tables[key] = df
+            self._sizes[key] = size
+            while len(self._tables) > self.max_entries or self.total_bytes > self.max_bytes:
+                evicted, _ = self._tables.popitem(last=False)
+                self._sizes.pop(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._sizes.clear()
+
+    def info(self) -> Dict:
+        return {
+            'entries': len(self._tables),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+tweet_table_cache = TweetTableCache(
+    max_entries=int(os.getenv('TWEET_TABLE_CACHE_ENTRIES', 16)),
+    max_bytes=int(os.getenv('TWEET_TABLE_CACHE_MB', 512)) * 1024 * 1024
+)
+
+
+def load_tweet_table(tweet_file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load tweets for analysis from a store or a legacy export.
+
+    A .xlsx/.txt path is resolved to its sibling store when one exists, so the
+    Excel file is only parsed for old runs that predate the store.
+
+    Parsed tables are memoized in tweet_table_cache. Callers get a shallow
+    copy that shares the cached column data: treat it as read-only (adding
+    columns to it is fine, they don't leak back into the cache).
+    """
+    if not tweet_file_path.endswith(STORE_EXTENSION):
+        candidate = store_path_for(tweet_file_path)
+        if os.path.exists(candidate):
+            tweet_file_path = candidate
+
+    stat = os.stat(tweet_file_path)
+    key = (os.path.abspath(tweet_file_path), stat.st_mtime_ns, stat.st_size, tuple(columns) if columns else None)
+    df = tweet_table_cache.get(key)
+    if df is None:
+        df = _read_tweet_table(tweet_file_path, columns)
+        tweet_table_cache.put(key, df)
+    return df.copy(deep=False)
+
+
+def _read_tweet_table(tweet_file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    if tweet_file_path.endswith(STORE_EXTENSION):
+        return read_tweet_store(tweet_file_path, columns=columns)
+    if tweet_file_path.endswith(('.txt', '.jsonl')):
+        from tweet_readers import iter_tweets
+        df = tweets_to_frame(list(iter_tweets(tweet_file_path)))
+    elif tweet_file_path.endswith('.xlsx'):
+        df = normalize_tweet_table(pd.read_excel(tweet_file_path))
+    else:
+        df = normalize_tweet_table(pd.read_csv(tweet_file_path))
+    return df[columns] if columns else df
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tweet Text Processing
+=====================
+
+Shared tokenizer and stopword list for the local text analysis stages
+(clustering, phrase mining, trends, dedupe). Tokens are lowercase words of
+the NFKC-normalized text (so "𝐀𝐈" reads as "ai"); URLs and @mentions are
+dropped and hashtags keep their word ("#AI" -> "ai").
+
+Each text is analyzed once (text_features): normalized and lowercase forms,
+tokens, hashtags and mentions are memoized by text in a bounded LRU
+(TWEET_TEXT_CACHE_SIZE texts), so the stages of an analysis run reuse them
+instead of re-tokenizing while a long-running server's memory stays flat.
+Tweet records compute theirs on first use and keep them.
+"""
+
+import os
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import List, Tuple
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_MENTION_RE = re.compile(r'@\w+')
+_HASHTAG_RE = re.compile(r'#(\w+)')
+_MENTION_NAME_RE = re.compile(r'@(\w+)')
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9+#'\-]*[a-z0-9+#]|[a-z]")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before being
+below between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down
+during each even ever every few for from further get gets getting go goes going gonna got had hadn't has
+hasn't have haven't having he he'd he'll he's her here here's hers herself him himself his how how's i
+i'd i'll i'm i've if in into is isn't it it's its itself just let's like lot lots make made many me
+more most much must mustn't my myself need new no nor not now of off on once one only or other ought
+our ours ourselves out over own really rt same say says she she'd she'll she's should shouldn't so
+some still such than that that's the their theirs them themselves then there there's these they
+they'd they'll they're they've thing things think this those through to too u up us very via want
+was wasn't way we we'd we'll we're we've well were weren't what what's when when's where where's which
+while who who's whom why why's will with won't would wouldn't yeah yes yet you you'd you'll you're
+you've your yours yourself yourselves
+""".split())
+
+
+class TextFeatures:
+    """Derived forms of one tweet text; tokens keep stopwords (filtered per consumer)"""
+    __slots__ = ('normalized', 'lower', 'tokens', 'hashtags', 'mentions')
+
+    def __init__(self, normalized: str = '', lower: str = '', tokens: Tuple[str, ...] = (),
+                 hashtags: Tuple[str, ...] = (), mentions: Tuple[str, ...] = ()):
+        self.normalized = normalized
+        self.lower = lower
+        self.tokens = tokens
+        self.hashtags = hashtags
+        self.mentions = mentions
+
+
+_EMPTY_FEATURES = TextFeatures()
+
+
+def normalize_text(text: str) -> str:
+    """NFKC form (compatibility characters such as math-bold letters become plain ones)"""
+    return text if text.isascii() else unicodedata.normalize('NFKC', text)
+
+
+def analyze_text(text: str) -> TextFeatures:
+    """Normalize, lowercase and tokenize a text (uncached; see text_features)"""
+    if not isinstance(text, str):
+        return _EMPTY_FEATURES
+    normalized = normalize_text(text)
+    lower = normalized.lower()
+    without_urls = _URL_RE.sub(' ', lower)
+    tokens = []
+    for token in _TOKEN_RE.findall(_MENTION_RE.sub(' ', without_urls).replace('#', ' ')):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if len(token) > 1:
+            tokens.append(sys.intern(token))
+    return TextFeatures(
+        normalized=normalized,
+        lower=lower,
+        tokens=tuple(tokens),
+        hashtags=tuple(_HASHTAG_RE.findall(without_urls)),
+        mentions=tuple(_MENTION_NAME_RE.findall(without_urls))
+    )
+
+
+_FEATURES_CACHE_SIZE = int(os.getenv('TWEET_TEXT_CACHE_SIZE', 20000))
+_cached_features = lru_cache(maxsize=_FEATURES_CACHE_SIZE)(analyze_text)
+
+
+def text_features(text: str) -> TextFeatures:
+    """analyze_text, memoized by text (least recently used texts are evicted first)"""
+    if not isinstance(text, str):
+        return _EMPTY_FEATURES
+    return _cached_features(text)
+
+
+def tokenize(text: str, stopwords=STOPWORDS) -> List[str]:
+    """Lowercase word tokens of a tweet, without URLs, mentions or stopwords"""
+    return [token for token in text_features(text).tokens if token not in stopwords]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Trending Topic Detection
+========================
+
+Incremental "last 30 days spike" detector, one state file per account
+(tweets/trends/{username}.npz):
+
+- recent: exact daily term/bigram counts for the trailing window
+- baseline: a count-min sketch of everything older, decayed with a half-life
+  so the baseline rolls forward instead of growing forever
+- seen: status ids already counted, so overlapping scrapes aren't double counted
+
+update() costs O(new tweets); spikes() scores the window's terms against the
+baseline rate (Poisson z-score) without re-aggregating history. Until the
+baseline spans min_baseline_days (default: one window) there is nothing to
+compare against, and spikes() reports none.
+
+State updates take a per-account file lock, so the scraper app and the
+dashboard can update the same account concurrently; saves are atomic.
+"""
+
+import json
+import os
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from file_lock import file_lock
+from tweet_text import tokenize
+
+DEFAULT_TRENDS_DIR = os.path.join('tweets', 'trends')
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 1 << 15, depth: int = 4, table: Optional[np.ndarray] = None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype='float32')
+
+    def _buckets(self, terms: List[str]) -> np.ndarray:
+        """(depth, len(terms)) bucket indices via double hashing"""
+        h1 = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in terms), dtype='int64', count=len(terms))
+        h2 = np.fromiter((zlib.adler32(t.encode('utf-8')) | 1 for t in terms), dtype='int64', count=len(terms))
+        return (h1[None, :] + np.arange(self.depth)[:, None] * h2[None, :]) % self.width
+
+    def add(self, counts: Dict[str, float]):
+        if not counts:
+            return
+        buckets = self._buckets(list(counts))
+        values = np.fromiter(counts.values(), dtype='float32', count=len(counts))
+        for row in range(self.depth):
+            np.add.at(self.table[row], buckets[row], values)
+
+    def query(self, terms: List[str]) -> np.ndarray:
+        if not terms:
+            return np.empty(0, dtype='float32')
+        buckets = self._buckets(terms)
+        return self.table[np.arange(self.depth)[:, None], buckets].min(axis=0)
+
+
+def _day(day: str) -> datetime:
+    return datetime.strptime(day, '%Y-%m-%d')
+
+
+def _terms(text: str) -> List[str]:
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class TrendState:
+    """Trend counters for one account"""
+
+    def __init__(self, window_days: int = 30, half_life_days: float = 180.0,
+                 min_baseline_days: Optional[int] = None):
+        self.window_days = window_days
+        self.half_life_days = half_life_days
+        self.min_baseline_days = window_days if min_baseline_days is None else min_baseline_days
+        self.recent: Dict[str, Counter] = {}   # 'YYYY-MM-DD' -> term counts
+        self.baseline = CountMinSketch()
+        self.baseline_start: Optional[str] = None    # first calendar day covered by the baseline
+        self.baseline_through: Optional[str] = None  # last calendar day folded into the baseline
+        self.latest_day: Optional[str] = None
+        self.seen = np.empty(0, dtype='int64')
+
+    @property
+    def decay(self) -> float:
+        return 0.5 ** (1 / self.half_life_days)
+
+    @property
+    def baseline_days(self) -> float:
+        """Effective (decayed) number of calendar days in the baseline"""
+        if self.baseline_start is None or self.baseline_through is None:
+            return 0.0
+        n = (_day(self.baseline_through) - _day(self.baseline_start)).days + 1
+        return (1 - self.decay ** n) / (1 - self.decay)
+
+    @property
+    def baseline_span_days(self) -> int:
+        """Calendar days of history covered by the baseline"""
+        if self.baseline_start is None or self.baseline_through is None:
+            return 0
+        return (_day(self.baseline_through) - _day(self.baseline_start)).days + 1
+
+    def _window_start(self) -> Optional[str]:
+        if self.latest_day is None:
+            return None
+        return (_day(self.latest_day) - timedelta(days=self.window_days - 1)).strftime('%Y-%m-%d')
+
+    def _roll(self):
+        """Fold calendar days that left the window into the decayed baseline sketch"""
+        window_start = self._window_start()
+        expired = sorted(day for day in self.recent if day < window_start)
+        if not expired and self.baseline_through is None:
+            return
+        day = _day(self.baseline_through) + timedelta(days=1) if self.baseline_through else _day(expired[0])
+        if self.baseline_start is None:
+            self.baseline_start = day.strftime('%Y-%m-%d')
+        end = _day(window_start)
+        while day < end:
+            key = day.strftime('%Y-%m-%d')
+            self.baseline.table *= self.decay
+            self.baseline.add(self.recent.pop(key, None) or {})
+            self.baseline_through = key
+            day += timedelta(days=1)
+
+    def update(self, table: pd.DataFrame) -> int:
+        """Fold new tweets (id, timestamp, text) into the counters; returns how many were new"""
+        ids = table['id'].to_numpy(dtype='int64')
+        new = ~np.isin(ids, self.seen) & (ids > 0)
+        if not new.any():
+            return 0
+        new_rows = table[new]
+        days = pd.to_datetime(new_rows['timestamp'], utc=True, errors='coerce').dt.strftime('%Y-%m-%d')
+        window_start = self._window_start()
+
+        late = Counter()
+        for day, text in zip(days, new_rows['text']):
+            if not isinstance(day, str):
+                continue
+            if window_start and day < window_start:
+                # Backfilled history goes straight into the baseline
+                late.update(_terms(text))
+                if self.baseline_start is None or day < self.baseline_start:
+                    self.baseline_start = day
+                continue
+            self.recent.setdefault(day, Counter()).update(_terms(text))
+        self.baseline.add(late)
+        if late and self.baseline_through is None:
+            self.baseline_through = (_day(window_start) - timedelta(days=1)).strftime('%Y-%m-%d')
+
+        if self.recent:
+            self.latest_day = max(self.recent)
+        self._roll()
+        self.seen = np.union1d(self.seen, ids[new])
+        return int(new.sum())
+
+    def spikes(self, top_k: int = 20, min_count: int = 3) -> List[Dict]:
+        """Window terms ranked by spike score vs. the baseline daily rate (none while the baseline is too short)"""
+        if self.baseline_span_days < self.min_baseline_days:
+            return []
+        window = Counter()
+        for counts in self.recent.values():
+            window.update(counts)
+        terms = [term for term, count in window.items() if count >= min_count]
+        if not terms:
+            return []
+        observed = np.array([window[t] for t in terms], dtype='float64')
+        baseline_rate = self.baseline.query(terms) / max(self.baseline_days, 1.0)
+        expected = baseline_rate * self.window_days
+        scores = (observed - expected) / np.sqrt(expected + 1)
+        order = np.argsort(-scores)[:top_k]
+        return [
+            {'term': terms[i], 'count': int(observed[i]), 'expected': round(float(expected[i]), 2),
+             'score': round(float(scores[i]), 2)}
+            for i in order if scores[i] > 0
+        ]
+
+
+class TrendDetector:
+    def __init__(self, trends_dir: str = DEFAULT_TRENDS_DIR, window_days: int = 30,
+                 min_baseline_days: Optional[int] = None):
+        self.trends_dir = trends_dir
+        self.window_days = window_days
+        self.min_baseline_days = min_baseline_days
+
+    def _path(self, username: str) -> str:
+        return os.path.join(self.trends_dir, f"{username.lstrip('@').lower()}.npz")
+
+    def load(self, username: str) -> TrendState:
+        state = TrendState(window_days=self.window_days, min_baseline_days=self.min_baseline_days)
+        path = self._path(username)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                state.baseline = CountMinSketch(table=data['baseline'].copy(),
+                                                width=data['baseline'].shape[1], depth=data['baseline'].shape[0])
+                state.seen = data['seen'].copy()
+            state.recent = {day: Counter(counts) for day, counts in meta['recent'].items()}
+            state.baseline_start = meta['baseline_start']
+            state.baseline_through = meta['baseline_through']
+            state.latest_day = meta['latest_day']
+        return state
+
+    def save(self, username: str, state: TrendState):
+        os.makedirs(self.trends_dir, exist_ok=True)
+        meta = json.dumps({
+            'recent': state.recent,
+            'baseline_start': state.baseline_start,
+            'baseline_through': state.baseline_through,
+            'latest_day': state.latest_day,
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        })
+        path = self._path(username)
+        tmp_path = path[:-len('.npz')] + '.tmp.npz'
+        np.savez(tmp_path, baseline=state.baseline.table, seen=state.seen, meta=np.array(meta))
+        os.replace(tmp_path, path)
+
+    def update(self, username: str, table: pd.DataFrame) -> int:
+        """Fold a scrape (or a loaded tweet table) into the account's trend state"""
+        # Shared by every detector instance and process (app.py and _score_trends each make their own)
+        with file_lock(self._path(username) + '.lock'):
+            state = self.load(username)
+            added = state.update(table)
+            if added:
+                self.save(username, state)
+            return added
+
+    def spikes(self, username: str, top_k: int = 20, min_count: int = 3) -> List[Dict]:
+        return self.load(username).spikes(top_k=top_k, min_count=min_count)
@@ -8,6 +8,8 @@ import time
 
 # Import existing functionality
 from gauntlet_blog_system import GauntletBlogSystem
+from tweet_catalog import get_catalog
+from tweet_exporters import parse_formats
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -80,19 +82,26 @@ def scrape_tweets():
     username = data.get('username', '').strip()
     keywords = data.get('keywords', '').strip()
     start_date = data.get('startDate', '')
+    formats = data.get('formats')
     
     if not username:
         return jsonify({'error': 'Username is required'}), 400
     
+    # Reject unknown export formats now rather than after the scrape
+    try:
+        formats = parse_formats(formats)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Start scraping in background thread
     scraping_in_progress = True
-    thread = threading.Thread(target=run_twitter_scraping, args=(username, keywords, start_date))
+    thread = threading.Thread(target=run_twitter_scraping, args=(username, keywords, start_date, formats))
     thread.daemon = True
     thread.start()
     
     return jsonify({'message': 'Scraping started'}), 200
 
-def run_twitter_scraping(username, keywords, start_date):
+def run_twitter_scraping(username, keywords, start_date, formats=None):
     """Run Twitter scraping in background thread"""
     global scraping_in_progress
     
@@ -105,13 +114,12 @@ def run_twitter_scraping(username, keywords, start_date):
             socketio.emit('scraping_progress', {'message': message})
         
         # Run the scraping
-        result = scrape_twitter_profile(username, keywords, start_date, emit_progress)
+        result = scrape_twitter_profile(username, keywords, start_date, emit_progress, formats)
         
         if result and result.get('success'):
-            # Get the latest tweet file
-            tweet_files = [f for f in os.listdir('.') if f.startswith('tweets_') and f.endswith('.xlsx')]
-            if tweet_files:
-                latest_file = max(tweet_files, key=os.path.getctime)
+            # Get the tweet file this scrape just wrote (catalog lookup, no directory scan)
+            latest_file = result.get('store_file') or get_catalog().best_for_analysis(username, largest=False)
+            if latest_file:
                 
                 # Automatically trigger blog generation if keywords were used
                 if keywords.strip():
@@ -171,24 +179,25 @@ def run_blog_generation(tweet_file):
         
         # Phase 2: Generate 3 blogs
         num_blogs = min(3, len(blog_topics))
-        generated_blogs = []
+        topics = blog_topics[:num_blogs]
+        emit_progress(f'🤖 Generating {num_blogs} blogs ({min(blog_system.blog_concurrency, num_blogs)} at a time)...')
         
-        for i, topic in enumerate(blog_topics[:num_blogs]):
-            emit_progress(f'🤖 Generating blog {i+1}/{num_blogs}: {topic.canonical_question}')
-            
-            blog_post = generate_blog_with_updates(topic, emit_progress)
-            if blog_post:
-                generated_blogs.append(blog_post)
-                
-        emit_progress('🚀 PHASE 3: Saving blogs locally...')
-        
-        # Save blogs locally
+        # Blogs generate concurrently; each is saved as soon as it completes
         blog_files = []
-        for blog_post in generated_blogs:
+        completed = 0
+        
+        def on_complete(i, topic, blog_post):
+            nonlocal completed
+            completed += 1
+            if not blog_post:
+                return
             filename = blog_system._save_blog_locally(blog_post)
             if filename:
                 blog_files.append(filename)
-                emit_progress(f'💾 Saved: {filename}')
+            emit_progress(f'💾 Blog {completed}/{num_blogs} saved: {blog_post.title}')
+        
+        generated_blogs = blog_system.generate_blog_posts(
+            topics, generate=lambda topic: generate_blog_with_updates(topic, emit_progress), on_complete=on_complete)
         
         # Generate robots.txt
         blog_system.generate_robots_txt()